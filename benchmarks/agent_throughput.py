@@ -0,0 +1,68 @@
+"""Measure agent hot-path throughput offline and compare against a baseline.
+
+Drives AgentLoop through MessageBus with a scripted LLM (no network) over a
+grid of sessions x turns x tool calls; see `nanobot bench` for a single sweep.
+
+    python benchmarks/agent_throughput.py [--output results.json] [--baseline old.json] [--tolerance 0.2]
+
+Prints the results as JSON. With --baseline, exits non-zero when
+messages/sec drops or p95 turn latency grows by more than the tolerance for
+any grid point present in both runs.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from loguru import logger
+
+from nanobot.agent.bench import run_sweep
+
+GRID = {"sessions": [1, 10, 50], "turns": [5], "tool_calls": [0, 3]}
+
+
+def _key(result: dict) -> tuple:
+    return result["sessions"], result["turns"], result["tool_calls"], result["latency"]
+
+
+def _regressions(results: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    before = {_key(r): r for r in baseline}
+    found = []
+    for r in results:
+        old = before.get(_key(r))
+        if old is None:
+            continue
+        if r["messages_per_s"] < old["messages_per_s"] * (1 - tolerance):
+            found.append(f"{_key(r)}: messages/s {old['messages_per_s']} -> {r['messages_per_s']}")
+        if r["turn_latency_ms"]["p95"] > old["turn_latency_ms"]["p95"] * (1 + tolerance):
+            found.append(f"{_key(r)}: p95 {old['turn_latency_ms']['p95']} ms -> {r['turn_latency_ms']['p95']} ms")
+    return found
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--latency", default="0", help="Simulated LLM latency spec (see ReplayProvider)")
+    parser.add_argument("--output", type=Path, help="Write results JSON here")
+    parser.add_argument("--baseline", type=Path, help="Results JSON of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    logger.disable("nanobot")
+    results = await run_sweep(GRID["sessions"], GRID["turns"], GRID["tool_calls"], latency=args.latency)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+    if args.baseline:
+        regressions = _regressions(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
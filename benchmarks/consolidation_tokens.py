@@ -0,0 +1,77 @@
+"""Compare the token cost of patch and full-rewrite memory consolidation.
+
+Replays recorded sessions from the configured workspace through
+`MemoryStore.consolidate` once per mode. Each run works on a scratch copy of
+MEMORY.md, so the workspace is left untouched.
+
+    python benchmarks/consolidation_tokens.py [--sessions 5] [--window 50]
+
+Prints one JSON object per session and mode, then per-mode totals.
+"""
+
+import argparse
+import asyncio
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from nanobot.agent.memory import MemoryStore
+from nanobot.cli.commands import _make_provider, _make_session_manager
+from nanobot.config.loader import load_config
+from nanobot.session.manager import Session
+
+MODES = ("patch", "full")
+
+
+async def _run(session: Session, memory_file: Path, provider, model: str, mode: str, window: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryStore(Path(tmp))
+        if memory_file.exists():
+            shutil.copy(memory_file, store.memory_file)
+        copy = Session(key=session.key, messages=list(session.messages))
+        started = time.perf_counter()
+        ok = await store.consolidate(copy, provider, model, memory_window=window, mode=mode)
+        elapsed = time.perf_counter() - started
+        usage = store.last_usage or {}
+        return {
+            "session": session.key,
+            "mode": mode,
+            "ok": ok,
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "seconds": round(elapsed, 2),
+            "memory_chars": len(store.read_long_term()),
+        }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--sessions", type=int, default=5, help="Most recent sessions to replay")
+    parser.add_argument("--window", type=int, default=50, help="memory_window passed to consolidate")
+    args = parser.parse_args()
+
+    config = load_config()
+    provider = _make_provider(config)
+    model = config.agents.defaults.model
+    manager = _make_session_manager(config)
+    memory_file = config.workspace_path / "memory" / "MEMORY.md"
+
+    totals = {m: {"prompt_tokens": 0, "completion_tokens": 0, "seconds": 0.0} for m in MODES}
+    for info in manager.list_sessions()[:args.sessions]:
+        session = manager.get_or_create(info["key"])
+        manager.page_in(session)
+        session.last_consolidated = 0
+        if len(session.messages) <= args.window // 2:
+            continue
+        for mode in MODES:
+            result = await _run(session, memory_file, provider, model, mode, args.window)
+            print(json.dumps(result, ensure_ascii=False))
+            for k in totals[mode]:
+                totals[mode][k] += result[k]
+    print(json.dumps({"totals": totals}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""大模型调用共享的 HTTP 连接池（keep-alive、可选 HTTP/2），并记录连接 / 首字节 / 总耗时。"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import time
+from typing import Any
+
+import httpx
+
+from joytrunk.config_schema import DEFAULT_CONFIG
+
+# 每个事件循环一个 client：连接不能跨事件循环复用
+_clients: dict[int, httpx.AsyncClient] = {}
+
+
+def _http_settings() -> dict[str, Any]:
+    """全局 config.json 的 http 段，缺省项取 DEFAULT_CONFIG。"""
+    settings = dict(DEFAULT_CONFIG["http"])
+    try:
+        from joytrunk.config_store import load_config
+
+        custom = load_config().get("http")
+        if isinstance(custom, dict):
+            settings.update(custom)
+    except Exception:
+        pass
+    return settings
+
+
+def get_client() -> httpx.AsyncClient:
+    """返回当前事件循环共享的 AsyncClient（首次调用时按 config 创建）。"""
+    loop_id = id(asyncio.get_running_loop())
+    client = _clients.get(loop_id)
+    if client is None or client.is_closed:
+        s = _http_settings()
+        _clients.clear()
+        client = _clients[loop_id] = httpx.AsyncClient(
+            timeout=float(s["timeout"]),
+            http2=bool(s["http2"]) and importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(
+                max_connections=int(s["maxConnections"]),
+                max_keepalive_connections=int(s["maxKeepaliveConnections"]),
+                keepalive_expiry=float(s["keepaliveExpiry"]),
+            ),
+        )
+    return client
+
+
+async def aclose() -> None:
+    """关闭当前事件循环的共享 client。"""
+    client = _clients.pop(id(asyncio.get_running_loop()), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def post_json(url: str, headers: dict[str, str], body: dict[str, Any]) -> tuple[dict, dict[str, float]]:
+    """
+    经共享连接池 POST JSON，返回 (响应 JSON, 耗时)。
+    耗时单位毫秒：connect_ms 为建连（TCP + TLS，复用连接时为 0），ttfb_ms 为发出请求到收到响应头，total_ms 为总耗时。
+    """
+    start = time.perf_counter()
+    marks: dict[str, float] = {}
+    timing = {"connect_ms": 0.0, "ttfb_ms": 0.0, "total_ms": 0.0}
+
+    async def trace(event: str, info: dict) -> None:
+        now = time.perf_counter()
+        if event == "connection.connect_tcp.started":
+            marks["connect"] = now
+        elif event in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+            timing["connect_ms"] = round((now - marks.get("connect", now)) * 1000, 1)
+        elif event.endswith("send_request_headers.started"):
+            marks["sent"] = now
+        elif event.endswith("receive_response_headers.complete"):
+            timing["ttfb_ms"] = round((now - marks.get("sent", start)) * 1000, 1)
+
+    r = await get_client().post(url, headers=headers, json=body, extensions={"trace": trace})
+    r.raise_for_status()
+    data = r.json()
+    timing["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return data, timing
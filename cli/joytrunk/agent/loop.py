@@ -8,6 +8,7 @@ import uuid
 from typing import Any, Awaitable, Callable
 
 from joytrunk import paths
+from joytrunk.agent import http_pool
 from joytrunk.agent.context import ContextBuilder
 from joytrunk.agent.employee_config import get_llm_params
 from joytrunk.agent.provider import chat as provider_chat, chat_via_router
@@ -82,111 +83,116 @@ async def run_employee_loop(
     final_content = None
     total_usage = {"prompt_tokens": 0, "completion_tokens": 0}
 
-    while iteration < MAX_ITERATIONS:
-        iteration += 1
-        run_log(
-            employee_id,
-            EVENT_ITERATION,
-            {"iteration": iteration, "model": model, "messages_count": len(messages)},
-            run_id=run_id,
-        )
-        run_log(
-            employee_id,
-            EVENT_LLM_REQUEST,
-            {
-                "iteration": iteration,
-                "model": model,
-                "messages_count": len(messages),
-                "messages": prepare_messages_for_log(messages),
-            },
-            run_id=run_id,
-        )
-        if params["source"] == "custom":
-            response = await provider_chat(
-                params["base_url"],
-                params["api_key"],
-                model,
-                messages,
-                tools=tools_reg.get_definitions(),
-                max_tokens=max_tokens,
-                temperature=temperature,
+    # 本轮的大模型调用共用一个连接池；每条消息各跑一个事件循环，结束时关闭，不留给下一轮
+    try:
+        while iteration < MAX_ITERATIONS:
+            iteration += 1
+            run_log(
+                employee_id,
+                EVENT_ITERATION,
+                {"iteration": iteration, "model": model, "messages_count": len(messages)},
+                run_id=run_id,
             )
-        else:
-            response = await chat_via_router(
-                params["gateway_base_url"],
-                params["owner_id"],
-                model,
-                messages,
-                tools=tools_reg.get_definitions(),
-                max_tokens=max_tokens,
-                temperature=temperature,
+            run_log(
+                employee_id,
+                EVENT_LLM_REQUEST,
+                {
+                    "iteration": iteration,
+                    "model": model,
+                    "messages_count": len(messages),
+                    "messages": prepare_messages_for_log(messages),
+                },
+                run_id=run_id,
             )
-        if response.usage:
-            total_usage["prompt_tokens"] += response.usage.get("prompt_tokens", 0)
-            total_usage["completion_tokens"] += response.usage.get("completion_tokens", 0)
-
-        run_log(
-            employee_id,
-            EVENT_LLM_RESPONSE,
-            {
-                "iteration": iteration,
-                "content": truncate_str(response.content or "", MAX_RESPONSE_CONTENT_LEN),
-                "content_len": len(response.content or ""),
-                "tool_calls": [
-                    {"name": tc.name, "arguments": tc.arguments}
-                    for tc in response.tool_calls
-                ],
-                "usage": dict(response.usage) if response.usage else None,
-            },
-            run_id=run_id,
-        )
+            if params["source"] == "custom":
+                response = await provider_chat(
+                    params["base_url"],
+                    params["api_key"],
+                    model,
+                    messages,
+                    tools=tools_reg.get_definitions(),
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                )
+            else:
+                response = await chat_via_router(
+                    params["gateway_base_url"],
+                    params["owner_id"],
+                    model,
+                    messages,
+                    tools=tools_reg.get_definitions(),
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                )
+            if response.usage:
+                total_usage["prompt_tokens"] += response.usage.get("prompt_tokens", 0)
+                total_usage["completion_tokens"] += response.usage.get("completion_tokens", 0)
 
-        if response.has_tool_calls:
             run_log(
                 employee_id,
-                EVENT_TOOL_CALLS,
-                {"iteration": iteration, "tool_names": [tc.name for tc in response.tool_calls]},
+                EVENT_LLM_RESPONSE,
+                {
+                    "iteration": iteration,
+                    "content": truncate_str(response.content or "", MAX_RESPONSE_CONTENT_LEN),
+                    "content_len": len(response.content or ""),
+                    "tool_calls": [
+                        {"name": tc.name, "arguments": tc.arguments}
+                        for tc in response.tool_calls
+                    ],
+                    "usage": dict(response.usage) if response.usage else None,
+                    "timing": response.timing,
+                },
                 run_id=run_id,
             )
-            if on_progress and response.content:
-                await _safe_progress(on_progress, response.content.strip())
-            tool_call_dicts = [
-                {
-                    "id": tc.id,
-                    "type": "function",
-                    "function": {"name": tc.name, "arguments": json.dumps(tc.arguments, ensure_ascii=False)},
-                }
-                for tc in response.tool_calls
-            ]
-            context.add_assistant_message(messages, response.content, tool_call_dicts)
-            for tc in response.tool_calls:
-                result = await tools_reg.execute(tc.name, tc.arguments)
+
+            if response.has_tool_calls:
                 run_log(
                     employee_id,
-                    EVENT_TOOL_RESULT,
+                    EVENT_TOOL_CALLS,
+                    {"iteration": iteration, "tool_names": [tc.name for tc in response.tool_calls]},
+                    run_id=run_id,
+                )
+                if on_progress and response.content:
+                    await _safe_progress(on_progress, response.content.strip())
+                tool_call_dicts = [
                     {
-                        "tool_name": tc.name,
-                        "result_len": len(result),
-                        "result": truncate_str(result, MAX_TOOL_RESULT_LEN),
+                        "id": tc.id,
+                        "type": "function",
+                        "function": {"name": tc.name, "arguments": json.dumps(tc.arguments, ensure_ascii=False)},
+                    }
+                    for tc in response.tool_calls
+                ]
+                context.add_assistant_message(messages, response.content, tool_call_dicts)
+                for tc in response.tool_calls:
+                    result = await tools_reg.execute(tc.name, tc.arguments)
+                    run_log(
+                        employee_id,
+                        EVENT_TOOL_RESULT,
+                        {
+                            "tool_name": tc.name,
+                            "result_len": len(result),
+                            "result": truncate_str(result, MAX_TOOL_RESULT_LEN),
+                        },
+                        run_id=run_id,
+                    )
+                    context.add_tool_result(messages, tc.id, tc.name, result)
+                if on_progress:
+                    hint = ", ".join(f'{tc.name}(...)' for tc in response.tool_calls)
+                    await _safe_progress(on_progress, f"[工具调用: {hint}]")
+            else:
+                final_content = (response.content or "").strip()
+                run_log(
+                    employee_id,
+                    EVENT_FINAL_REPLY,
+                    {
+                        "reply_len": len(final_content),
+                        "content": truncate_str(final_content, MAX_RESPONSE_CONTENT_LEN),
                     },
                     run_id=run_id,
                 )
-                context.add_tool_result(messages, tc.id, tc.name, result)
-            if on_progress:
-                hint = ", ".join(f'{tc.name}(...)' for tc in response.tool_calls)
-                await _safe_progress(on_progress, f"[工具调用: {hint}]")
-        else:
-            final_content = (response.content or "").strip()
-            run_log(
-                employee_id,
-                EVENT_FINAL_REPLY,
-                {
-                    "reply_len": len(final_content),
-                    "content": truncate_str(final_content, MAX_RESPONSE_CONTENT_LEN),
-                },
-                run_id=run_id,
-            )
-            break
+                break
+    finally:
+        await http_pool.aclose()
 
     if final_content is None:
         final_content = (
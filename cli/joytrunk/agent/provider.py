@@ -8,7 +8,7 @@ from copy import deepcopy
 from dataclasses import dataclass
 from typing import Any
 
-import httpx
+from joytrunk.agent import http_pool
 
 
 def _repair_json_arguments(s: str) -> dict[str, Any]:
@@ -56,6 +56,7 @@ class ChatResponse:
     usage: dict[str, int] | None
     tool_calls: list[ToolCall]
     reasoning_content: str | None = None
+    timing: dict[str, float] | None = None  # connect_ms / ttfb_ms / total_ms
 
     @property
     def has_tool_calls(self) -> bool:
@@ -120,17 +121,17 @@ async def chat(
         body["tool_choice"] = "auto"
     body["messages"] = _sanitize_empty_content(body["messages"])
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        r = await client.post(
-            url,
-            headers={
-                "Content-Type": "application/json",
-                **({"Authorization": f"Bearer {api_key}"} if api_key else {}),
-            },
-            json=body,
-        )
-        r.raise_for_status()
-    return _parse_response(r.json())
+    data, timing = await http_pool.post_json(
+        url,
+        {
+            "Content-Type": "application/json",
+            **({"Authorization": f"Bearer {api_key}"} if api_key else {}),
+        },
+        body,
+    )
+    response = _parse_response(data)
+    response.timing = timing
+    return response
 
 
 async def chat_via_router(
@@ -156,14 +157,14 @@ async def chat_via_router(
         body["tool_choice"] = "auto"
     body["messages"] = _sanitize_empty_content(body["messages"])
 
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        r = await client.post(
-            url,
-            headers={
-                "Content-Type": "application/json",
-                "X-Owner-Id": owner_id,
-            },
-            json=body,
-        )
-        r.raise_for_status()
-    return _parse_response(r.json())
+    data, timing = await http_pool.post_json(
+        url,
+        {
+            "Content-Type": "application/json",
+            "X-Owner-Id": owner_id,
+        },
+        body,
+    )
+    response = _parse_response(data)
+    response.timing = timing
+    return response
@@ -38,6 +38,14 @@ DEFAULT_CONFIG = {
             "model": "gpt-3.5-turbo",
         },
     },
+    # 大模型调用共享的 HTTP 连接池
+    "http": {
+        "maxConnections": 20,
+        "maxKeepaliveConnections": 10,
+        "keepaliveExpiry": 30,  # 空闲连接保留秒数
+        "http2": False,  # 需安装 h2
+        "timeout": 60,
+    },
 }
 
 # 兼容旧版：曾用 gatewayPort / defaultEmployeeId / customLLM 平铺在顶层
@@ -85,3 +85,23 @@ async def test_run_employee_loop_router_source(config_without_custom_llm, employ
         content, usage = await run_employee_loop("emp-001", "owner-1", "你好", session_key="test-session3")
     assert "来自 Router" in content
     assert usage is not None
+
+
+@pytest.mark.asyncio
+async def test_run_employee_loop_closes_http_pool(config_with_custom_llm, employee_dir):
+    """每条消息各跑一个事件循环，本轮结束时须关闭连接池，不能遗留到下一轮。"""
+    from joytrunk.agent import http_pool
+
+    (employee_dir / "SOUL.md").write_text("Soul", encoding="utf-8")
+    clients = []
+    resp = MagicMock(content="好的。", usage=None, tool_calls=[], has_tool_calls=False)
+
+    async def fake_chat(*args, **kwargs):
+        clients.append(http_pool.get_client())
+        return resp
+
+    with patch("joytrunk.agent.loop.provider_chat", side_effect=fake_chat):
+        content, _ = await run_employee_loop("emp-001", "owner-1", "你好", session_key="test-session3")
+    assert content == "好的。"
+    assert len(clients) == 1 and clients[0].is_closed
+    assert not http_pool._clients
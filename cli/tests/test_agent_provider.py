@@ -100,12 +100,9 @@ async def test_chat_calls_url():
         "usage": {"prompt_tokens": 1, "completion_tokens": 1},
     }
     mock_response = MagicMock(raise_for_status=MagicMock(), json=MagicMock(return_value=resp_json))
-    with patch("joytrunk.agent.provider.httpx") as m_httpx:
+    with patch("joytrunk.agent.http_pool.get_client") as m_get_client:
         mock_post = AsyncMock(return_value=mock_response)
-        mock_client = AsyncMock()
-        mock_client.__aenter__ = AsyncMock(return_value=AsyncMock(post=mock_post))
-        mock_client.__aexit__ = AsyncMock(return_value=None)
-        m_httpx.AsyncClient.return_value = mock_client
+        m_get_client.return_value = AsyncMock(post=mock_post)
         r = await chat(
             "https://api.example.com/v1",
             "sk-key",
@@ -124,12 +121,9 @@ async def test_chat_via_router_calls_gateway():
         "usage": {"prompt_tokens": 2, "completion_tokens": 2},
     }
     mock_response = MagicMock(raise_for_status=MagicMock(), json=MagicMock(return_value=resp_json))
-    with patch("joytrunk.agent.provider.httpx") as m_httpx:
+    with patch("joytrunk.agent.http_pool.get_client") as m_get_client:
         mock_post = AsyncMock(return_value=mock_response)
-        mock_client = AsyncMock()
-        mock_client.__aenter__ = AsyncMock(return_value=AsyncMock(post=mock_post))
-        mock_client.__aexit__ = AsyncMock(return_value=None)
-        m_httpx.AsyncClient.return_value = mock_client
+        m_get_client.return_value = AsyncMock(post=mock_post)
         r = await chat_via_router(
             "http://localhost:32890",
             "owner-1",
@@ -140,3 +134,20 @@ async def test_chat_via_router_calls_gateway():
     assert r.usage["completion_tokens"] == 2
     call_kw = mock_post.call_args[1]
     assert call_kw["headers"].get("X-Owner-Id") == "owner-1"
+
+
+@pytest.mark.asyncio
+async def test_shared_client_reused_and_timing_reported():
+    from joytrunk.agent import http_pool
+
+    assert http_pool.get_client() is http_pool.get_client()
+    resp_json = {"choices": [{"message": {"content": "Hi", "role": "assistant"}}]}
+    mock_response = MagicMock(raise_for_status=MagicMock(), json=MagicMock(return_value=resp_json))
+    with patch("joytrunk.agent.http_pool.get_client") as m_get_client:
+        m_get_client.return_value = AsyncMock(post=AsyncMock(return_value=mock_response))
+        r1 = await chat("https://api.example.com/v1", "", "m", [{"role": "user", "content": "a"}])
+        r2 = await chat("https://api.example.com/v1", "", "m", [{"role": "user", "content": "b"}])
+    assert set(r1.timing) == {"connect_ms", "ttfb_ms", "total_ms"}
+    assert r2.timing["total_ms"] >= 0
+    assert "extensions" in m_get_client.return_value.post.call_args[1]
+    await http_pool.aclose()
@@ -0,0 +1,197 @@
+"""Offline throughput benchmark: AgentLoop driven through MessageBus by a synthetic channel."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import itertools
+import math
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.events import OutboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.base import BaseChannel
+from nanobot.providers.replay import Latency, ReplayProvider
+
+STAGES = ("context_build", "provider", "tools", "session_save")
+
+
+class SyntheticChannel(BaseChannel):
+    """A channel whose users are the benchmark: `ask` sends a message and waits for the final reply."""
+
+    name = "bench"
+
+    def __init__(self, bus: MessageBus):
+        super().__init__(None, bus)
+        self._waiting: dict[str, asyncio.Future[str]] = {}
+
+    async def start(self) -> None:
+        self._running = True
+
+    async def stop(self) -> None:
+        self._running = False
+
+    async def send(self, msg: OutboundMessage) -> None:
+        if (msg.metadata or {}).get("_progress"):
+            return
+        if (fut := self._waiting.pop(msg.chat_id, None)) and not fut.done():
+            fut.set_result(msg.content)
+
+    async def ask(self, chat_id: str, content: str) -> float:
+        """Send one message and return the seconds until its reply arrived."""
+        fut: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        self._waiting[chat_id] = fut
+        started = time.perf_counter()
+        await self._handle_message(sender_id="bench", chat_id=chat_id, content=content)
+        await fut
+        return time.perf_counter() - started
+
+
+class StageTimer:
+    """Accumulates wall time spent in instrumented calls, per stage."""
+
+    def __init__(self) -> None:
+        self.totals = dict.fromkeys(STAGES, 0.0)
+
+    def wrap(self, stage: str, fn: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def timed_async(*args: Any, **kwargs: Any) -> Any:
+                started = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    self.totals[stage] += time.perf_counter() - started
+            return timed_async
+
+        @functools.wraps(fn)
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.totals[stage] += time.perf_counter() - started
+        return timed
+
+
+def _percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), math.ceil(p / 100 * len(sorted_values))))
+    return sorted_values[rank - 1]
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process, or None where `resource` is unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def run_bench(
+    sessions: int = 10,
+    turns: int = 5,
+    tool_calls: int = 2,
+    latency: str = "0",
+    max_concurrent_sessions: int = 8,
+    seed: int = 0,
+    workspace: Path | None = None,
+) -> dict[str, Any]:
+    """
+    Run `sessions` concurrent conversations of `turns` messages each, every turn
+    making `tool_calls` scripted tool-call rounds, and return the measurements.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        ws = workspace or Path(tmp)
+        (ws / "bench.txt").write_text("benchmark fixture\n" * 50, encoding="utf-8")
+        calls = [
+            ("read_file", {"path": str(ws / "bench.txt")}) if i % 2 == 0 else ("list_dir", {"path": str(ws)})
+            for i in range(tool_calls)
+        ]
+        provider = ReplayProvider.scripted(
+            tool_calls=calls, final="Benchmark reply.",
+            usage={"prompt_tokens": 1000, "completion_tokens": 50},
+            latency=Latency(latency, seed=seed),
+        )
+        timer = StageTimer()
+        provider.chat = timer.wrap("provider", provider.chat)
+
+        bus = MessageBus()
+        loop = AgentLoop(
+            bus=bus, provider=provider, workspace=ws, model="replay",
+            # Keep consolidation out of the measurement
+            memory_window=10 ** 6,
+            max_concurrent_sessions=max_concurrent_sessions,
+        )
+        loop.context.build_messages = timer.wrap("context_build", loop.context.build_messages)
+        loop.tools.execute = timer.wrap("tools", loop.tools.execute)
+        loop.sessions.save = timer.wrap("session_save", loop.sessions.save)
+
+        channel = SyntheticChannel(bus)
+
+        async def _deliver() -> None:
+            while True:
+                await channel.send(await bus.consume_outbound())
+
+        async def _conversation(i: int) -> list[float]:
+            return [await channel.ask(f"s{i}", f"message {t} from session {i}") for t in range(turns)]
+
+        runner = asyncio.create_task(loop.run())
+        deliverer = asyncio.create_task(_deliver())
+        started = time.perf_counter()
+        try:
+            per_session = await asyncio.gather(*(_conversation(i) for i in range(sessions)))
+        finally:
+            wall = time.perf_counter() - started
+            # Cancel rather than wait up to 1s for the loop to notice stop() between inbound polls
+            loop.stop()
+            runner.cancel()
+            deliverer.cancel()
+            await asyncio.gather(runner, deliverer, return_exceptions=True)
+
+    latencies = sorted(itertools.chain.from_iterable(per_session))
+    messages = len(latencies)
+    return {
+        "sessions": sessions,
+        "turns": turns,
+        "tool_calls": tool_calls,
+        "latency": latency,
+        "messages": messages,
+        "llm_calls": provider.calls,
+        "wall_s": round(wall, 3),
+        "messages_per_s": round(messages / wall, 2) if wall else 0.0,
+        "turn_latency_ms": {
+            name: round(_percentile(latencies, p) * 1000, 2)
+            for name, p in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+        },
+        "stages_ms": {
+            stage: {"total": round(total * 1000, 1), "per_turn": round(total * 1000 / max(1, messages), 3)}
+            for stage, total in timer.totals.items()
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+async def run_sweep(
+    sessions: list[int],
+    turns: list[int],
+    tool_calls: list[int],
+    latency: str = "0",
+    max_concurrent_sessions: int = 8,
+    seed: int = 0,
+) -> list[dict[str, Any]]:
+    """Run `run_bench` for every combination of sessions x turns x tool calls."""
+    return [
+        await run_bench(s, t, c, latency=latency, max_concurrent_sessions=max_concurrent_sessions, seed=seed)
+        for s, t, c in itertools.product(sessions, turns, tool_calls)
+    ]
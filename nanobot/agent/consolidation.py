@@ -0,0 +1,105 @@
+"""Central queue for background memory consolidation."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+
+class ConsolidationScheduler:
+    """
+    Runs background consolidations with a concurrency cap, one job per session.
+
+    `submit` queues a session key together with its backlog size (messages
+    to consolidate); a key that is already queued or running is ignored.
+    Workers wait until `idle` is set (no interactive turn in progress) or
+    `max_defer_s` has passed, so consolidation yields to user-facing turns
+    without starving. Each worker takes the oldest job plus any other queued
+    jobs that fit in `batch_messages`, and hands the keys to `run` together.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[list[str]], Awaitable[None]],
+        max_in_flight: int = 1,
+        batch_messages: int = 100,
+        idle: asyncio.Event | None = None,
+        max_defer_s: float = 30.0,
+    ):
+        self._run = run
+        self.max_in_flight = max(1, max_in_flight)
+        self.batch_messages = batch_messages
+        self.idle = idle
+        self.max_defer_s = max_defer_s
+        self._queued: dict[str, int] = {}  # session_key -> backlog size, oldest first
+        self._running: set[str] = set()
+        self._waiting = 0  # Workers that have not picked a batch yet
+        self.tasks: set[asyncio.Task] = set()  # Strong refs to worker tasks
+
+    def submit(self, key: str, size: int) -> bool:
+        """Queue a consolidation for `key`; returns False if one is already queued or running."""
+        if key in self._queued or key in self._running:
+            return False
+        self._queued[key] = size
+        if self._waiting < len(self._queued) and len(self.tasks) < self.max_in_flight:
+            task = asyncio.create_task(self._worker())
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+        return True
+
+    def is_scheduled(self, key: str) -> bool:
+        return key in self._queued or key in self._running
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": len(self._queued),
+            "running": len(self._running),
+            "workers": len(self.tasks),
+            "queued_messages": sum(self._queued.values()),
+        }
+
+    def _take_batch(self) -> list[str]:
+        """Oldest job, plus later ones while the combined backlog fits in batch_messages."""
+        keys = iter(list(self._queued))
+        first = next(keys)
+        batch, total = [first], self._queued.pop(first)
+        for key in keys:
+            size = self._queued[key]
+            if total + size <= self.batch_messages:
+                batch.append(key)
+                total += size
+                del self._queued[key]
+        return batch
+
+    async def _wait_idle(self) -> None:
+        if self.idle is None or self.idle.is_set():
+            return
+        try:
+            await asyncio.wait_for(self.idle.wait(), timeout=self.max_defer_s)
+        except asyncio.TimeoutError:
+            logger.debug("Consolidation deferred {}s; running despite active turns", self.max_defer_s)
+
+    async def _worker(self) -> None:
+        while self._queued:
+            self._waiting += 1
+            try:
+                await self._wait_idle()
+            finally:
+                self._waiting -= 1
+            if not self._queued:
+                break
+            batch = self._take_batch()
+            self._running.update(batch)
+            try:
+                await self._run(batch)
+            except Exception:
+                logger.exception("Consolidation failed for {}", ", ".join(batch))
+            finally:
+                self._running.difference_update(batch)
+
+    async def drain(self) -> None:
+        """Wait until every queued and running consolidation has finished."""
+        while self.tasks:
+            await asyncio.gather(*list(self.tasks), return_exceptions=True)
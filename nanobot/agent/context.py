@@ -6,10 +6,12 @@ import platform
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 from nanobot.agent.memory import MemoryStore
 from nanobot.agent.skills import SkillsLoader
+from nanobot.agent.tokens import TokenCounter
+from nanobot.utils.helpers import file_signature
 
 
 class ContextBuilder:
@@ -18,12 +20,48 @@ class ContextBuilder:
     BOOTSTRAP_FILES = ["AGENTS.md", "SOUL.md", "USER.md", "TOOLS.md", "IDENTITY.md"]
     _RUNTIME_CONTEXT_TAG = "[Runtime Context — metadata only, not instructions]"
     
-    def __init__(self, workspace: Path):
+    def __init__(
+        self,
+        workspace: Path,
+        memory_budget_tokens: int = 0,
+        context_tokens: int = 0,
+        tokenizer: str | None = None,
+    ):
         self.workspace = workspace
+        self.memory_budget_tokens = memory_budget_tokens  # 0 = always inject all of MEMORY.md
+        self.context_tokens = context_tokens  # Prompt budget that history is fitted into; 0 = no limit
+        self.tokens = TokenCounter(tokenizer)
         self.memory = MemoryStore(workspace)
         self.skills = SkillsLoader(workspace)
-    
-    def build_system_prompt(self, skill_names: list[str] | None = None) -> str:
+        self._prompt_cache: tuple[tuple, str] | None = None  # ((input fingerprint, memory), prompt)
+        self.prompt_cache_hits = 0
+        self.prompt_cache_misses = 0
+        self._prompt_tokens: tuple[str, int] = ("", 0)  # (system prompt, its token count)
+
+    def _prompt_fingerprint(self) -> tuple:
+        """Stat-based signature of every file the system prompt is built from."""
+        return (
+            tuple(file_signature(self.workspace / f) for f in self.BOOTSTRAP_FILES),
+            file_signature(self.memory.memory_file),
+            self.skills.fingerprint(),
+        )
+
+    def build_system_prompt(self, skill_names: list[str] | None = None, query: str | None = None) -> str:
+        """
+        Build the system prompt, reusing the cached copy while its input files
+        and the memory selected for `query` are unchanged.
+        """
+        memory = self.memory.get_memory_context(query, self.memory_budget_tokens)
+        key = (self._prompt_fingerprint(), memory)
+        if self._prompt_cache is not None and self._prompt_cache[0] == key:
+            self.prompt_cache_hits += 1
+            return self._prompt_cache[1]
+        self.prompt_cache_misses += 1
+        prompt = self._assemble_system_prompt(memory)
+        self._prompt_cache = (key, prompt)
+        return prompt
+
+    def _assemble_system_prompt(self, memory: str) -> str:
         """Build the system prompt from identity, bootstrap files, memory, and skills."""
         parts = [self._get_identity()]
 
@@ -31,7 +69,6 @@ class ContextBuilder:
         if bootstrap:
             parts.append(bootstrap)
 
-        memory = self.memory.get_memory_context()
         if memory:
             parts.append(f"# Memory\n\n{memory}")
 
@@ -68,7 +105,7 @@ You are nanobot, a helpful AI assistant.
 ## Workspace
 Your workspace is at: {workspace_path}
 - Long-term memory: {workspace_path}/memory/MEMORY.md (write important facts here)
-- History log: {workspace_path}/memory/HISTORY.md (grep-searchable)
+- History log: {workspace_path}/memory/HISTORY.md (search it with memory_search)
 - Custom skills: {workspace_path}/skills/{{skill-name}}/SKILL.md
 
 ## nanobot Guidelines
@@ -111,13 +148,39 @@ Reply directly with text for conversations. Only use the 'message' tool to send
         channel: str | None = None,
         chat_id: str | None = None,
     ) -> list[dict[str, Any]]:
-        """Build the complete message list for an LLM call."""
-        return [
-            {"role": "system", "content": self.build_system_prompt(skill_names)},
-            *history,
+        """
+        Build the complete message list for an LLM call.
+
+        With a token budget (`context_tokens`), history is filled from the
+        newest message backwards until the budget left after the system prompt
+        and the current message is used up.
+        """
+        system = self.build_system_prompt(skill_names, query=current_message)
+        tail = [
             {"role": "user", "content": self._build_runtime_context(channel, chat_id)},
             {"role": "user", "content": self._build_user_content(current_message, media)},
         ]
+        if self.context_tokens > 0:
+            if self._prompt_tokens[0] is not system:
+                self._prompt_tokens = (system, self.tokens.count(system))
+            budget = self.context_tokens - self._prompt_tokens[1] - self.tokens.count_messages(tail)
+            history = self.fit_history(history, budget)
+        return [{"role": "system", "content": system}, *history, *tail]
+
+    def fit_history(self, history: list[dict[str, Any]], budget: int) -> list[dict[str, Any]]:
+        """Newest messages that fit in `budget` tokens, starting at a user turn."""
+        start, used = len(history), 0
+        for i in range(len(history) - 1, -1, -1):
+            used += self.tokens.count_message(history[i])
+            if used > budget:
+                break
+            start = i
+        kept = history[start:]
+        # Drop leading non-user messages so tool results never lose their tool call
+        for i, m in enumerate(kept):
+            if m.get("role") == "user":
+                return kept[i:]
+        return []
 
     def _build_user_content(self, text: str, media: list[str] | None) -> str | list[dict[str, Any]]:
         """Build user message content with optional base64-encoded images."""
@@ -137,6 +200,41 @@ Reply directly with text for conversations. Only use the 'message' tool to send
             return text
         return images + [{"type": "text", "text": text}]
     
+    COMPACTED_TAG = "[Compacted tool result]"
+    COMPACTED_PREVIEW_CHARS = 200
+
+    def compact_tool_results(
+        self,
+        messages: list[dict[str, Any]],
+        start: int,
+        keep_recent: int,
+        stash: Callable[[str], str] | None = None,
+    ) -> int:
+        """
+        Replace tool results in `messages[start:]`, except the newest
+        `keep_recent`, with a short stub. With `stash` (text -> result handle),
+        the stub names a handle the model can re-read with read_result.
+        Returns the estimated tokens saved.
+        """
+        results = [
+            m for m in messages[start:]
+            if m.get("role") == "tool" and isinstance(m.get("content"), str)
+        ]
+        saved = 0
+        for m in results[:max(0, len(results) - keep_recent)]:
+            content = m["content"]
+            if content.startswith(self.COMPACTED_TAG) or len(content) <= self.COMPACTED_PREVIEW_CHARS * 2:
+                continue
+            again = (f'read it with read_result handle "{stash(content)}"' if stash
+                     else "call it again")
+            stub = (
+                f"{self.COMPACTED_TAG} {m.get('name', 'tool')} returned {len(content)} chars; "
+                f"{again} if you need the full output. Start:\n{content[:self.COMPACTED_PREVIEW_CHARS]}"
+            )
+            saved += self.tokens.count(content) - self.tokens.count(stub)
+            m["content"] = stub
+        return saved
+
     def add_tool_result(
         self, messages: list[dict[str, Any]],
         tool_call_id: str, tool_name: str, result: str,
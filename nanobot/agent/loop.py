@@ -5,26 +5,35 @@ from __future__ import annotations
 import asyncio
 import json
 import re
-from contextlib import AsyncExitStack
+import time
+from contextlib import AsyncExitStack, ExitStack, contextmanager
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Awaitable, Callable
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterator
 
 from loguru import logger
 
+from nanobot.agent.consolidation import ConsolidationScheduler
 from nanobot.agent.context import ContextBuilder
 from nanobot.agent.memory import MemoryStore
+from nanobot.agent.results import ResultStore
+from nanobot.agent.stream import StreamRelay
 from nanobot.agent.subagent import SubagentManager
+from nanobot.agent.tokens import context_window
 from nanobot.agent.tools.cron import CronTool
 from nanobot.agent.tools.filesystem import EditFileTool, ListDirTool, ReadFileTool, WriteFileTool
+from nanobot.agent.tools.memory import MemorySearchTool
 from nanobot.agent.tools.message import MessageTool
 from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.agent.tools.results import ReadResultTool
 from nanobot.agent.tools.shell import ExecTool
 from nanobot.agent.tools.spawn import SpawnTool
 from nanobot.agent.tools.web import WebFetchTool, WebSearchTool
 from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
-from nanobot.providers.base import LLMProvider
+from nanobot.providers.base import LLMProvider, LLMResponse
 from nanobot.session.manager import Session, SessionManager
+from nanobot.utils import metrics
+from nanobot.utils.tracing import RECEIVED_AT_KEY, SPAN_ID_KEY, TRACE_ID_KEY, new_trace_id, tracer
 
 if TYPE_CHECKING:
     from nanobot.config.schema import ChannelsConfig, ExecToolConfig
@@ -53,6 +62,17 @@ class AgentLoop:
         temperature: float = 0.1,
         max_tokens: int = 4096,
         memory_window: int = 100,
+        max_concurrent_sessions: int = 8,
+        max_parallel_tools: int = 4,
+        memory_context_tokens: int = 0,
+        memory_update_mode: str = "patch",
+        consolidation_max_in_flight: int = 1,
+        consolidation_batch_messages: int = 100,
+        context_window_tokens: int = 0,
+        tokenizer: str | None = None,
+        compact_turn_tokens: int = 0,
+        tool_result_inline_chars: int = 8000,
+        tool_result_store_mb: int = 256,
         brave_api_key: str | None = None,
         exec_config: ExecToolConfig | None = None,
         cron_service: CronService | None = None,
@@ -71,13 +91,28 @@ class AgentLoop:
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.memory_window = memory_window
+        self.memory_update_mode = memory_update_mode
+        self.compact_turn_tokens = compact_turn_tokens
+        self.max_concurrent_sessions = max(1, max_concurrent_sessions)
+        self.max_parallel_tools = max_parallel_tools
         self.brave_api_key = brave_api_key
         self.exec_config = exec_config or ExecToolConfig()
         self.cron_service = cron_service
         self.restrict_to_workspace = restrict_to_workspace
 
-        self.context = ContextBuilder(workspace)
+        # History is fitted into the model's input window, less the reply and ~10% headroom
+        # for tool schemas and estimation error
+        window = context_window_tokens or context_window(self.model) or 0
+        self.context = ContextBuilder(
+            workspace,
+            memory_budget_tokens=memory_context_tokens,
+            context_tokens=max(0, int(window * 0.9) - max_tokens) if window else 0,
+            tokenizer=tokenizer,
+        )
         self.sessions = session_manager or SessionManager(workspace)
+        self.results = ResultStore(
+            workspace, inline_chars=tool_result_inline_chars, max_bytes=tool_result_store_mb * 1024 * 1024,
+        )
         self.tools = ToolRegistry()
         self.subagents = SubagentManager(
             provider=provider,
@@ -89,6 +124,7 @@ class AgentLoop:
             brave_api_key=brave_api_key,
             exec_config=self.exec_config,
             restrict_to_workspace=restrict_to_workspace,
+            max_parallel_tools=max_parallel_tools,
         )
 
         self._running = False
@@ -96,11 +132,22 @@ class AgentLoop:
         self._mcp_stack: AsyncExitStack | None = None
         self._mcp_connected = False
         self._mcp_connecting = False
-        self._consolidating: set[str] = set()  # Session keys with consolidation in progress
-        self._consolidation_tasks: set[asyncio.Task] = set()  # Strong refs to in-flight tasks
+        self._consolidating: set[str] = set()  # Session keys being archived by /new
         self._consolidation_locks: dict[str, asyncio.Lock] = {}
+        self._interactive_turns = 0
+        self._idle = asyncio.Event()  # Set while no interactive turn is running
+        self._idle.set()
+        self.consolidation = ConsolidationScheduler(
+            self._run_consolidation,
+            max_in_flight=consolidation_max_in_flight,
+            batch_messages=consolidation_batch_messages,
+            idle=self._idle,
+        )
+        self._consolidation_tasks = self.consolidation.tasks  # Strong refs to in-flight workers
         self._active_tasks: dict[str, list[asyncio.Task]] = {}  # session_key -> tasks
-        self._processing_lock = asyncio.Lock()
+        self._session_locks: dict[str, asyncio.Lock] = {}  # Keeps each session strictly ordered
+        self._session_depth: dict[str, int] = {}  # session_key -> queued + running messages
+        self._worker_slots = asyncio.Semaphore(self.max_concurrent_sessions)
         self._register_default_tools()
 
     def _register_default_tools(self) -> None:
@@ -113,9 +160,12 @@ class AgentLoop:
             timeout=self.exec_config.timeout,
             restrict_to_workspace=self.restrict_to_workspace,
             path_append=self.exec_config.path_append,
+            max_output_chars=self._TOOL_OUTPUT_MAX_CHARS,
         ))
         self.tools.register(WebSearchTool(api_key=self.brave_api_key))
-        self.tools.register(WebFetchTool())
+        self.tools.register(WebFetchTool(max_chars=self._TOOL_OUTPUT_MAX_CHARS))
+        self.tools.register(MemorySearchTool(self.context.memory))
+        self.tools.register(ReadResultTool(self.results))
         self.tools.register(MessageTool(send_callback=self.bus.publish_outbound))
         self.tools.register(SpawnTool(manager=self.subagents))
         if self.cron_service:
@@ -178,28 +228,79 @@ class AgentLoop:
         self,
         initial_messages: list[dict],
         on_progress: Callable[..., Awaitable[None]] | None = None,
+        stream: StreamRelay | None = None,
+        usage: dict[str, int] | None = None,
     ) -> tuple[str | None, list[str], list[dict]]:
-        """Run the agent iteration loop. Returns (final_content, tools_used, messages)."""
+        """Run the agent iteration loop. Returns (final_content, tools_used, messages).
+
+        When a stream relay is given, text deltas are forwarded to it as they arrive.
+        Token usage of every LLM call is added to `usage` if given.
+        """
         messages = initial_messages
         iteration = 0
         final_content = None
         tools_used: list[str] = []
+        turn_start = len(initial_messages)
+        prompt_tokens = self.context.tokens.count_messages(messages) if self.compact_turn_tokens else 0
 
         while iteration < self.max_iterations:
             iteration += 1
-
-            response = await self.provider.chat(
-                messages=messages,
-                tools=self.tools.get_definitions(),
-                model=self.model,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-            )
+            if self.compact_turn_tokens and prompt_tokens > self.compact_turn_tokens:
+                saved = self.context.compact_tool_results(
+                    messages, turn_start, self._COMPACT_KEEP_RESULTS, stash=self.results.handle_for,
+                )
+                if saved:
+                    logger.debug("Compacted older tool results: ~{} tokens saved", saved)
+                prompt_tokens -= saved
+
+            started = time.perf_counter()
+            with tracer.span("llm.chat", iteration=iteration, model=self.model) as span:
+                if stream:
+                    response = await self.provider.chat_stream(
+                        messages=messages,
+                        tools=self.tools.get_definitions(),
+                        model=self.model,
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens,
+                        on_delta=stream.on_delta,
+                    )
+                    await stream.flush()
+                else:
+                    response = await self.provider.chat(
+                        messages=messages,
+                        tools=self.tools.get_definitions(),
+                        model=self.model,
+                        temperature=self.temperature,
+                        max_tokens=self.max_tokens,
+                    )
+                if span:
+                    span.set(
+                        served_by=response.model or self.model,
+                        finish_reason=response.finish_reason,
+                        tool_calls=len(response.tool_calls),
+                        **{k: v for k, v in response.usage.items() if isinstance(v, int)},
+                    )
+            self._observe_llm(response, time.perf_counter() - started)
+            if response.usage:
+                logger.debug(
+                    "LLM usage: {} prompt ({} cache read, {} cache write), {} completion tokens",
+                    response.usage.get("prompt_tokens", 0),
+                    response.usage.get("cache_read_tokens", 0),
+                    response.usage.get("cache_write_tokens", 0),
+                    response.usage.get("completion_tokens", 0),
+                )
+                if usage is not None:
+                    for k, v in response.usage.items():
+                        if isinstance(v, int):
+                            usage[k] = usage.get(k, 0) + v
 
             if response.has_tool_calls:
+                streamed = bool(stream and stream.streamed)
+                if stream:
+                    stream.next_iteration()
                 if on_progress:
                     clean = self._strip_think(response.content)
-                    if clean:
+                    if clean and not streamed:
                         await on_progress(clean)
                     await on_progress(self._tool_hint(response.tool_calls), tool_hint=True)
 
@@ -223,10 +324,19 @@ class AgentLoop:
                     tools_used.append(tool_call.name)
                     args_str = json.dumps(tool_call.arguments, ensure_ascii=False)
                     logger.info("Tool call: {}({})", tool_call.name, args_str[:200])
-                    result = await self.tools.execute(tool_call.name, tool_call.arguments)
+                results = await self.tools.execute_many(
+                    [(tc.name, tc.arguments) for tc in response.tool_calls],
+                    max_concurrency=self.max_parallel_tools,
+                )
+                appended = len(messages) - 1
+                for tool_call, result in zip(response.tool_calls, results):
+                    if isinstance(result, str):
+                        result = self.results.preview(result)  # Oversized output is stored, not inlined
                     messages = self.context.add_tool_result(
                         messages, tool_call.id, tool_call.name, result
                     )
+                if self.compact_turn_tokens:
+                    prompt_tokens += self.context.tokens.count_messages(messages[appended:])
             else:
                 clean = self._strip_think(response.content)
                 messages = self.context.add_assistant_message(
@@ -279,27 +389,72 @@ class AgentLoop:
             channel=msg.channel, chat_id=msg.chat_id, content=content,
         ))
 
+    @staticmethod
+    def _dispatch_key(msg: InboundMessage) -> str:
+        """Session key a message mutates (system messages target their origin session)."""
+        if msg.channel == "system":
+            return msg.chat_id if ":" in msg.chat_id else f"cli:{msg.chat_id}"
+        return msg.session_key
+
+    def session_queue_depth(self, session_key: str) -> int:
+        """Number of queued or running messages for a session."""
+        return self._session_depth.get(session_key, 0)
+
+    def session_queue_depths(self) -> dict[str, int]:
+        """Snapshot of queue depth for every session with pending work."""
+        return dict(self._session_depth)
+
     async def _dispatch(self, msg: InboundMessage) -> None:
-        """Process a message under the global lock."""
-        async with self._processing_lock:
-            try:
+        """Process a message in order within its session, bounded by the worker cap."""
+        key = self._dispatch_key(msg)
+        lock = self._session_locks.get(key)
+        if lock is None:
+            lock = self._session_locks[key] = asyncio.Lock()
+        self._session_depth[key] = self._session_depth.get(key, 0) + 1
+        meta = msg.metadata or {}
+        try:
+            with tracer.use_trace(meta.get(TRACE_ID_KEY)):
+                async with lock, self._worker_slots:
+                    with tracer.span("agent.turn", channel=msg.channel, session=key) as turn:
+                        if turn:
+                            # Replies reuse this metadata, so their sends are recorded under the turn
+                            msg.metadata[SPAN_ID_KEY] = turn.span_id
+                        if turn and (received := meta.get(RECEIVED_AT_KEY)):
+                            # The turn spans the message's whole stay, queueing included
+                            turn.start = received
+                            tracer.record("queue_wait", turn.trace_id, received)
+                        await self._dispatch_locked(msg)
+        finally:
+            depth = self._session_depth.get(key, 1) - 1
+            if depth > 0:
+                self._session_depth[key] = depth
+            else:
+                self._session_depth.pop(key, None)
+                if not lock.locked():
+                    self._session_locks.pop(key, None)
+
+    async def _dispatch_locked(self, msg: InboundMessage) -> None:
+        """Process a message and publish the response (caller holds the session lock)."""
+        try:
+            with self._interactive_turn(), self.sessions.pinned(self._dispatch_key(msg)):
                 response = await self._process_message(msg)
-                if response is not None:
-                    await self.bus.publish_outbound(response)
-                elif msg.channel == "cli":
-                    await self.bus.publish_outbound(OutboundMessage(
-                        channel=msg.channel, chat_id=msg.chat_id,
-                        content="", metadata=msg.metadata or {},
-                    ))
-            except asyncio.CancelledError:
-                logger.info("Task cancelled for session {}", msg.session_key)
-                raise
-            except Exception:
-                logger.exception("Error processing message for session {}", msg.session_key)
+            if response is not None:
+                await self.bus.publish_outbound(response)
+            elif msg.channel == "cli":
                 await self.bus.publish_outbound(OutboundMessage(
                     channel=msg.channel, chat_id=msg.chat_id,
-                    content="Sorry, I encountered an error.",
+                    content="", metadata=msg.metadata or {},
                 ))
+        except asyncio.CancelledError:
+            logger.info("Task cancelled for session {}", msg.session_key)
+            raise
+        except Exception:
+            logger.exception("Error processing message for session {}", msg.session_key)
+            await self.bus.publish_outbound(OutboundMessage(
+                channel=msg.channel, chat_id=msg.chat_id,
+                content="Sorry, I encountered an error.",
+                metadata={k: v for k, v in (msg.metadata or {}).items() if k in (TRACE_ID_KEY, SPAN_ID_KEY)},
+            ))
 
     async def close_mcp(self) -> None:
         """Close MCP connections."""
@@ -327,6 +482,37 @@ class AgentLoop:
         if not lock.locked():
             self._consolidation_locks.pop(session_key, None)
 
+    @contextmanager
+    def _interactive_turn(self) -> Iterator[None]:
+        """Mark a user-facing turn as running; background consolidation waits for idle."""
+        self._interactive_turns += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._interactive_turns -= 1
+            if self._interactive_turns == 0:
+                self._idle.set()
+
+    async def _run_consolidation(self, keys: list[str]) -> None:
+        """Consolidate a batch from the scheduler, holding each session's consolidation lock."""
+        locks = {key: self._get_consolidation_lock(key) for key in sorted(keys)}
+        try:
+            with ExitStack() as pins:
+                for key in keys:
+                    pins.enter_context(self.sessions.pinned(key))
+                sessions = [self.sessions.get_or_create(key) for key in keys]
+                async with AsyncExitStack() as held:
+                    for lock in locks.values():
+                        await held.enter_async_context(lock)
+                    if len(sessions) == 1:
+                        await self._consolidate_memory(sessions[0])
+                    else:
+                        await self._consolidate_memory_batch(sessions)
+        finally:
+            for key, lock in locks.items():
+                self._prune_consolidation_lock(key, lock)
+
     async def _process_message(
         self,
         msg: InboundMessage,
@@ -343,12 +529,16 @@ class AgentLoop:
             session = self.sessions.get_or_create(key)
             self._set_tool_context(channel, chat_id, msg.metadata.get("message_id"))
             history = session.get_history(max_messages=self.memory_window)
-            messages = self.context.build_messages(
-                history=history,
-                current_message=msg.content, channel=channel, chat_id=chat_id,
-            )
+            with tracer.span("context.build_messages"):
+                messages = self.context.build_messages(
+                    history=history,
+                    current_message=msg.content, channel=channel, chat_id=chat_id,
+                )
+            # The turn starts at the runtime context, after the system prompt and fitted history;
+            # taken before the loop, which appends to `messages` in place
+            turn_start = len(messages) - 2
             final_content, _, all_msgs = await self._run_agent_loop(messages)
-            self._save_turn(session, all_msgs, 1 + len(history))
+            self._save_turn(session, all_msgs, turn_start)
             self.sessions.save(session)
             return OutboundMessage(channel=channel, chat_id=chat_id,
                                   content=final_content or "Background task completed.")
@@ -395,23 +585,8 @@ class AgentLoop:
                                   content="🐈 nanobot commands:\n/new — Start a new conversation\n/stop — Stop the current task\n/help — Show available commands")
 
         unconsolidated = len(session.messages) - session.last_consolidated
-        if (unconsolidated >= self.memory_window and session.key not in self._consolidating):
-            self._consolidating.add(session.key)
-            lock = self._get_consolidation_lock(session.key)
-
-            async def _consolidate_and_unlock():
-                try:
-                    async with lock:
-                        await self._consolidate_memory(session)
-                finally:
-                    self._consolidating.discard(session.key)
-                    self._prune_consolidation_lock(session.key, lock)
-                    _task = asyncio.current_task()
-                    if _task is not None:
-                        self._consolidation_tasks.discard(_task)
-
-            _task = asyncio.create_task(_consolidate_and_unlock())
-            self._consolidation_tasks.add(_task)
+        if unconsolidated >= self.memory_window and session.key not in self._consolidating:
+            self.consolidation.submit(session.key, unconsolidated - self.memory_window // 2)
 
         self._set_tool_context(msg.channel, msg.chat_id, msg.metadata.get("message_id"))
         if message_tool := self.tools.get("message"):
@@ -419,12 +594,13 @@ class AgentLoop:
                 message_tool.start_turn()
 
         history = session.get_history(max_messages=self.memory_window)
-        initial_messages = self.context.build_messages(
-            history=history,
-            current_message=msg.content,
-            media=msg.media if msg.media else None,
-            channel=msg.channel, chat_id=msg.chat_id,
-        )
+        with tracer.span("context.build_messages", history=len(history)):
+            initial_messages = self.context.build_messages(
+                history=history,
+                current_message=msg.content,
+                media=msg.media if msg.media else None,
+                channel=msg.channel, chat_id=msg.chat_id,
+            )
 
         async def _bus_progress(content: str, *, tool_hint: bool = False) -> None:
             meta = dict(msg.metadata or {})
@@ -434,9 +610,16 @@ class AgentLoop:
                 channel=msg.channel, chat_id=msg.chat_id, content=content, metadata=meta,
             ))
 
+        stream = None
+        if on_progress is None and self.channels_config and self.channels_config.stream_replies:
+            stream = StreamRelay(self.bus, msg.channel, msg.chat_id, metadata=msg.metadata)
+
+        turn_start = len(initial_messages) - 2  # Runtime context + user message; see the system branch
+        turn_usage: dict[str, int] = {}
         final_content, _, all_msgs = await self._run_agent_loop(
-            initial_messages, on_progress=on_progress or _bus_progress,
+            initial_messages, on_progress=on_progress or _bus_progress, stream=stream, usage=turn_usage,
         )
+        self._record_usage(session, turn_usage)
 
         if final_content is None:
             final_content = "I've completed processing but have no response to give."
@@ -444,19 +627,24 @@ class AgentLoop:
         preview = final_content[:120] + "..." if len(final_content) > 120 else final_content
         logger.info("Response to {}:{}: {}", msg.channel, msg.sender_id, preview)
 
-        self._save_turn(session, all_msgs, 1 + len(history))
+        self._save_turn(session, all_msgs, turn_start)
         self.sessions.save(session)
 
         if message_tool := self.tools.get("message"):
             if isinstance(message_tool, MessageTool) and message_tool._sent_in_turn:
                 return None
 
+        meta = msg.metadata or {}
+        if stream and stream.streamed:
+            # Lets streaming channels finalize the streamed message in place
+            meta = {**meta, "_stream_id": stream.stream_id}
         return OutboundMessage(
-            channel=msg.channel, chat_id=msg.chat_id, content=final_content,
-            metadata=msg.metadata or {},
+            channel=msg.channel, chat_id=msg.chat_id, content=final_content, metadata=meta,
         )
 
     _TOOL_RESULT_MAX_CHARS = 500
+    _TOOL_OUTPUT_MAX_CHARS = 1_000_000  # Hard cap for exec/web_fetch output; beyond inline size it is spilled
+    _COMPACT_KEEP_RESULTS = 4  # Newest tool results in a turn that compaction leaves verbatim
 
     def _save_turn(self, session: Session, messages: list[dict], skip: int) -> None:
         """Save new-turn messages into session, truncating large tool results."""
@@ -464,9 +652,8 @@ class AgentLoop:
         for m in messages[skip:]:
             entry = {k: v for k, v in m.items() if k != "reasoning_content"}
             if entry.get("role") == "tool" and isinstance(entry.get("content"), str):
-                content = entry["content"]
-                if len(content) > self._TOOL_RESULT_MAX_CHARS:
-                    entry["content"] = content[:self._TOOL_RESULT_MAX_CHARS] + "\n... (truncated)"
+                # The full result stays readable through the handle in the stub
+                entry["content"] = self.results.stub(entry["content"], self._TOOL_RESULT_MAX_CHARS)
             if entry.get("role") == "user" and isinstance(entry.get("content"), list):
                 entry["content"] = [
                     {"type": "text", "text": "[image]"} if (
@@ -479,11 +666,43 @@ class AgentLoop:
             session.messages.append(entry)
         session.updated_at = datetime.now()
 
+    def _observe_llm(self, response: LLMResponse, elapsed: float) -> None:
+        # Behind a fallback chain the response names the model that actually answered
+        model = response.model or self.model
+        metrics.LLM_LATENCY.observe(elapsed, model=model)
+        if response.finish_reason == "error":
+            metrics.LLM_ERRORS.inc(model=model)
+        for kind in ("prompt", "completion"):
+            if n := response.usage.get(f"{kind}_tokens"):
+                metrics.LLM_TOKENS.inc(n, model=model, type=kind)
+
+    @staticmethod
+    def _record_usage(session: Session, usage: dict[str, int]) -> None:
+        """Add a turn's token usage to the session's running totals (metadata["usage"])."""
+        if not usage:
+            return
+        totals = session.metadata.setdefault("usage", {})
+        for k, v in usage.items():
+            totals[k] = totals.get(k, 0) + v
+        if prompt := usage.get("prompt_tokens"):
+            logger.debug(
+                "Turn usage for {}: {} prompt tokens, {:.0%} read from cache",
+                session.key, prompt, usage.get("cache_read_tokens", 0) / prompt,
+            )
+
     async def _consolidate_memory(self, session, archive_all: bool = False) -> bool:
         """Delegate to MemoryStore.consolidate(). Returns True on success."""
         return await MemoryStore(self.workspace).consolidate(
             session, self.provider, self.model,
             archive_all=archive_all, memory_window=self.memory_window,
+            mode=self.memory_update_mode,
+        )
+
+    async def _consolidate_memory_batch(self, sessions: list[Session]) -> bool:
+        """Consolidate several sessions' backlogs in one call. Returns True on success."""
+        return await MemoryStore(self.workspace).consolidate_batch(
+            sessions, self.provider, self.model,
+            memory_window=self.memory_window, mode=self.memory_update_mode,
         )
 
     async def process_direct(
@@ -497,5 +716,8 @@ class AgentLoop:
         """Process a message directly (for CLI or cron usage)."""
         await self._connect_mcp()
         msg = InboundMessage(channel=channel, sender_id="user", chat_id=chat_id, content=content)
-        response = await self._process_message(msg, session_key=session_key, on_progress=on_progress)
+        with tracer.use_trace(new_trace_id() if tracer.enabled else None), \
+                tracer.span("agent.turn", channel=channel, session=session_key), \
+                self._interactive_turn(), self.sessions.pinned(session_key):
+            response = await self._process_message(msg, session_key=session_key, on_progress=on_progress)
         return response.content if response else ""
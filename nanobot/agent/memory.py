@@ -3,18 +3,34 @@
 from __future__ import annotations
 
 import json
+import os
+import re
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from loguru import logger
 
-from nanobot.utils.helpers import ensure_dir
+from nanobot.agent.memory_index import (
+    HistoryIndex,
+    MemorySection,
+    select_sections,
+    split_markdown,
+    split_sections,
+)
+from nanobot.agent.tokens import estimate_tokens
+from nanobot.utils.helpers import ensure_dir, file_signature
 
 if TYPE_CHECKING:
     from nanobot.providers.base import LLMProvider
     from nanobot.session.manager import Session
 
 
+_HISTORY_ENTRY_PARAM = {
+    "type": "string",
+    "description": "A paragraph (2-5 sentences) summarizing key events/decisions/topics. "
+    "Start with [YYYY-MM-DD HH:MM]. Include detail useful for keyword search.",
+}
+
 _SAVE_MEMORY_TOOL = [
     {
         "type": "function",
@@ -24,11 +40,7 @@ _SAVE_MEMORY_TOOL = [
             "parameters": {
                 "type": "object",
                 "properties": {
-                    "history_entry": {
-                        "type": "string",
-                        "description": "A paragraph (2-5 sentences) summarizing key events/decisions/topics. "
-                        "Start with [YYYY-MM-DD HH:MM]. Include detail useful for grep search.",
-                    },
+                    "history_entry": _HISTORY_ENTRY_PARAM,
                     "memory_update": {
                         "type": "string",
                         "description": "Full updated long-term memory as markdown. Include all existing "
@@ -41,30 +53,167 @@ _SAVE_MEMORY_TOOL = [
     }
 ]
 
+# Patch mode: the model returns only the edited sections instead of the whole file
+_SAVE_MEMORY_PATCH_TOOL = [
+    {
+        "type": "function",
+        "function": {
+            "name": "save_memory",
+            "description": "Save the memory consolidation result to persistent storage.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "history_entry": _HISTORY_ENTRY_PARAM,
+                    "memory_patch": {
+                        "type": "array",
+                        "description": "Edits to long-term memory, applied in order. Empty list if nothing new.",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "op": {
+                                    "type": "string",
+                                    "enum": ["add", "replace", "delete"],
+                                    "description": "add: append lines to the section (created if missing); "
+                                    "replace: set the section's full body; delete: remove the section.",
+                                },
+                                "section": {
+                                    "type": "string",
+                                    "description": "Section heading without '#', e.g. 'Preferences'.",
+                                },
+                                "content": {
+                                    "type": "string",
+                                    "description": "Markdown body for add/replace.",
+                                },
+                            },
+                            "required": ["op", "section"],
+                        },
+                    },
+                },
+                "required": ["history_entry", "memory_patch"],
+            },
+        },
+    }
+]
+
+_HEADING_RE = re.compile(r"^(#{2,3})\s+(.*?)\s*$")
+
+
+def _heading_key(heading: str) -> str:
+    return heading.strip().lstrip("#").strip().casefold()
+
+
+def apply_memory_patch(markdown: str, ops: list[dict[str, Any]]) -> str:
+    """
+    Apply add/replace/delete operations keyed by section heading to MEMORY.md text.
+
+    Replacing or deleting a missing section adds it or does nothing. New
+    sections go before a trailing "---" footer if the file has one.
+    """
+    chunks = split_markdown(markdown)
+    preamble, sections = chunks[0], chunks[1:]
+    footer = ""
+    if sections:
+        last = sections[-1]
+        idx = last.rfind("\n---")
+        if idx != -1:
+            sections[-1], footer = last[:idx].rstrip("\n") + "\n", last[idx:].lstrip("\n")
+
+    def _find(key: str) -> int:
+        for i, chunk in enumerate(sections):
+            m = _HEADING_RE.match(chunk.split("\n", 1)[0])
+            if m and _heading_key(m.group(2)) == key:
+                return i
+        return -1
+
+    for op in ops:
+        if not isinstance(op, dict) or not isinstance(op.get("section"), str):
+            logger.warning("Memory patch: skipping malformed operation {}", op)
+            continue
+        kind, heading = op.get("op"), op["section"].strip().lstrip("#").strip()
+        content = str(op.get("content") or "").strip()
+        i = _find(_heading_key(heading))
+        if kind == "delete":
+            if i != -1:
+                del sections[i]
+        elif kind in ("add", "replace"):
+            if i == -1:
+                sections.append(f"## {heading}\n\n{content}\n")
+            elif kind == "replace":
+                head = sections[i].split("\n", 1)[0]
+                sections[i] = f"{head}\n\n{content}\n"
+            elif content:
+                sections[i] = sections[i].rstrip("\n") + f"\n{content}\n"
+        else:
+            logger.warning("Memory patch: unknown op {!r}", kind)
+
+    parts = [preamble.rstrip("\n")] if preamble.strip() else []
+    parts += [c.rstrip("\n") for c in sections]
+    if footer:
+        parts.append(footer.rstrip("\n"))
+    return "\n\n".join(parts) + "\n"
+
 
 class MemoryStore:
-    """Two-layer memory: MEMORY.md (long-term facts) + HISTORY.md (grep-searchable log)."""
+    """Two-layer memory: MEMORY.md (long-term facts) + HISTORY.md (searchable log)."""
 
     def __init__(self, workspace: Path):
         self.memory_dir = ensure_dir(workspace / "memory")
         self.memory_file = self.memory_dir / "MEMORY.md"
         self.history_file = self.memory_dir / "HISTORY.md"
+        self._history_index: HistoryIndex | None = None
+        self._long_term: tuple[tuple[int, int], str] | None = None  # (file signature, MEMORY.md text)
+        self._sections: tuple[str, list[MemorySection]] | None = None  # (MEMORY.md text, sections)
+        self.last_usage: dict[str, int] = {}  # Token usage of the last consolidation call
 
     def read_long_term(self) -> str:
-        if self.memory_file.exists():
-            return self.memory_file.read_text(encoding="utf-8")
-        return ""
+        sig = file_signature(self.memory_file)
+        if sig is None:
+            return ""
+        if self._long_term is None or self._long_term[0] != sig:
+            self._long_term = (sig, self.memory_file.read_text(encoding="utf-8"))
+        return self._long_term[1]
 
     def write_long_term(self, content: str) -> None:
-        self.memory_file.write_text(content, encoding="utf-8")
+        """Replace MEMORY.md atomically (readers never see a half-written file)."""
+        tmp = self.memory_file.with_suffix(".md.tmp")
+        tmp.write_text(content, encoding="utf-8")
+        os.replace(tmp, self.memory_file)
+        self._long_term = None
 
     def append_history(self, entry: str) -> None:
         with open(self.history_file, "a", encoding="utf-8") as f:
             f.write(entry.rstrip() + "\n\n")
 
-    def get_memory_context(self) -> str:
+    def search_history(
+        self, query: str, limit: int = 5, since: str | None = None, until: str | None = None,
+    ) -> list[dict]:
+        """BM25 search over HISTORY.md entries (the index catches up with appends lazily)."""
+        if self._history_index is None:
+            self._history_index = HistoryIndex(self.history_file)
+        return self._history_index.search(query, limit=limit, since=since, until=until)
+
+    def get_memory_context(self, query: str | None = None, budget_tokens: int = 0) -> str:
+        """
+        Long-term memory for the system prompt.
+
+        With a query and a token budget, a MEMORY.md larger than the budget is
+        cut down to its pinned sections plus the sections relevant to the query.
+        """
         long_term = self.read_long_term()
-        return f"## Long-term Memory\n{long_term}" if long_term else ""
+        if not long_term:
+            return ""
+        if query is None or budget_tokens <= 0 or estimate_tokens(long_term) <= budget_tokens:
+            return f"## Long-term Memory\n{long_term}"
+
+        if self._sections is None or self._sections[0] != long_term:
+            self._sections = (long_term, split_sections(long_term))
+        sections = self._sections[1]
+        selected = select_sections(sections, query, budget_tokens)
+        body = "\n\n".join(s.text for s in selected)
+        if omitted := len(sections) - len(selected):
+            body += (f"\n\n_({omitted} sections unrelated to this message omitted; "
+                     "read memory/MEMORY.md for the full memory.)_")
+        return f"## Long-term Memory\n{body}"
 
     async def consolidate(
         self,
@@ -74,41 +223,98 @@ class MemoryStore:
         *,
         archive_all: bool = False,
         memory_window: int = 50,
+        mode: str = "patch",
     ) -> bool:
         """Consolidate old messages into MEMORY.md + HISTORY.md via LLM tool call.
 
+        In "patch" mode the model returns section edits that are applied
+        locally; in "full" mode it returns the whole updated MEMORY.md. A patch
+        call that yields no usable patch is retried once in full mode.
+
         Returns True on success (including no-op), False on failure.
         """
         if archive_all:
-            old_messages = session.messages
-            keep_count = 0
             logger.info("Memory consolidation (archive_all): {} messages", len(session.messages))
-        else:
-            keep_count = memory_window // 2
-            if len(session.messages) <= keep_count:
-                return True
-            if len(session.messages) - session.last_consolidated <= 0:
-                return True
-            old_messages = session.messages[session.last_consolidated:-keep_count]
-            if not old_messages:
-                return True
-            logger.info("Memory consolidation: {} to consolidate, {} keep", len(old_messages), keep_count)
+            return await self._consolidate([(session, session.messages, 0)], provider, model, mode)
+        if not (backlog := self._backlog(session, memory_window)):
+            return True
+        logger.info("Memory consolidation: {} to consolidate, {} keep", len(backlog[1]), backlog[2])
+        return await self._consolidate([backlog], provider, model, mode)
+
+    async def consolidate_batch(
+        self,
+        sessions: list[Session],
+        provider: LLMProvider,
+        model: str,
+        *,
+        memory_window: int = 50,
+        mode: str = "patch",
+    ) -> bool:
+        """Consolidate the backlogs of several sessions in one LLM call (see `consolidate`)."""
+        batch = [b for s in sessions if (b := self._backlog(s, memory_window))]
+        if not batch:
+            return True
+        logger.info(
+            "Memory consolidation: {} messages from {} sessions",
+            sum(len(b[1]) for b in batch), len(batch),
+        )
+        return await self._consolidate(batch, provider, model, mode)
 
+    @staticmethod
+    def _backlog(session: Session, memory_window: int) -> tuple[Session, list[dict], int] | None:
+        """(session, messages to consolidate, messages to keep), or None if there is nothing to do."""
+        keep_count = memory_window // 2
+        if len(session.messages) <= keep_count:
+            return None
+        if len(session.messages) - session.last_consolidated <= 0:
+            return None
+        old_messages = session.messages[session.last_consolidated:-keep_count]
+        if not old_messages:
+            return None
+        return session, old_messages, keep_count
+
+    @staticmethod
+    def _format_messages(messages: list[dict]) -> list[str]:
         lines = []
-        for m in old_messages:
+        for m in messages:
             if not m.get("content"):
                 continue
             tools = f" [tools: {', '.join(m['tools_used'])}]" if m.get("tools_used") else ""
             lines.append(f"[{m.get('timestamp', '?')[:16]}] {m['role'].upper()}{tools}: {m['content']}")
+        return lines
+
+    async def _consolidate(
+        self,
+        batch: list[tuple[Session, list[dict], int]],
+        provider: LLMProvider,
+        model: str,
+        mode: str,
+    ) -> bool:
+        """Run one save_memory call over the given backlogs and advance each session's offset."""
+        if len(batch) == 1:
+            conversation = "\n".join(self._format_messages(batch[0][1]))
+        else:
+            conversation = "\n\n".join(
+                f"### {session.key}\n" + "\n".join(self._format_messages(messages))
+                for session, messages, _ in batch
+            )
 
         current_memory = self.read_long_term()
-        prompt = f"""Process this conversation and call the save_memory tool with your consolidation.
+        patch_mode = mode == "patch"
+        instructions = (
+            "Process this conversation and call the save_memory tool with your consolidation."
+            + (" Only list memory sections that change; all other sections are kept as they are."
+               if patch_mode else "")
+            + (" It contains several separate conversations; write one history entry covering all of them."
+               if len(batch) > 1 else "")
+        )
+        prompt = f"""{instructions}
 
 ## Current Long-term Memory
 {current_memory or "(empty)"}
 
 ## Conversation to Process
-{chr(10).join(lines)}"""
+{conversation}"""
 
         try:
             response = await provider.chat(
@@ -116,9 +322,10 @@ class MemoryStore:
                     {"role": "system", "content": "You are a memory consolidation agent. Call the save_memory tool with your consolidation of the conversation."},
                     {"role": "user", "content": prompt},
                 ],
-                tools=_SAVE_MEMORY_TOOL,
+                tools=_SAVE_MEMORY_PATCH_TOOL if patch_mode else _SAVE_MEMORY_TOOL,
                 model=model,
             )
+            self.last_usage = response.usage
 
             if not response.has_tool_calls:
                 logger.warning("Memory consolidation: LLM did not call save_memory, skipping")
@@ -132,18 +339,34 @@ class MemoryStore:
                 logger.warning("Memory consolidation: unexpected arguments type {}", type(args).__name__)
                 return False
 
+            update = args.get("memory_update")
+            patch = args.get("memory_patch")
+            if isinstance(patch, str):
+                try:
+                    patch = json.loads(patch)
+                except json.JSONDecodeError:
+                    patch = None
+            if patch_mode and update is None and not isinstance(patch, list):
+                logger.warning("Memory consolidation: no usable memory_patch, retrying with full rewrite")
+                return await self._consolidate(batch, provider, model, "full")
+
             if entry := args.get("history_entry"):
                 if not isinstance(entry, str):
                     entry = json.dumps(entry, ensure_ascii=False)
                 self.append_history(entry)
-            if update := args.get("memory_update"):
+            if update:
                 if not isinstance(update, str):
                     update = json.dumps(update, ensure_ascii=False)
                 if update != current_memory:
                     self.write_long_term(update)
+            elif isinstance(patch, list) and patch:
+                patched = apply_memory_patch(current_memory, patch)
+                if patched != current_memory:
+                    self.write_long_term(patched)
 
-            session.last_consolidated = 0 if archive_all else len(session.messages) - keep_count
-            logger.info("Memory consolidation done: {} messages, last_consolidated={}", len(session.messages), session.last_consolidated)
+            for session, _, keep_count in batch:
+                session.last_consolidated = len(session.messages) - keep_count if keep_count else 0
+                logger.info("Memory consolidation done: {} messages, last_consolidated={}", len(session.messages), session.last_consolidated)
             return True
         except Exception:
             logger.exception("Memory consolidation failed")
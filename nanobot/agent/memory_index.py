@@ -0,0 +1,270 @@
+"""Lexical search over memory files: tokenizer, BM25 scoring, MEMORY.md sections and the HISTORY.md index."""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+import sqlite3
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from nanobot.agent.tokens import estimate_tokens
+
+# Runs of word characters; CJK runs are split further into bigrams below
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_CJK_RE = re.compile("[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+")
+# History entries start with "[YYYY-MM-DD HH:MM]"
+_ENTRY_TS_RE = re.compile(r"^\[(\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2})?)\]")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens; CJK text (no spaces between words) becomes character bigrams."""
+    tokens: list[str] = []
+    for word in _WORD_RE.findall(text.lower()):
+        pos = 0
+        for m in _CJK_RE.finditer(word):
+            if m.start() > pos:
+                tokens.append(word[pos:m.start()])
+            run = m.group()
+            tokens.extend([run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)])
+            pos = m.end()
+        if pos < len(word):
+            tokens.append(word[pos:])
+    return tokens
+
+
+def bm25(tf: int, df: int, n_docs: int, doc_len: int, avg_len: float) -> float:
+    """BM25 weight of one term in one document."""
+    idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+    norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * doc_len / (avg_len or 1))
+    return idf * tf * (BM25_K1 + 1) / norm
+
+
+# MEMORY.md is split at level-2 and level-3 headings; text before the first one is the preamble
+_SECTION_RE = re.compile(r"^(?=#{2,3}\s)", re.MULTILINE)
+PIN_MARKER = "(pinned)"
+
+
+@dataclass
+class MemorySection:
+    """One markdown section of MEMORY.md."""
+
+    text: str
+    pinned: bool
+    cost: int  # Estimated tokens
+    terms: Counter[str] = field(default_factory=Counter)
+
+
+def split_markdown(markdown: str) -> list[str]:
+    """Split markdown before each ##/### heading; the first chunk is the preamble (maybe empty)."""
+    return _SECTION_RE.split(markdown)
+
+
+def split_sections(markdown: str) -> list[MemorySection]:
+    """Split markdown into sections; the preamble and headings marked "(pinned)" are pinned."""
+    sections = []
+    for i, chunk in enumerate(split_markdown(markdown)):
+        text = chunk.strip()
+        if not text:
+            continue
+        heading = text.split("\n", 1)[0]
+        preamble = i == 0 and not heading.startswith("##")
+        sections.append(MemorySection(
+            text=text,
+            pinned=preamble or PIN_MARKER in heading.lower(),
+            cost=estimate_tokens(text),
+            terms=Counter(tokenize(text)),
+        ))
+    return sections
+
+
+def select_sections(sections: list[MemorySection], query: str, budget: int) -> list[MemorySection]:
+    """
+    Pick pinned sections plus the sections most relevant to `query` (BM25)
+    that fit in `budget` tokens, returned in document order.
+
+    Pinned sections are always included; sections that share no term with
+    the query are never included.
+    """
+    chosen = {i for i, s in enumerate(sections) if s.pinned}
+    remaining = budget - sum(sections[i].cost for i in chosen)
+    terms = set(tokenize(query))
+    n_docs = len(sections)
+    avg_len = sum(sum(s.terms.values()) for s in sections) / (n_docs or 1)
+    df = {t: sum(1 for s in sections if t in s.terms) for t in terms}
+
+    scored = []
+    for i, s in enumerate(sections):
+        if i in chosen:
+            continue
+        length = sum(s.terms.values())
+        score = sum(bm25(s.terms[t], df[t], n_docs, length, avg_len) for t in terms if s.terms[t])
+        if score > 0:
+            scored.append((score, i))
+    for _, i in sorted(scored, reverse=True):
+        if sections[i].cost <= remaining:
+            chosen.add(i)
+            remaining -= sections[i].cost
+    return [sections[i] for i in sorted(chosen)]
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    ts TEXT,
+    length INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_ts ON entries (ts);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    entry_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS postings_term ON postings (term);
+CREATE TABLE IF NOT EXISTS state (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Bytes hashed at the start of HISTORY.md by _head_hash
+_HEAD_BYTES = 4096
+
+
+def _head_hash(f: Any, indexed: int) -> str:
+    """Hash of the start of the indexed region, to detect a rewritten (not appended) file."""
+    f.seek(0)
+    return hashlib.sha1(f.read(min(indexed, _HEAD_BYTES))).hexdigest()
+
+
+class HistoryIndex:
+    """
+    Inverted index over HISTORY.md entries, stored next to it in SQLite.
+
+    HISTORY.md is append-only and entries are separated by blank lines, so
+    `sync` only tokenizes the bytes written since the last sync. If the file
+    shrank or its head changed (edited by hand), the index is rebuilt.
+    """
+
+    def __init__(self, history_file: Path, index_file: Path | None = None):
+        self.history_file = history_file
+        self.index_file = index_file or history_file.with_name("history_index.sqlite")
+        self._conn = sqlite3.connect(str(self.index_file), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _state(self, name: str) -> str | None:
+        row = self._conn.execute("SELECT value FROM state WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def sync(self) -> int:
+        """Index entries appended since the last sync; returns the number added."""
+        if not self.history_file.exists():
+            if self._state("offset"):
+                self._reset()
+            return 0
+        with open(self.history_file, "rb") as f:
+            size = f.seek(0, 2)
+            offset = int(self._state("offset") or 0)
+            if size < offset or (offset and _head_hash(f, offset) != self._state("head")):
+                self._reset()
+                offset = 0
+            if size == offset:
+                return 0
+            f.seek(offset)
+            data = f.read()
+            end = data.rfind(b"\n\n")
+            if end == -1:
+                return 0
+            new_offset = offset + end + 2
+            head = _head_hash(f, new_offset)
+
+        # Only complete entries (terminated by a blank line) are indexed; the rest waits
+        chunk = data[:end + 2].decode("utf-8", errors="replace")
+        entries = [e.strip() for e in re.split(r"\n\s*\n", chunk) if e.strip()]
+
+        with self._conn:
+            for text in entries:
+                tokens = tokenize(text)
+                m = _ENTRY_TS_RE.match(text)
+                cur = self._conn.execute(
+                    "INSERT INTO entries (ts, length, text) VALUES (?, ?, ?)",
+                    (m.group(1).replace("T", " ") if m else None, len(tokens), text),
+                )
+                self._conn.executemany(
+                    "INSERT INTO postings (term, entry_id, tf) VALUES (?, ?, ?)",
+                    [(term, cur.lastrowid, tf) for term, tf in Counter(tokens).items()],
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO state (name, value) VALUES ('offset', ?), ('head', ?)",
+                (str(new_offset), head),
+            )
+        return len(entries)
+
+    def _reset(self) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM postings")
+            self._conn.execute("DELETE FROM entries")
+            self._conn.execute("DELETE FROM state")
+
+    def search(
+        self,
+        query: str,
+        limit: int = 5,
+        since: str | None = None,
+        until: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Return the top entries for `query` by BM25, best first.
+
+        `since`/`until` are inclusive "YYYY-MM-DD[ HH:MM]" bounds on the entry
+        timestamp; entries without a timestamp are excluded when filtering.
+        """
+        self.sync()
+        terms = set(tokenize(query))
+        n_docs, avg_len = self._conn.execute(
+            "SELECT COUNT(*), AVG(length) FROM entries",
+        ).fetchone()
+        if not terms or not n_docs:
+            return []
+
+        where, args = "", []
+        if since:
+            where += " AND e.ts >= ?"
+            args.append(since)
+        if until:
+            where += " AND e.ts <= ?"
+            args.append(until + "\uffff")  # Make a date-only bound include that whole day
+
+        scores: Counter[int] = Counter()
+        for term in terms:
+            df = self._conn.execute(
+                "SELECT COUNT(*) FROM postings WHERE term = ?", (term,),
+            ).fetchone()[0]
+            if not df:
+                continue
+            rows = self._conn.execute(
+                "SELECT p.entry_id, p.tf, e.length FROM postings p JOIN entries e ON e.id = p.entry_id "
+                f"WHERE p.term = ?{where}",
+                (term, *args),
+            )
+            for entry_id, tf, length in rows:
+                scores[entry_id] += bm25(tf, df, n_docs, length, avg_len)
+
+        results = []
+        for entry_id, score in scores.most_common(limit):
+            ts, text = self._conn.execute(
+                "SELECT ts, text FROM entries WHERE id = ?", (entry_id,),
+            ).fetchone()
+            results.append({"ts": ts, "text": text, "score": round(score, 3)})
+        return results
+
+    def close(self) -> None:
+        self._conn.close()
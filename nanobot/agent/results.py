@@ -0,0 +1,126 @@
+"""Content-addressed store for oversized tool results."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from pathlib import Path
+
+from nanobot.utils.helpers import ensure_dir
+
+# Handles are "r-" plus the first 16 hex digits of the result's SHA-256
+_HANDLE_RE = re.compile(r"^r-[0-9a-f]{16}$")
+_PREVIEW_HANDLE_RE = re.compile(r'handle "(r-[0-9a-f]{16})"')
+
+
+class ResultStore:
+    """
+    Tool results too large to inline, stored once per distinct content under
+    `<workspace>/.tool_results/<xx>/<handle>.txt`.
+
+    `preview` keeps small results as they are and turns large ones into a
+    head/tail excerpt naming the handle; `read` pages through the full text.
+    When the store grows past `max_bytes`, the least recently stored or read
+    results (by file mtime) are deleted down to 90% of it; their handles then
+    read as unknown.
+    """
+
+    def __init__(self, workspace: Path, inline_chars: int = 8000, max_bytes: int = 256 * 1024 * 1024):
+        self.root = workspace / ".tool_results"
+        self.inline_chars = inline_chars
+        self.max_bytes = max_bytes
+        self._size: int | None = None  # Bytes on disk, scanned on first write
+
+    def _path(self, handle: str) -> Path:
+        return self.root / handle[2:4] / f"{handle}.txt"
+
+    def _files(self) -> list[tuple[float, int, Path]]:
+        files = []
+        for path in self.root.glob("*/r-*.txt"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue  # Removed by another process
+            files.append((st.st_mtime, st.st_size, path))
+        return files
+
+    def _touch(self, path: Path) -> None:
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def put(self, text: str) -> str:
+        """Store `text` (a no-op if already stored) and return its handle."""
+        handle = "r-" + hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+        path = self._path(handle)
+        if path.exists():
+            self._touch(path)
+            return handle
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._files())
+        ensure_dir(path.parent)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, path)
+        self._size += path.stat().st_size
+        if self._size > self.max_bytes:
+            self.prune(keep=path)
+        return handle
+
+    def prune(self, keep: Path | None = None) -> int:
+        """Delete least recently used results until the store fits in 90% of `max_bytes`; returns the count."""
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        target, removed = self.max_bytes * 0.9, 0
+        for _, size, path in files:
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        self._size = total
+        return removed
+
+    def read(self, handle: str, offset: int = 0, length: int | None = None) -> tuple[str, int] | None:
+        """Return (chunk, total length) for a handle, or None if it is unknown."""
+        if not _HANDLE_RE.match(handle):
+            return None
+        path = self._path(handle)
+        try:
+            text = path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+        self._touch(path)
+        end = len(text) if length is None else offset + length
+        return text[offset:end], len(text)
+
+    def preview(self, text: str) -> str:
+        """`text` itself if it fits inline; otherwise a head/tail excerpt plus its handle."""
+        if len(text) <= self.inline_chars:
+            return text
+        handle = self.put(text)
+        head, tail = self.inline_chars // 2, self.inline_chars // 4
+        omitted = len(text) - head - tail
+        return (
+            f"{text[:head]}\n\n... [{omitted} chars omitted; full result is {len(text)} chars, "
+            f'handle "{handle}"; use read_result to page through it] ...\n\n{text[-tail:]}'
+        )
+
+    def handle_for(self, text: str) -> str:
+        """Handle of the full result behind `text`: the one a preview names, else `text` stored as is."""
+        m = _PREVIEW_HANDLE_RE.search(text)
+        return m.group(1) if m else self.put(text)
+
+    def stub(self, text: str, limit: int) -> str:
+        """Cut `text` to `limit` chars, keeping a handle to the full text."""
+        if len(text) <= limit:
+            return text
+        handle = self.handle_for(text)
+        return f'{text[:limit]}\n... (truncated; full result: read_result handle "{handle}")'
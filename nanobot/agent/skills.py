@@ -4,11 +4,17 @@ import json
 import os
 import re
 import shutil
+import time
 from pathlib import Path
 
+from nanobot.utils.helpers import file_signature
+
 # Default builtin skills directory (relative to this file)
 BUILTIN_SKILLS_DIR = Path(__file__).parent.parent / "skills"
 
+# Seconds before required bins/env vars are checked again while skill files are unchanged
+REQUIREMENTS_TTL_S = 30.0
+
 
 class SkillsLoader:
     """
@@ -22,6 +28,67 @@ class SkillsLoader:
         self.workspace = workspace
         self.workspace_skills = workspace / "skills"
         self.builtin_skills = builtin_skills_dir or BUILTIN_SKILLS_DIR
+        # path -> (signature, content, frontmatter); re-read only when the file changes
+        self._file_cache: dict[Path, tuple[tuple[int, int], str, dict | None]] = {}
+        # (SKILL.md signatures, required bins, required env vars)
+        self._requires: tuple[tuple, tuple[str, ...], tuple[str, ...]] | None = None
+        # (checked at, availability of those bins and env vars)
+        self._available: tuple[float, tuple] | None = None
+
+    def _read_skill_file(self, path: Path) -> tuple[str, dict | None] | None:
+        """Return (content, frontmatter) for a SKILL.md, or None if it does not exist."""
+        sig = file_signature(path)
+        if sig is None:
+            self._file_cache.pop(path, None)
+            return None
+        cached = self._file_cache.get(path)
+        if cached and cached[0] == sig:
+            return cached[1], cached[2]
+        content = path.read_text(encoding="utf-8")
+        meta = self._parse_frontmatter(content)
+        self._file_cache[path] = (sig, content, meta)
+        return content, meta
+
+    def _find_skill(self, name: str) -> tuple[str, dict | None] | None:
+        """Read a skill by name, preferring the workspace copy over the builtin one."""
+        found = self._read_skill_file(self.workspace_skills / name / "SKILL.md")
+        if found is None and self.builtin_skills:
+            found = self._read_skill_file(self.builtin_skills / name / "SKILL.md")
+        return found
+
+    def fingerprint(self) -> tuple:
+        """
+        Cheap signature of everything that affects skill listings.
+
+        Covers each SKILL.md's (mtime, size) and whether the bins and env vars
+        that skills require are available. Costs a directory listing per skills
+        root and a stat call per skill: requirements are re-collected only when
+        a signature changes, and checked again only then or after
+        REQUIREMENTS_TTL_S.
+        """
+        files = []
+        for root in (self.workspace_skills, self.builtin_skills):
+            if root and root.is_dir():
+                for d in sorted(root.iterdir()):
+                    files.append((str(d), file_signature(d / "SKILL.md")))
+        files = tuple(files)
+        if self._requires is None or self._requires[0] != files:
+            bins: set[str] = set()
+            envs: set[str] = set()
+            for s in self.list_skills(filter_unavailable=False):
+                requires = self._get_skill_meta(s["name"]).get("requires", {})
+                bins.update(requires.get("bins", []))
+                envs.update(requires.get("env", []))
+            self._requires = (files, tuple(sorted(bins)), tuple(sorted(envs)))
+            self._available = None
+        _, bins, envs = self._requires
+        now = time.monotonic()
+        if self._available is None or now - self._available[0] >= REQUIREMENTS_TTL_S:
+            self._available = (now, (
+                tuple((b, shutil.which(b) is not None) for b in bins),
+                tuple((e, bool(os.environ.get(e))) for e in envs),
+            ))
+        return files, self._available[1]
     
     def list_skills(self, filter_unavailable: bool = True) -> list[dict[str, str]]:
         """
@@ -66,18 +133,8 @@ class SkillsLoader:
         Returns:
             Skill content or None if not found.
         """
-        # Check workspace first
-        workspace_skill = self.workspace_skills / name / "SKILL.md"
-        if workspace_skill.exists():
-            return workspace_skill.read_text(encoding="utf-8")
-        
-        # Check built-in
-        if self.builtin_skills:
-            builtin_skill = self.builtin_skills / name / "SKILL.md"
-            if builtin_skill.exists():
-                return builtin_skill.read_text(encoding="utf-8")
-        
-        return None
+        found = self._find_skill(name)
+        return found[0] if found else None
     
     def load_skills_for_context(self, skill_names: list[str]) -> str:
         """
@@ -210,10 +267,14 @@ class SkillsLoader:
         Returns:
             Metadata dict or None.
         """
-        content = self.load_skill(name)
-        if not content:
+        found = self._find_skill(name)
+        if not found or not found[0]:
             return None
-        
+        return dict(found[1]) if found[1] is not None else None
+
+    @staticmethod
+    def _parse_frontmatter(content: str) -> dict | None:
+        """Parse simple key: value YAML frontmatter."""
         if content.startswith("---"):
             match = re.match(r"^---\n(.*?)\n---", content, re.DOTALL)
             if match:
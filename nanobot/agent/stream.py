@@ -0,0 +1,79 @@
+"""Relay streamed LLM text to channels as edit-in-place progress messages."""
+
+from __future__ import annotations
+
+import re
+import time
+import uuid
+from typing import Any
+
+from nanobot.bus.events import OutboundMessage
+from nanobot.bus.queue import MessageBus
+
+# Drop finished <think> blocks and hide an unterminated one while it is still streaming.
+_THINK_RE = re.compile(r"<think>[\s\S]*?(?:</think>|$)")
+
+
+class StreamRelay:
+    """
+    Forwards text deltas for one turn to the bus.
+
+    Each LLM iteration gets its own stream id. Channels that support streaming
+    create a message on the first update and edit it on later ones. Updates
+    carry the full text so far, so a dropped update only delays the display.
+    Publishing is throttled to one update per interval per stream.
+    """
+
+    def __init__(
+        self,
+        bus: MessageBus,
+        channel: str,
+        chat_id: str,
+        metadata: dict[str, Any] | None = None,
+        interval_s: float = 1.0,
+    ):
+        self.bus = bus
+        self.channel = channel
+        self.chat_id = chat_id
+        self.metadata = dict(metadata or {})
+        self.interval_s = interval_s
+        self.stream_id = uuid.uuid4().hex[:12]
+        self._text = ""
+        self._published = ""
+        self._last_publish = 0.0
+
+    @property
+    def text(self) -> str:
+        """Visible text streamed so far in the current iteration."""
+        return _THINK_RE.sub("", self._text).strip()
+
+    async def on_delta(self, delta: str) -> None:
+        """Accumulate a delta and publish if the throttle interval has passed."""
+        self._text += delta
+        if time.monotonic() - self._last_publish >= self.interval_s:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Publish the current text if it changed since the last update."""
+        text = self.text
+        if not text or text == self._published:
+            return
+        self._published = text
+        self._last_publish = time.monotonic()
+        meta = dict(self.metadata)
+        meta.update(_progress=True, _stream=True, _stream_id=self.stream_id)
+        await self.bus.publish_outbound(OutboundMessage(
+            channel=self.channel, chat_id=self.chat_id, content=text, metadata=meta,
+        ))
+
+    def next_iteration(self) -> None:
+        """Start a new stream (a new channel message) for the next LLM iteration."""
+        self.stream_id = uuid.uuid4().hex[:12]
+        self._text = ""
+        self._published = ""
+        self._last_publish = 0.0
+
+    @property
+    def streamed(self) -> bool:
+        """Whether any update was published for the current iteration."""
+        return bool(self._published)
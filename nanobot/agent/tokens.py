@@ -0,0 +1,78 @@
+"""Token estimates for prompt budgeting: a fast local heuristic with an optional tiktoken encoding."""
+
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from loguru import logger
+
+# CJK text runs about one token per character; other text about four characters per token
+_CJK_RE = re.compile("[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]")
+
+MESSAGE_OVERHEAD = 4  # Role and framing tokens per chat message
+IMAGE_TOKENS = 800  # Rough cost of one inline image
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count without a tokenizer."""
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+class TokenCounter:
+    """
+    Counts tokens in text and chat messages.
+
+    With `encoding` set (a tiktoken encoding name such as "cl100k_base") and
+    tiktoken importable, counts are exact for that encoding; otherwise the
+    `estimate_tokens` heuristic is used.
+    """
+
+    def __init__(self, encoding: str | None = None):
+        self._encode = None
+        if encoding:
+            try:
+                import tiktoken
+
+                self._encode = tiktoken.get_encoding(encoding).encode
+            except Exception as e:
+                logger.warning("Tokenizer {} unavailable, using estimates: {}", encoding, e)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._encode is not None:
+            return len(self._encode(text, disallowed_special=()))
+        return estimate_tokens(text)
+
+    def count_message(self, message: dict[str, Any]) -> int:
+        """Tokens for one chat message: content parts, tool calls and framing."""
+        n = MESSAGE_OVERHEAD
+        content = message.get("content")
+        if isinstance(content, str):
+            n += self.count(content)
+        elif isinstance(content, list):
+            for part in content:
+                if isinstance(part, dict) and part.get("type") == "text":
+                    n += self.count(part.get("text", ""))
+                else:
+                    n += IMAGE_TOKENS
+        for tc in message.get("tool_calls") or []:
+            fn = tc.get("function") or {}
+            n += self.count(fn.get("name", "")) + self.count(str(fn.get("arguments", "")))
+        return n
+
+    def count_messages(self, messages: list[dict[str, Any]]) -> int:
+        return sum(self.count_message(m) for m in messages)
+
+
+def context_window(model: str) -> int | None:
+    """Input token limit of `model` from LiteLLM's model table, or None if unknown."""
+    try:
+        import litellm
+
+        litellm.suppress_debug_info = True
+        return litellm.get_model_info(model).get("max_input_tokens") or None
+    except Exception:
+        return None
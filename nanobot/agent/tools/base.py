@@ -39,6 +39,11 @@ class Tool(ABC):
         """JSON Schema for tool parameters."""
         pass
     
+    @property
+    def read_only(self) -> bool:
+        """Whether the tool is free of side effects and may run concurrently with other read-only calls."""
+        return False
+
     @abstractmethod
     async def execute(self, **kwargs: Any) -> str:
         """
@@ -31,6 +31,10 @@ class ReadFileTool(Tool):
     @property
     def name(self) -> str:
         return "read_file"
+
+    @property
+    def read_only(self) -> bool:
+        return True
     
     @property
     def description(self) -> str:
@@ -203,6 +207,10 @@ class ListDirTool(Tool):
     @property
     def name(self) -> str:
         return "list_dir"
+
+    @property
+    def read_only(self) -> bool:
+        return True
     
     @property
     def description(self) -> str:
@@ -21,6 +21,8 @@ class MCPToolWrapper(Tool):
         self._description = tool_def.description or tool_def.name
         self._parameters = tool_def.inputSchema or {"type": "object", "properties": {}}
         self._tool_timeout = tool_timeout
+        annotations = getattr(tool_def, "annotations", None)
+        self._read_only = bool(getattr(annotations, "readOnlyHint", False))
 
     @property
     def name(self) -> str:
@@ -34,6 +36,10 @@ class MCPToolWrapper(Tool):
     def parameters(self) -> dict[str, Any]:
         return self._parameters
 
+    @property
+    def read_only(self) -> bool:
+        return self._read_only
+
     async def execute(self, **kwargs: Any) -> str:
         from mcp import types
         try:
@@ -0,0 +1,57 @@
+"""Memory search tool: ranked recall over HISTORY.md."""
+
+from typing import Any
+
+from nanobot.agent.memory import MemoryStore
+from nanobot.agent.tools.base import Tool
+
+# Per-entry cap so a few results stay within a few hundred tokens
+_MAX_ENTRY_CHARS = 600
+
+
+class MemorySearchTool(Tool):
+    """Search past conversation summaries in HISTORY.md."""
+
+    name = "memory_search"
+    description = (
+        "Search the history log of past conversations (memory/HISTORY.md). "
+        "Returns the most relevant entries with timestamps, best match first."
+    )
+    read_only = True
+    parameters = {
+        "type": "object",
+        "properties": {
+            "query": {"type": "string", "description": "Keywords to look for"},
+            "limit": {"type": "integer", "description": "Max entries (1-20)", "minimum": 1, "maximum": 20},
+            "since": {"type": "string", "description": "Only entries on or after this date (YYYY-MM-DD)"},
+            "until": {"type": "string", "description": "Only entries on or before this date (YYYY-MM-DD)"},
+        },
+        "required": ["query"],
+    }
+
+    def __init__(self, memory: MemoryStore):
+        self._memory = memory
+
+    async def execute(
+        self,
+        query: str,
+        limit: int | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        **kwargs: Any,
+    ) -> str:
+        try:
+            results = self._memory.search_history(
+                query, limit=min(max(limit or 5, 1), 20), since=since, until=until,
+            )
+        except Exception as e:
+            return f"Error searching memory: {e}"
+        if not results:
+            return f"No history entries match: {query}"
+        lines = []
+        for r in results:
+            text = r["text"]
+            if len(text) > _MAX_ENTRY_CHARS:
+                text = text[:_MAX_ENTRY_CHARS] + "..."
+            lines.append(text)
+        return "\n\n".join(lines)
@@ -1,5 +1,6 @@
 """Message tool for sending messages to users."""
 
+from contextvars import ContextVar
 from typing import Any, Awaitable, Callable
 
 from nanobot.agent.tools.base import Tool
@@ -7,7 +8,11 @@ from nanobot.bus.events import OutboundMessage
 
 
 class MessageTool(Tool):
-    """Tool to send messages to users on chat channels."""
+    """Tool to send messages to users on chat channels.
+
+    Routing context and per-turn send tracking live in context variables, so
+    concurrent turns for different sessions each see their own values.
+    """
 
     def __init__(
         self,
@@ -17,16 +22,20 @@ class MessageTool(Tool):
         default_message_id: str | None = None,
     ):
         self._send_callback = send_callback
-        self._default_channel = default_channel
-        self._default_chat_id = default_chat_id
-        self._default_message_id = default_message_id
-        self._sent_in_turn: bool = False
+        self._context: ContextVar[tuple[str, str, str | None]] = ContextVar(
+            f"message_context_{id(self)}",
+            default=(default_channel, default_chat_id, default_message_id),
+        )
+        self._sent: ContextVar[bool] = ContextVar(f"message_sent_{id(self)}", default=False)
 
     def set_context(self, channel: str, chat_id: str, message_id: str | None = None) -> None:
         """Set the current message context."""
-        self._default_channel = channel
-        self._default_chat_id = chat_id
-        self._default_message_id = message_id
+        self._context.set((channel, chat_id, message_id))
+
+    @property
+    def _sent_in_turn(self) -> bool:
+        """Whether the message tool sent anything during the current turn."""
+        return self._sent.get()
 
     def set_send_callback(self, callback: Callable[[OutboundMessage], Awaitable[None]]) -> None:
         """Set the callback for sending messages."""
@@ -34,7 +43,7 @@ class MessageTool(Tool):
 
     def start_turn(self) -> None:
         """Reset per-turn send tracking."""
-        self._sent_in_turn = False
+        self._sent.set(False)
 
     @property
     def name(self) -> str:
@@ -79,9 +88,10 @@ class MessageTool(Tool):
         media: list[str] | None = None,
         **kwargs: Any
     ) -> str:
-        channel = channel or self._default_channel
-        chat_id = chat_id or self._default_chat_id
-        message_id = message_id or self._default_message_id
+        default_channel, default_chat_id, default_message_id = self._context.get()
+        channel = channel or default_channel
+        chat_id = chat_id or default_chat_id
+        message_id = message_id or default_message_id
 
         if not channel or not chat_id:
             return "Error: No target channel/chat specified"
@@ -101,7 +111,7 @@ class MessageTool(Tool):
 
         try:
             await self._send_callback(msg)
-            self._sent_in_turn = True
+            self._sent.set(True)
             media_info = f" with {len(media)} attachments" if media else ""
             return f"Message sent to {channel}:{chat_id}{media_info}"
         except Exception as e:
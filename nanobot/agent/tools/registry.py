@@ -1,8 +1,12 @@
 """Tool registry for dynamic tool management."""
 
+import asyncio
+import time
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
+from nanobot.utils import metrics
+from nanobot.utils.tracing import tracer
 
 
 class ToolRegistry:
@@ -37,6 +41,18 @@ class ToolRegistry:
     
     async def execute(self, name: str, params: dict[str, Any]) -> str:
         """Execute a tool by name with given parameters."""
+        started = time.perf_counter()
+        with tracer.span("tool.execute", tool=name) as span:
+            result = await self._execute(name, params)
+            failed = isinstance(result, str) and result.startswith("Error")
+            if span and failed:
+                span.set(error=True)
+        metrics.TOOL_LATENCY.observe(time.perf_counter() - started, tool=name)
+        if failed:
+            metrics.TOOL_ERRORS.inc(tool=name)
+        return result
+
+    async def _execute(self, name: str, params: dict[str, Any]) -> str:
         _HINT = "\n\n[Analyze the error above and try a different approach.]"
 
         tool = self._tools.get(name)
@@ -54,6 +70,41 @@ class ToolRegistry:
         except Exception as e:
             return f"Error executing {name}: {str(e)}" + _HINT
     
+    async def execute_many(
+        self, calls: list[tuple[str, dict[str, Any]]], max_concurrency: int = 4,
+    ) -> list[str]:
+        """
+        Execute several tool calls, returning results in call order.
+
+        Adjacent read-only calls run concurrently (at most max_concurrency at a
+        time). Side-effecting calls act as barriers and run alone, in the
+        caller's task, so their relative order is preserved.
+        """
+        results: list[str] = [""] * len(calls)
+        slots = asyncio.Semaphore(max(1, max_concurrency))
+        batch: list[int] = []
+
+        async def _run(i: int) -> None:
+            async with slots:
+                results[i] = await self.execute(*calls[i])
+
+        async def _flush() -> None:
+            if len(batch) == 1:
+                results[batch[0]] = await self.execute(*calls[batch[0]])
+            elif batch:
+                await asyncio.gather(*(_run(i) for i in batch))
+            batch.clear()
+
+        for i, (name, _) in enumerate(calls):
+            tool = self._tools.get(name)
+            if tool is not None and tool.read_only:
+                batch.append(i)
+                continue
+            await _flush()
+            results[i] = await self.execute(*calls[i])
+        await _flush()
+        return results
+
     @property
     def tool_names(self) -> list[str]:
         """Get list of registered tool names."""
@@ -0,0 +1,39 @@
+"""read_result tool: page through tool results stored in the result store."""
+
+from typing import Any
+
+from nanobot.agent.results import ResultStore
+from nanobot.agent.tools.base import Tool
+
+
+class ReadResultTool(Tool):
+    """Read part of a stored tool result by handle."""
+
+    name = "read_result"
+    description = (
+        "Read part of a large tool result that was shortened to a preview. "
+        "Pass the handle from the preview and a character offset."
+    )
+    read_only = True
+    parameters = {
+        "type": "object",
+        "properties": {
+            "handle": {"type": "string", "description": 'Result handle, e.g. "r-0123456789abcdef"'},
+            "offset": {"type": "integer", "description": "Character offset to start at", "minimum": 0},
+            "length": {"type": "integer", "description": "Characters to return", "minimum": 1},
+        },
+        "required": ["handle"],
+    }
+
+    def __init__(self, store: ResultStore):
+        self._store = store
+
+    async def execute(self, handle: str, offset: int = 0, length: int | None = None, **kwargs: Any) -> str:
+        length = min(length or self._store.inline_chars, self._store.inline_chars)
+        found = self._store.read(handle.strip(), offset, length)
+        if found is None:
+            return f"Error: Unknown or expired result handle: {handle}"
+        chunk, total = found
+        end = offset + len(chunk)
+        more = f"; continue with offset={end}" if end < total else ""
+        return f"[chars {offset}-{end} of {total}{more}]\n{chunk}"
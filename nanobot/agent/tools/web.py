@@ -48,6 +48,7 @@ class WebSearchTool(Tool):
     
     name = "web_search"
     description = "Search the web. Returns titles, URLs, and snippets."
+    read_only = True
     parameters = {
         "type": "object",
         "properties": {
@@ -104,6 +105,7 @@ class WebFetchTool(Tool):
     
     name = "web_fetch"
     description = "Fetch URL and extract readable content (HTML → markdown/text)."
+    read_only = True
     parameters = {
         "type": "object",
         "properties": {
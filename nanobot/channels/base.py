@@ -1,5 +1,6 @@
 """Base channel interface for chat platforms."""
 
+import time
 from abc import ABC, abstractmethod
 from typing import Any
 
@@ -7,6 +8,7 @@ from loguru import logger
 
 from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
+from nanobot.utils.tracing import RECEIVED_AT_KEY, TRACE_ID_KEY, new_trace_id, tracer
 
 
 class BaseChannel(ABC):
@@ -18,6 +20,7 @@ class BaseChannel(ABC):
     """
     
     name: str = "base"
+    supports_streaming: bool = False  # Can edit a sent message in place (see send())
     
     def __init__(self, config: Any, bus: MessageBus):
         """
@@ -52,6 +55,11 @@ class BaseChannel(ABC):
     async def send(self, msg: OutboundMessage) -> None:
         """
         Send a message through this channel.
+
+        Channels with supports_streaming receive streamed progress messages
+        (metadata "_stream" and "_stream_id") carrying the full text so far,
+        and should edit the message sent for that stream id. A final reply
+        whose metadata carries a known "_stream_id" replaces that message.
         
         Args:
             msg: The message to send.
@@ -113,13 +121,18 @@ class BaseChannel(ABC):
             )
             return
         
+        metadata = metadata or {}
+        if tracer.enabled:
+            # The trace follows the message through the bus to the reply
+            metadata = {**metadata, TRACE_ID_KEY: new_trace_id(), RECEIVED_AT_KEY: time.time()}
+
         msg = InboundMessage(
             channel=self.name,
             sender_id=str(sender_id),
             chat_id=str(chat_id),
             content=content,
             media=media or [],
-            metadata=metadata or {},
+            metadata=metadata,
             session_key_override=session_key,
         )
         
@@ -11,6 +11,8 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import Config
+from nanobot.utils import metrics
+from nanobot.utils.tracing import SPAN_ID_KEY, TRACE_ID_KEY, tracer
 
 
 class ChannelManager:
@@ -193,17 +195,24 @@ class ChannelManager:
                     timeout=1.0
                 )
                 
+                channel = self.channels.get(msg.channel)
+                if msg.metadata.get("_stream") and not (channel and channel.supports_streaming):
+                    continue
                 if msg.metadata.get("_progress"):
                     if msg.metadata.get("_tool_hint") and not self.config.channels.send_tool_hints:
                         continue
                     if not msg.metadata.get("_tool_hint") and not self.config.channels.send_progress:
                         continue
                 
-                channel = self.channels.get(msg.channel)
                 if channel:
                     try:
-                        await channel.send(msg)
+                        with tracer.use_trace(msg.metadata.get(TRACE_ID_KEY), msg.metadata.get(SPAN_ID_KEY)), \
+                                tracer.span("channel.send", channel=msg.channel,
+                                            progress=bool(msg.metadata.get("_progress"))):
+                            await channel.send(msg)
+                        metrics.CHANNEL_SENT.inc(channel=msg.channel)
                     except Exception as e:
+                        metrics.CHANNEL_SEND_FAILURES.inc(channel=msg.channel)
                         logger.error("Error sending to {}: {}", msg.channel, e)
                 else:
                     logger.warning("Unknown channel: {}", msg.channel)
@@ -22,6 +22,7 @@ class SlackChannel(BaseChannel):
     """Slack channel using Socket Mode."""
 
     name = "slack"
+    supports_streaming = True
 
     def __init__(self, config: SlackConfig, bus: MessageBus):
         super().__init__(config, bus)
@@ -29,6 +30,7 @@ class SlackChannel(BaseChannel):
         self._web_client: AsyncWebClient | None = None
         self._socket_client: SocketModeClient | None = None
         self._bot_user_id: str | None = None
+        self._stream_messages: dict[str, str] = {}  # stream_id -> ts of message being edited
 
     async def start(self) -> None:
         """Start the Slack Socket Mode client."""
@@ -86,7 +88,18 @@ class SlackChannel(BaseChannel):
             use_thread = thread_ts and channel_type != "im"
             thread_ts_param = thread_ts if use_thread else None
 
-            if msg.content:
+            meta = msg.metadata or {}
+            stream_id = meta.get("_stream_id")
+            if meta.get("_stream"):
+                await self._send_stream_update(msg.chat_id, stream_id, msg.content, thread_ts_param)
+                return
+            if stream_id in self._stream_messages and msg.content:
+                await self._web_client.chat_update(
+                    channel=msg.chat_id,
+                    ts=self._stream_messages.pop(stream_id),
+                    text=self._to_mrkdwn(msg.content),
+                )
+            elif msg.content:
                 await self._web_client.chat_postMessage(
                     channel=msg.chat_id,
                     text=self._to_mrkdwn(msg.content),
@@ -105,6 +118,22 @@ class SlackChannel(BaseChannel):
         except Exception as e:
             logger.error("Error sending Slack message: {}", e)
 
+    async def _send_stream_update(
+        self, chat_id: str, stream_id: str, text: str, thread_ts: str | None,
+    ) -> None:
+        """Create or edit the message that shows a streaming reply."""
+        ts = self._stream_messages.get(stream_id)
+        if ts is None:
+            resp = await self._web_client.chat_postMessage(
+                channel=chat_id, text=self._to_mrkdwn(text), thread_ts=thread_ts,
+            )
+            self._stream_messages[stream_id] = resp.get("ts")
+            # Streams of tool-calling iterations are never finalized; keep the map bounded
+            while len(self._stream_messages) > 256:
+                self._stream_messages.pop(next(iter(self._stream_messages)))
+        else:
+            await self._web_client.chat_update(channel=chat_id, ts=ts, text=self._to_mrkdwn(text))
+
     async def _on_socket_request(
         self,
         client: SocketModeClient,
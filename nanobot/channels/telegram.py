@@ -106,6 +106,7 @@ class TelegramChannel(BaseChannel):
     """
     
     name = "telegram"
+    supports_streaming = True
     
     # Commands registered with Telegram's command menu
     BOT_COMMANDS = [
@@ -127,6 +128,7 @@ class TelegramChannel(BaseChannel):
         self._app: Application | None = None
         self._chat_ids: dict[str, int] = {}  # Map sender_id to chat_id for replies
         self._typing_tasks: dict[str, asyncio.Task] = {}  # chat_id -> typing loop task
+        self._stream_messages: dict[str, int] = {}  # stream_id -> message_id being edited
     
     async def start(self) -> None:
         """Start the Telegram bot with long polling."""
@@ -225,6 +227,14 @@ class TelegramChannel(BaseChannel):
             logger.error("Invalid chat_id: {}", msg.chat_id)
             return
 
+        stream_id = msg.metadata.get("_stream_id")
+        if msg.metadata.get("_stream"):
+            await self._send_stream_update(chat_id, stream_id, msg.content)
+            return
+        if stream_id and stream_id in self._stream_messages and msg.content and not msg.media:
+            if await self._finalize_stream(chat_id, stream_id, msg.content):
+                return
+
         reply_params = None
         if self.config.reply_to_message:
             reply_to_message_id = msg.metadata.get("message_id")
@@ -281,6 +291,52 @@ class TelegramChannel(BaseChannel):
                     except Exception as e2:
                         logger.error("Error sending Telegram message: {}", e2)
     
+    async def _send_stream_update(self, chat_id: int, stream_id: str, text: str) -> None:
+        """Create or edit the plain-text message that shows a streaming reply."""
+        text = text[:4000]
+        message_id = self._stream_messages.get(stream_id)
+        try:
+            if message_id is None:
+                sent = await self._app.bot.send_message(chat_id=chat_id, text=text)
+                self._stream_messages[stream_id] = sent.message_id
+                # Streams of tool-calling iterations are never finalized; keep the map bounded
+                while len(self._stream_messages) > 256:
+                    self._stream_messages.pop(next(iter(self._stream_messages)))
+            else:
+                await self._app.bot.edit_message_text(chat_id=chat_id, message_id=message_id, text=text)
+        except Exception as e:
+            # "message is not modified" and transient rate limits are harmless here
+            logger.debug("Telegram stream update skipped: {}", e)
+
+    async def _finalize_stream(self, chat_id: int, stream_id: str, content: str) -> bool:
+        """Replace a streamed message with the formatted final reply. Returns False to fall back to send."""
+        message_id = self._stream_messages.pop(stream_id)
+        chunks = _split_message(content)
+        try:
+            await self._app.bot.edit_message_text(
+                chat_id=chat_id, message_id=message_id,
+                text=_markdown_to_telegram_html(chunks[0]), parse_mode="HTML",
+            )
+        except Exception as e:
+            if "not modified" not in str(e).lower():
+                logger.warning("HTML parse failed, falling back to plain text: {}", e)
+                try:
+                    await self._app.bot.edit_message_text(
+                        chat_id=chat_id, message_id=message_id, text=chunks[0],
+                    )
+                except Exception as e2:
+                    if "not modified" not in str(e2).lower():
+                        logger.warning("Failed to finalize streamed message, sending anew: {}", e2)
+                        return False
+        for chunk in chunks[1:]:
+            try:
+                await self._app.bot.send_message(
+                    chat_id=chat_id, text=_markdown_to_telegram_html(chunk), parse_mode="HTML",
+                )
+            except Exception:
+                await self._app.bot.send_message(chat_id=chat_id, text=chunk)
+        return True
+
     async def _on_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /start command."""
         if not update.message or not update.effective_user:
@@ -229,15 +229,121 @@ def _create_workspace_templates(workspace: Path):
     (workspace / "skills").mkdir(exist_ok=True)
 
 
-def _make_provider(config: Config):
-    """Create the appropriate LLM provider from config."""
+def _make_provider(config: Config, record: Path | None = None):
+    """Create the LLM provider from config, with key pools, fallback models, retries, circuit breaking and caching."""
+    from nanobot.config.loader import get_data_dir
+    from nanobot.providers import http as http_pool
+    from nanobot.providers.retry import RetryingProvider
+
+    http_pool.configure(**config.http.model_dump())
+    provider = _make_pooled_provider(config)
+    r = config.retry
+    if r.max_retries > 0:
+        provider = RetryingProvider(
+            provider,
+            max_retries=r.max_retries,
+            base_delay=r.base_delay_s,
+            max_delay=r.max_delay_s,
+            failure_threshold=r.breaker_failures,
+            reset_timeout=r.breaker_reset_s,
+            state_path=get_data_dir() / "circuit_breakers.json",
+        )
+    if record:
+        from nanobot.providers.replay import RecordingProvider
+
+        provider = RecordingProvider(provider, record)
+    c = config.response_cache
+    if c.enabled:
+        from nanobot.providers.cache import CachingProvider, ResponseCache
+
+        cache = ResponseCache(get_data_dir() / "llm_cache.db", ttl_s=c.ttl_s, max_bytes=c.max_mb * 1024 * 1024)
+        provider = CachingProvider(provider, cache)
+    return provider
+
+
+def _flush_key_usage(provider) -> None:
+    """Save the key pool's usage ledger on shutdown; while running it is only saved every few seconds."""
+    from nanobot.providers.pool import FallbackProvider
+
+    while provider is not None and not isinstance(provider, FallbackProvider):
+        provider = getattr(provider, "provider", None)  # Retrying/Recording/Caching wrappers
+    if provider is not None:
+        provider.flush_ledger()
+
+
+def _configure_tracing(config: Config) -> None:
+    """Export per-turn spans if tracing is enabled."""
+    from nanobot.config.loader import get_data_dir
+    from nanobot.utils.tracing import tracer
+
+    t = config.tracing
+    if t.enabled:
+        path = Path(t.path).expanduser() if t.path else get_data_dir() / "traces" / "spans.jsonl"
+        tracer.configure(path, t.format)
+
+
+def _make_metrics_server(config: Config, bus, agent):
+    """Metrics endpoint reading live queue, session and consolidation state, if enabled."""
+    from nanobot.utils import metrics
+
+    m = config.gateway.metrics
+    if not m.enabled:
+        return None
+    metrics.QUEUE_DEPTH.set_function(lambda: {("inbound",): bus.inbound_size, ("outbound",): bus.outbound_size})
+    metrics.SESSION_TASKS.set_function(lambda: {(k,): v for k, v in agent.session_queue_depths().items()})
+
+    def _backlog():
+        st = agent.consolidation.stats()
+        return {("queued",): st["queued"], ("running",): st["running"]}
+
+    metrics.CONSOLIDATION_BACKLOG.set_function(_backlog)
+    metrics.CONSOLIDATION_BACKLOG_MESSAGES.set_function(lambda: {(): agent.consolidation.stats()["queued_messages"]})
+    return metrics.MetricsServer(m.host, m.port)
+
+
+def _make_pooled_provider(config: Config):
+    """One provider per API key of the model and its fallback models, load-balanced and chained."""
+    from nanobot.config.loader import get_data_dir
+    from nanobot.providers.pool import FallbackProvider, KeyPool, PooledKey
+
+    defaults = config.agents.defaults
+    chain = []
+    for model in [defaults.model, *defaults.fallback_models]:
+        p = config.get_provider(model)
+        name = config.get_provider_name(model) or "default"
+        entries = [(p.api_key if p else None, 1, p.rpm if p else 0, p.tpm if p else 0)]
+        entries += [(k.api_key, k.weight, k.rpm, k.tpm) for k in (p.keys if p else [])]
+        keys = [
+            PooledKey(
+                label=f"{name}:...{key[-4:]}" if key else f"{name}:{i}",
+                provider=_make_base_provider(config, model, key),
+                weight=max(1, weight), rpm=rpm, tpm=tpm,
+            )
+            for i, (key, weight, rpm, tpm) in enumerate(entries)
+        ]
+        chain.append((model, KeyPool(keys)))
+
+    only = chain[0][1].keys
+    if len(chain) == 1 and len(only) == 1 and not (only[0].rpm or only[0].tpm):
+        return only[0].provider
+    return FallbackProvider(
+        chain,
+        ledger_path=get_data_dir() / "key_usage.json",
+        provider_for=lambda model: _make_base_provider(config, model),
+    )
+
+
+def _make_base_provider(config: Config, model: str | None = None, api_key: str | None = None):
+    """Create the appropriate LLM provider for a model (default: the configured one) and API key."""
     from nanobot.providers.litellm_provider import LiteLLMProvider
     from nanobot.providers.openai_codex_provider import OpenAICodexProvider
     from nanobot.providers.custom_provider import CustomProvider
 
-    model = config.agents.defaults.model
+    model = model or config.agents.defaults.model
     provider_name = config.get_provider_name(model)
     p = config.get_provider(model)
+    if api_key is None:
+        api_key = p.api_key if p else None
 
     # OpenAI Codex (OAuth)
     if provider_name == "openai_codex" or model.startswith("openai-codex/"):
@@ -246,24 +352,39 @@ def _make_provider(config: Config):
     # Custom: direct OpenAI-compatible endpoint, bypasses LiteLLM
     if provider_name == "custom":
         return CustomProvider(
-            api_key=p.api_key if p else "no-key",
+            api_key=api_key or "no-key",
             api_base=config.get_api_base(model) or "http://localhost:8000/v1",
             default_model=model,
         )
 
     from nanobot.providers.registry import find_by_name
     spec = find_by_name(provider_name)
-    if not model.startswith("bedrock/") and not (p and p.api_key) and not (spec and spec.is_oauth):
+    if not model.startswith("bedrock/") and not api_key and not (spec and spec.is_oauth):
         console.print("[red]Error: No API key configured.[/red]")
         console.print("Set one in ~/.nanobot/config.json under providers section")
         raise typer.Exit(1)
 
     return LiteLLMProvider(
-        api_key=p.api_key if p else None,
+        api_key=api_key,
         api_base=config.get_api_base(model),
         default_model=model,
         extra_headers=p.extra_headers if p else None,
         provider_name=provider_name,
+        # Pools hold one provider per key and model; each passes its api_base per call
+        set_global_api_base=False,
+    )
+
+
+def _make_session_manager(config: Config):
+    """Create the session manager with the configured store and cache limits."""
+    from nanobot.session.manager import SessionManager
+
+    defaults = config.agents.defaults
+    return SessionManager(
+        config.workspace_path,
+        max_cached_sessions=defaults.session_cache_size,
+        max_cache_bytes=defaults.session_cache_mb * 1024 * 1024,
+        store=defaults.session_store,
     )
 
 
@@ -276,13 +397,13 @@ def _make_provider(config: Config):
 def gateway(
     port: int = typer.Option(18790, "--port", "-p", help="Gateway port"),
     verbose: bool = typer.Option(False, "--verbose", "-v", help="Verbose output"),
+    record: Path = typer.Option(None, "--record", help="Append every LLM exchange to this JSONL file for replay"),
 ):
     """Start the nanobot gateway."""
     from nanobot.config.loader import load_config, get_data_dir
     from nanobot.bus.queue import MessageBus
     from nanobot.agent.loop import AgentLoop
     from nanobot.channels.manager import ChannelManager
-    from nanobot.session.manager import SessionManager
     from nanobot.cron.service import CronService
     from nanobot.cron.types import CronJob
     from nanobot.heartbeat.service import HeartbeatService
@@ -295,8 +416,9 @@ def gateway(
     
     config = load_config()
     bus = MessageBus()
-    provider = _make_provider(config)
-    session_manager = SessionManager(config.workspace_path)
+    provider = _make_provider(config, record=record)
+    session_manager = _make_session_manager(config)
+    _configure_tracing(config)
     
     # Create cron service first (callback set after agent creation)
     cron_store_path = get_data_dir() / "cron" / "jobs.json"
@@ -312,6 +434,17 @@ def gateway(
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        max_concurrent_sessions=config.agents.defaults.max_concurrent_sessions,
+        max_parallel_tools=config.agents.defaults.max_parallel_tools,
+        memory_context_tokens=config.agents.defaults.memory_context_tokens,
+        memory_update_mode=config.agents.defaults.memory_update_mode,
+        consolidation_max_in_flight=config.agents.defaults.consolidation_max_in_flight,
+        consolidation_batch_messages=config.agents.defaults.consolidation_batch_messages,
+        context_window_tokens=config.agents.defaults.context_window_tokens,
+        tokenizer=config.agents.defaults.tokenizer or None,
+        compact_turn_tokens=config.agents.defaults.compact_turn_tokens,
+        tool_result_inline_chars=config.agents.defaults.tool_result_inline_chars,
+        tool_result_store_mb=config.agents.defaults.tool_result_store_mb,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         cron_service=cron,
@@ -404,9 +537,15 @@ def gateway(
         console.print(f"[green]✓[/green] Cron: {cron_status['jobs']} scheduled jobs")
     
     console.print(f"[green]✓[/green] Heartbeat: every {hb_cfg.interval_s}s")
+
+    metrics_server = _make_metrics_server(config, bus, agent)
+    if metrics_server:
+        console.print(f"[green]✓[/green] Metrics: http://{metrics_server.host}:{metrics_server.port}/metrics")
     
     async def run():
         try:
+            if metrics_server:
+                await metrics_server.start()
             await cron.start()
             await heartbeat.start()
             await asyncio.gather(
@@ -421,6 +560,11 @@ def gateway(
             cron.stop()
             agent.stop()
             await channels.stop_all()
+            if metrics_server:
+                await metrics_server.stop()
+            from nanobot.utils.tracing import tracer
+            tracer.flush()
+            _flush_key_usage(provider)
     
     asyncio.run(run())
 
@@ -438,6 +582,7 @@ def agent(
     session_id: str = typer.Option("cli:direct", "--session", "-s", help="Session ID"),
     markdown: bool = typer.Option(True, "--markdown/--no-markdown", help="Render assistant output as Markdown"),
     logs: bool = typer.Option(False, "--logs/--no-logs", help="Show nanobot runtime logs during chat"),
+    record: Path = typer.Option(None, "--record", help="Append every LLM exchange to this JSONL file for replay"),
 ):
     """Interact with the agent directly."""
     from nanobot.config.loader import load_config, get_data_dir
@@ -449,7 +594,8 @@ def agent(
     config = load_config()
     
     bus = MessageBus()
-    provider = _make_provider(config)
+    provider = _make_provider(config, record=record)
+    _configure_tracing(config)
 
     # Create cron service for tool usage (no callback needed for CLI unless running)
     cron_store_path = get_data_dir() / "cron" / "jobs.json"
@@ -469,10 +615,22 @@ def agent(
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        max_concurrent_sessions=config.agents.defaults.max_concurrent_sessions,
+        max_parallel_tools=config.agents.defaults.max_parallel_tools,
+        memory_context_tokens=config.agents.defaults.memory_context_tokens,
+        memory_update_mode=config.agents.defaults.memory_update_mode,
+        consolidation_max_in_flight=config.agents.defaults.consolidation_max_in_flight,
+        consolidation_batch_messages=config.agents.defaults.consolidation_batch_messages,
+        context_window_tokens=config.agents.defaults.context_window_tokens,
+        tokenizer=config.agents.defaults.tokenizer or None,
+        compact_turn_tokens=config.agents.defaults.compact_turn_tokens,
+        tool_result_inline_chars=config.agents.defaults.tool_result_inline_chars,
+        tool_result_store_mb=config.agents.defaults.tool_result_store_mb,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         cron_service=cron,
         restrict_to_workspace=config.tools.restrict_to_workspace,
+        session_manager=_make_session_manager(config),
         mcp_servers=config.tools.mcp_servers,
         channels_config=config.channels,
     )
@@ -500,6 +658,7 @@ def agent(
                 response = await agent_loop.process_direct(message, session_id, on_progress=_cli_progress)
             _print_agent_response(response, render_markdown=markdown)
             await agent_loop.close_mcp()
+            _flush_key_usage(provider)
 
         asyncio.run(run_once())
     else:
@@ -530,7 +689,9 @@ def agent(
                 while True:
                     try:
                         msg = await asyncio.wait_for(bus.consume_outbound(), timeout=1.0)
-                        if msg.metadata.get("_progress"):
+                        if msg.metadata.get("_stream"):
+                            pass  # Final reply is printed in full; skip partial updates
+                        elif msg.metadata.get("_progress"):
                             is_tool_hint = msg.metadata.get("_tool_hint", False)
                             ch = agent_loop.channels_config
                             if ch and is_tool_hint and not ch.send_tool_hints:
@@ -595,6 +756,7 @@ def agent(
                 outbound_task.cancel()
                 await asyncio.gather(bus_task, outbound_task, return_exceptions=True)
                 await agent_loop.close_mcp()
+                _flush_key_usage(provider)
 
         asyncio.run(run_interactive())
 
@@ -783,6 +945,45 @@ def channels_login():
         console.print("[red]npm not found. Please install Node.js.[/red]")
 
 
+# ============================================================================
+# Session Commands
+# ============================================================================
+
+sessions_app = typer.Typer(help="Manage conversation sessions")
+app.add_typer(sessions_app, name="sessions")
+
+
+@sessions_app.command("migrate")
+def sessions_migrate(
+    source: str = typer.Option("jsonl", "--from", help="Store to read: jsonl or sqlite"),
+    target: str = typer.Option("sqlite", "--to", help="Store to write: jsonl or sqlite"),
+    overwrite: bool = typer.Option(False, "--overwrite", help="Replace sessions already in the target"),
+):
+    """Copy sessions between storage backends (set agents.defaults.sessionStore to switch)."""
+    from nanobot.config.loader import load_config
+    from nanobot.session.manager import migrate_sessions, open_session_store
+
+    if source == target:
+        console.print("[red]--from and --to must differ[/red]")
+        raise typer.Exit(1)
+
+    config = load_config()
+    sessions_dir = config.workspace_path / "sessions"
+    try:
+        src = open_session_store(source, sessions_dir)
+        dst = open_session_store(target, sessions_dir)
+    except ValueError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1) from e
+
+    try:
+        copied = migrate_sessions(src, dst, overwrite=overwrite)
+    finally:
+        src.close()
+        dst.close()
+    console.print(f"[green]✓[/green] Migrated {copied} sessions from {source} to {target}")
+
+
 # ============================================================================
 # Cron Commands
 # ============================================================================
@@ -960,9 +1161,21 @@ def cron_run(
         max_tokens=config.agents.defaults.max_tokens,
         max_iterations=config.agents.defaults.max_tool_iterations,
         memory_window=config.agents.defaults.memory_window,
+        max_concurrent_sessions=config.agents.defaults.max_concurrent_sessions,
+        max_parallel_tools=config.agents.defaults.max_parallel_tools,
+        memory_context_tokens=config.agents.defaults.memory_context_tokens,
+        memory_update_mode=config.agents.defaults.memory_update_mode,
+        consolidation_max_in_flight=config.agents.defaults.consolidation_max_in_flight,
+        consolidation_batch_messages=config.agents.defaults.consolidation_batch_messages,
+        context_window_tokens=config.agents.defaults.context_window_tokens,
+        tokenizer=config.agents.defaults.tokenizer or None,
+        compact_turn_tokens=config.agents.defaults.compact_turn_tokens,
+        tool_result_inline_chars=config.agents.defaults.tool_result_inline_chars,
+        tool_result_store_mb=config.agents.defaults.tool_result_store_mb,
         brave_api_key=config.tools.web.search.api_key or None,
         exec_config=config.tools.exec,
         restrict_to_workspace=config.tools.restrict_to_workspace,
+        session_manager=_make_session_manager(config),
         mcp_servers=config.tools.mcp_servers,
         channels_config=config.channels,
     )
@@ -985,7 +1198,10 @@ def cron_run(
     service.on_job = on_job
 
     async def run():
-        return await service.run_job(job_id, force=force)
+        try:
+            return await service.run_job(job_id, force=force)
+        finally:
+            _flush_key_usage(provider)
 
     if asyncio.run(run()):
         console.print("[green]✓[/green] Job executed")
@@ -1000,6 +1216,38 @@ def cron_run(
 # ============================================================================
 
 
+def _int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+@app.command()
+def bench(
+    sessions: str = typer.Option("1,10", "--sessions", help="Concurrent sessions (comma-separated to sweep)"),
+    turns: str = typer.Option("5", "--turns", help="Messages per session (comma-separated to sweep)"),
+    tool_calls: str = typer.Option("0,2", "--tool-calls", help="Tool-call rounds per turn (comma-separated to sweep)"),
+    latency: str = typer.Option("0", "--latency", help='Simulated LLM latency, e.g. "0.2", "uniform:0.1,0.5", "lognormal:-1.5,0.5"'),
+    workers: int = typer.Option(8, "--workers", help="max_concurrent_sessions for the agent loop"),
+    seed: int = typer.Option(0, "--seed", help="Seed for sampled latencies"),
+    output: Path = typer.Option(None, "--output", "-o", help="Also write the JSON results to this file"),
+):
+    """Benchmark agent throughput offline with a scripted LLM and a synthetic channel."""
+    import json
+
+    from loguru import logger
+
+    from nanobot.agent.bench import run_sweep
+
+    logger.disable("nanobot")
+    results = asyncio.run(run_sweep(
+        _int_list(sessions), _int_list(turns), _int_list(tool_calls),
+        latency=latency, max_concurrent_sessions=workers, seed=seed,
+    ))
+    text = json.dumps(results, indent=2)
+    if output:
+        output.write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+
 @app.command()
 def status():
     """Show nanobot status."""
@@ -1036,6 +1284,47 @@ def status():
                 has_key = bool(p.api_key)
                 console.print(f"{spec.label}: {'[green]✓[/green]' if has_key else '[dim]not set[/dim]'}")
 
+        from rich.markup import escape
+
+        from nanobot.config.loader import get_data_dir
+        from nanobot.providers.pool import load_ledger
+        from nanobot.providers.retry import load_breaker_state
+
+        ledger = load_ledger(get_data_dir() / "key_usage.json")
+        if ledger:
+            console.print("\nAPI key usage:")
+            for label, u in sorted(ledger.items()):
+                console.print(
+                    f"  {escape(label)}: {u.get('requests', 0)} requests, "
+                    f"{u.get('prompt_tokens', 0) + u.get('completion_tokens', 0)} tokens, "
+                    f"{u.get('rate_limited', 0)} rate-limited, {u.get('errors', 0)} errors"
+                )
+
+        cache_path = get_data_dir() / "llm_cache.db"
+        if config.response_cache.enabled and cache_path.exists():
+            from nanobot.providers.cache import ResponseCache
+
+            cache = ResponseCache(cache_path)
+            st = cache.stats()
+            cache.close()
+            lookups = st["hits"] + st["misses"]
+            rate = f"{st['hits'] / lookups:.0%}" if lookups else "n/a"
+            console.print(
+                f"\nResponse cache: {st['entries']} entries ({st['bytes'] / 1024 / 1024:.1f} MB), "
+                f"{st['hits']} hits / {st['misses']} misses ({rate} hit rate), {st['evictions']} evicted"
+            )
+
+        breakers = load_breaker_state(get_data_dir() / "circuit_breakers.json")
+        if breakers:
+            console.print("\nCircuit breakers:")
+            for model, b in sorted(breakers.items()):
+                if b["state"] == "closed":
+                    console.print(f"  {model}: [green]closed[/green]")
+                elif b["state"] == "open":
+                    console.print(f"  {model}: [red]open[/red] (retry in {b['retry_in_s']:.0f}s) {escape(b['last_error'])}")
+                else:
+                    console.print(f"  {model}: [yellow]half-open[/yellow] {escape(b['last_error'])}")
+
 
 # ============================================================================
 # OAuth Login
@@ -189,6 +189,7 @@ class ChannelsConfig(Base):
 
     send_progress: bool = True    # stream agent's text progress to the channel
     send_tool_hints: bool = False  # stream tool-call hints (e.g. read_file("…"))
+    stream_replies: bool = False  # stream LLM output as edit-in-place updates (channels that support it)
     whatsapp: WhatsAppConfig = Field(default_factory=WhatsAppConfig)
     telegram: TelegramConfig = Field(default_factory=TelegramConfig)
     discord: DiscordConfig = Field(default_factory=DiscordConfig)
@@ -207,10 +208,25 @@ class AgentDefaults(Base):
     workspace: str = "~/.nanobot/workspace"
     model: str = "anthropic/claude-opus-4-5"
     provider: str = "auto"  # Provider name (e.g. "anthropic", "openrouter") or "auto" for auto-detection
+    fallback_models: list[str] = Field(default_factory=list)  # Tried in order on rate-limit/availability errors
     max_tokens: int = 8192
     temperature: float = 0.1
     max_tool_iterations: int = 40
+    tool_result_inline_chars: int = 8000  # Longer tool results are stored in workspace/.tool_results and previewed
+    tool_result_store_mb: int = 256  # Least recently used stored tool results are deleted beyond this size
+    compact_turn_tokens: int = 60000  # Stub out older tool results once a turn's prompt passes this (0 = never)
     memory_window: int = 100
+    context_window_tokens: int = 0  # Prompt budget history is fitted into (0 = the model's input limit, if known)
+    tokenizer: str = ""  # tiktoken encoding (e.g. "cl100k_base") for exact counts; empty = fast estimate
+    memory_update_mode: Literal["patch", "full"] = "patch"  # Consolidation returns section edits or the whole MEMORY.md
+    consolidation_max_in_flight: int = 1  # Background consolidation LLM calls running at once
+    consolidation_batch_messages: int = 100  # Small backlogs from several sessions are merged up to this many messages
+    memory_context_tokens: int = 2000  # Budget for MEMORY.md in the prompt; larger files inject relevant sections only (0 = all)
+    max_concurrent_sessions: int = 8  # Sessions processed in parallel (each session stays ordered)
+    max_parallel_tools: int = 4  # Read-only tool calls run concurrently within one LLM response
+    session_cache_size: int = 256  # Sessions kept in memory (idle ones are flushed and evicted)
+    session_cache_mb: int = 64  # Estimated memory budget for cached sessions
+    session_store: Literal["jsonl", "sqlite"] = "jsonl"  # Session storage backend
 
 
 class AgentsConfig(Base):
@@ -219,12 +235,24 @@ class AgentsConfig(Base):
     defaults: AgentDefaults = Field(default_factory=AgentDefaults)
 
 
+class ApiKeyConfig(Base):
+    """An additional API key pooled with a provider's api_key."""
+
+    api_key: str = ""
+    weight: int = 1  # Share of traffic relative to the provider's other keys
+    rpm: int = 0  # Requests per minute allowed on this key (0 = unlimited)
+    tpm: int = 0  # Tokens per minute allowed on this key (0 = unlimited)
+
+
 class ProviderConfig(Base):
     """LLM provider configuration."""
 
     api_key: str = ""
     api_base: str | None = None
     extra_headers: dict[str, str] | None = None  # Custom headers (e.g. APP-Code for AiHubMix)
+    rpm: int = 0  # Requests per minute allowed on api_key (0 = unlimited)
+    tpm: int = 0  # Tokens per minute allowed on api_key (0 = unlimited)
+    keys: list[ApiKeyConfig] = Field(default_factory=list)  # More keys, load-balanced with api_key
 
 
 class ProvidersConfig(Base):
@@ -256,12 +284,57 @@ class HeartbeatConfig(Base):
     interval_s: int = 30 * 60  # 30 minutes
 
 
+class MetricsConfig(Base):
+    """Prometheus-style metrics endpoint of the gateway."""
+
+    enabled: bool = False
+    host: str = "127.0.0.1"
+    port: int = 9464  # Scrape at http://host:port/metrics
+
+
 class GatewayConfig(Base):
     """Gateway/server configuration."""
 
     host: str = "0.0.0.0"
     port: int = 18790
     heartbeat: HeartbeatConfig = Field(default_factory=HeartbeatConfig)
+    metrics: MetricsConfig = Field(default_factory=MetricsConfig)
+
+
+class HttpConfig(Base):
+    """Shared HTTP connection pool for provider calls."""
+
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0  # Seconds an idle connection is kept open
+    http2: bool = False  # Requires the h2 package
+    timeout: float = 60.0
+
+
+class RetryConfig(Base):
+    """Retries and circuit breaking for LLM calls."""
+
+    max_retries: int = 3  # Retries of transient errors (429, 5xx, timeouts); 0 disables the wrapper
+    base_delay_s: float = 1.0  # Backoff doubles per attempt, with full jitter
+    max_delay_s: float = 30.0  # Longer Retry-After requests are not waited for
+    breaker_failures: int = 5  # Consecutive transient failures that open a model's circuit
+    breaker_reset_s: float = 60.0  # Seconds an open circuit rejects calls before a trial call
+
+
+class ResponseCacheConfig(Base):
+    """On-disk cache of LLM responses for repeated deterministic calls."""
+
+    enabled: bool = False
+    ttl_s: int = 24 * 3600  # Entries older than this are not served
+    max_mb: int = 64  # Least recently used entries are evicted beyond this size
+
+
+class TracingConfig(Base):
+    """Per-turn tracing spans exported to a local file."""
+
+    enabled: bool = False
+    path: str = ""  # Defaults to ~/.nanobot/traces/spans.jsonl
+    format: Literal["jsonl", "otlp"] = "jsonl"  # "otlp" writes OTLP/JSON export requests
 
 
 class WebSearchConfig(Base):
@@ -312,6 +385,10 @@ class Config(BaseSettings):
     providers: ProvidersConfig = Field(default_factory=ProvidersConfig)
     gateway: GatewayConfig = Field(default_factory=GatewayConfig)
     tools: ToolsConfig = Field(default_factory=ToolsConfig)
+    http: HttpConfig = Field(default_factory=HttpConfig)
+    retry: RetryConfig = Field(default_factory=RetryConfig)
+    response_cache: ResponseCacheConfig = Field(default_factory=ResponseCacheConfig)
+    tracing: TracingConfig = Field(default_factory=TracingConfig)
 
     @property
     def workspace_path(self) -> Path:
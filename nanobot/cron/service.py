@@ -11,6 +11,7 @@ from typing import Any, Callable, Coroutine
 from loguru import logger
 
 from nanobot.cron.types import CronJob, CronJobState, CronPayload, CronSchedule, CronStore
+from nanobot.utils import metrics
 
 
 def _now_ms() -> int:
@@ -236,6 +237,8 @@ class CronService:
     async def _execute_job(self, job: CronJob) -> None:
         """Execute a single job."""
         start_ms = _now_ms()
+        if job.state.next_run_at_ms and start_ms >= job.state.next_run_at_ms:
+            metrics.CRON_LAG.observe((start_ms - job.state.next_run_at_ms) / 1000)
         logger.info("Cron: executing job '{}' ({})", job.name, job.id)
         
         try:
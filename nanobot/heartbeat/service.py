@@ -8,6 +8,8 @@ from typing import TYPE_CHECKING, Any, Callable, Coroutine
 
 from loguru import logger
 
+from nanobot.providers.cache import cacheable
+
 if TYPE_CHECKING:
     from nanobot.providers.base import LLMProvider
 
@@ -87,17 +89,19 @@ class HeartbeatService:
 
         Returns (action, tasks) where action is 'skip' or 'run'.
         """
-        response = await self.provider.chat(
-            messages=[
-                {"role": "system", "content": "You are a heartbeat agent. Call the heartbeat tool to report your decision."},
-                {"role": "user", "content": (
-                    "Review the following HEARTBEAT.md and decide whether there are active tasks.\n\n"
-                    f"{content}"
-                )},
-            ],
-            tools=_HEARTBEAT_TOOL,
-            model=self.model,
-        )
+        # HEARTBEAT.md rarely changes between ticks: let the response cache answer repeats
+        with cacheable():
+            response = await self.provider.chat(
+                messages=[
+                    {"role": "system", "content": "You are a heartbeat agent. Call the heartbeat tool to report your decision."},
+                    {"role": "user", "content": (
+                        "Review the following HEARTBEAT.md and decide whether there are active tasks.\n\n"
+                        f"{content}"
+                    )},
+                ],
+                tools=_HEARTBEAT_TOOL,
+                model=self.model,
+            )
 
         if not response.has_tool_calls:
             return "skip", ""
@@ -2,7 +2,7 @@
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Any
+from typing import Any, Awaitable, Callable
 
 
 @dataclass
@@ -21,6 +21,8 @@ class LLMResponse:
     finish_reason: str = "stop"
     usage: dict[str, int] = field(default_factory=dict)
     reasoning_content: str | None = None  # Kimi, DeepSeek-R1 etc.
+    error: Exception | None = field(default=None, repr=False)  # Cause of finish_reason="error"
+    model: str | None = None  # Model that served the call, when a provider may pick another (fallback)
     
     @property
     def has_tool_calls(self) -> bool:
@@ -28,6 +30,15 @@ class LLMResponse:
         return len(self.tool_calls) > 0
 
 
+class ProviderHTTPError(RuntimeError):
+    """An HTTP error from a provider API, keeping the status code and Retry-After header."""
+
+    def __init__(self, message: str, status_code: int, headers: dict[str, str] | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
 class LLMProvider(ABC):
     """
     Abstract base class for LLM providers.
@@ -103,6 +114,31 @@ class LLMProvider(ABC):
             LLMResponse with content and/or tool calls.
         """
         pass
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        on_delta: Callable[[str], Awaitable[None]] | None = None,
+    ) -> LLMResponse:
+        """
+        Send a chat completion request, reporting text deltas as they arrive.
+
+        Takes the same arguments as chat(), plus on_delta, which is awaited with
+        each piece of assistant text. Returns the same complete LLMResponse as
+        chat(). Providers without native streaming fall back to chat() and
+        report the whole content as one delta.
+        """
+        response = await self.chat(
+            messages=messages, tools=tools, model=model,
+            max_tokens=max_tokens, temperature=temperature,
+        )
+        if on_delta and response.content and response.finish_reason != "error":
+            await on_delta(response.content)
+        return response
     
     @abstractmethod
     def get_default_model(self) -> str:
@@ -0,0 +1,233 @@
+"""Exact-match on-disk cache of LLM responses for deterministic calls."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterator
+
+from loguru import logger
+
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from nanobot.utils.helpers import ensure_dir
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+_cacheable: ContextVar[bool] = ContextVar("llm_cacheable", default=False)
+
+
+@contextmanager
+def cacheable() -> Iterator[None]:
+    """Mark LLM calls made inside the block as cacheable regardless of temperature."""
+    token = _cacheable.set(True)
+    try:
+        yield
+    finally:
+        _cacheable.reset(token)
+
+
+def cache_key(
+    model: str,
+    messages: list[dict[str, Any]],
+    tools: list[dict[str, Any]] | None,
+    temperature: float,
+    max_tokens: int,
+) -> str:
+    """SHA-256 of the canonical JSON form of everything that determines a response."""
+    payload = {"model": model, "messages": messages, "tools": tools or [],
+               "temperature": temperature, "max_tokens": max_tokens}
+    canonical = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _dump(response: LLMResponse) -> str:
+    return json.dumps({
+        "content": response.content,
+        "tool_calls": [{"id": tc.id, "name": tc.name, "arguments": tc.arguments} for tc in response.tool_calls],
+        "finish_reason": response.finish_reason,
+        "reasoning_content": response.reasoning_content,
+    }, ensure_ascii=False)
+
+
+def _load(data: str) -> LLMResponse:
+    d = json.loads(data)
+    return LLMResponse(
+        content=d["content"],
+        tool_calls=[ToolCallRequest(**tc) for tc in d["tool_calls"]],
+        finish_reason=d["finish_reason"],
+        reasoning_content=d.get("reasoning_content"),
+        usage={"response_cache_hits": 1},
+    )
+
+
+class ResponseCache:
+    """
+    LLM responses in one SQLite database, keyed by `cache_key`.
+
+    Entries expire `ttl_s` seconds after they were stored; when the cache
+    grows past `max_bytes` the least recently used entries are evicted.
+    Hit/miss counters are kept in the database so `nanobot status` can show them.
+    """
+
+    def __init__(self, path: Path, ttl_s: float = 24 * 3600, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        ensure_dir(path.parent)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _count(self, name: str, n: int = 1) -> None:
+        self._conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (name, n),
+        )
+
+    def get(self, key: str) -> LLMResponse | None:
+        now = time.time()
+        with self._conn:
+            row = self._conn.execute("SELECT data, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] <= self.ttl_s:
+                self._conn.execute("UPDATE responses SET used_at = ? WHERE key = ?", (now, key))
+                self._count("hits")
+                return _load(row[0])
+            if row:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._count("misses")
+        return None
+
+    def put(self, key: str, response: LLMResponse) -> None:
+        data = _dump(response)
+        now = time.time()
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, data, size, created_at, used_at) VALUES (?, ?, ?, ?, ?)",
+                (key, data, len(data), now, now),
+            )
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_s,))
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            evicted = 0
+            if total > self.max_bytes:
+                for old_key, size in self._conn.execute(
+                    "SELECT key, size FROM responses ORDER BY used_at, rowid"
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                    total -= size
+                    evicted += 1
+                self._count("evictions", evicted)
+
+    def stats(self) -> dict[str, int]:
+        counters = dict(self._conn.execute("SELECT name, value FROM counters"))
+        entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": counters.get("hits", 0),
+            "misses": counters.get("misses", 0),
+            "evictions": counters.get("evictions", 0),
+        }
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+class CachingProvider(LLMProvider):
+    """
+    Serves repeated deterministic calls from a ResponseCache.
+
+    Only calls at temperature 0, or made inside `cacheable()`, are looked up
+    and stored; errors are never cached. Hits report usage
+    `{"response_cache_hits": 1}` since no tokens were paid for.
+    """
+
+    def __init__(self, provider: LLMProvider, cache: ResponseCache):
+        super().__init__(provider.api_key, provider.api_base)
+        self.provider = provider
+        self.cache = cache
+
+    async def _call(
+        self,
+        key: str | None,
+        call: Callable[[], Awaitable[LLMResponse]],
+    ) -> LLMResponse:
+        if key is None:
+            return await call()
+        if (hit := self.cache.get(key)) is not None:
+            logger.debug("LLM response cache hit {}", key[:12])
+            return hit
+        response = await call()
+        if response.finish_reason != "error":
+            self.cache.put(key, response)
+        return response
+
+    def _key(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None,
+        model: str | None,
+        max_tokens: int,
+        temperature: float,
+    ) -> str | None:
+        if temperature != 0 and not _cacheable.get():
+            return None
+        return cache_key(model or self.get_default_model(), messages, tools, temperature, max_tokens)
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        return await self._call(
+            self._key(messages, tools, model, max_tokens, temperature),
+            lambda: self.provider.chat(messages=messages, tools=tools, model=model,
+                                       max_tokens=max_tokens, temperature=temperature),
+        )
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        on_delta: Callable[[str], Awaitable[None]] | None = None,
+    ) -> LLMResponse:
+        key = self._key(messages, tools, model, max_tokens, temperature)
+        if key is not None and (hit := self.cache.get(key)) is not None:
+            if on_delta and hit.content:
+                await on_delta(hit.content)
+            return hit
+        response = await self.provider.chat_stream(messages=messages, tools=tools, model=model,
+                                                   max_tokens=max_tokens, temperature=temperature,
+                                                   on_delta=on_delta)
+        if key is not None and response.finish_reason != "error":
+            self.cache.put(key, response)
+        return response
+
+    def get_default_model(self) -> str:
+        return self.provider.get_default_model()
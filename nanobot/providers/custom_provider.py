@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Awaitable, Callable
 
 import json_repair
 from openai import AsyncOpenAI
@@ -15,10 +15,11 @@ class CustomProvider(LLMProvider):
     def __init__(self, api_key: str = "no-key", api_base: str = "http://localhost:8000/v1", default_model: str = "default"):
         super().__init__(api_key, api_base)
         self.default_model = default_model
-        self._client = AsyncOpenAI(api_key=api_key, base_url=api_base)
+        # Retries are left to RetryingProvider
+        self._client = AsyncOpenAI(api_key=api_key, base_url=api_base, max_retries=0)
 
-    async def chat(self, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None = None,
-                   model: str | None = None, max_tokens: int = 4096, temperature: float = 0.7) -> LLMResponse:
+    def _build_kwargs(self, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None,
+                      model: str | None, max_tokens: int, temperature: float) -> dict[str, Any]:
         kwargs: dict[str, Any] = {
             "model": model or self.default_model,
             "messages": self._sanitize_empty_content(messages),
@@ -27,10 +28,53 @@ class CustomProvider(LLMProvider):
         }
         if tools:
             kwargs.update(tools=tools, tool_choice="auto")
+        return kwargs
+
+    async def chat(self, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None = None,
+                   model: str | None = None, max_tokens: int = 4096, temperature: float = 0.7) -> LLMResponse:
+        kwargs = self._build_kwargs(messages, tools, model, max_tokens, temperature)
         try:
             return self._parse(await self._client.chat.completions.create(**kwargs))
         except Exception as e:
-            return LLMResponse(content=f"Error: {e}", finish_reason="error")
+            return LLMResponse(content=f"Error: {e}", finish_reason="error", error=e)
+
+    async def chat_stream(self, messages: list[dict[str, Any]], tools: list[dict[str, Any]] | None = None,
+                          model: str | None = None, max_tokens: int = 4096, temperature: float = 0.7,
+                          on_delta: Callable[[str], Awaitable[None]] | None = None) -> LLMResponse:
+        kwargs = self._build_kwargs(messages, tools, model, max_tokens, temperature)
+        kwargs.update(stream=True, stream_options={"include_usage": True})
+        content, reasoning, finish_reason, usage = "", "", "stop", {}
+        calls: dict[int, dict[str, str]] = {}  # index -> {id, name, arguments}
+        try:
+            async for chunk in await self._client.chat.completions.create(**kwargs):
+                if u := getattr(chunk, "usage", None):
+                    usage = {"prompt_tokens": u.prompt_tokens, "completion_tokens": u.completion_tokens, "total_tokens": u.total_tokens}
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                delta = choice.delta
+                finish_reason = choice.finish_reason or finish_reason
+                reasoning += getattr(delta, "reasoning_content", None) or ""
+                if delta.content:
+                    content += delta.content
+                    if on_delta:
+                        await on_delta(delta.content)
+                for tc in delta.tool_calls or []:
+                    buf = calls.setdefault(tc.index, {"id": "", "name": "", "arguments": ""})
+                    buf["id"] = tc.id or buf["id"]
+                    if tc.function:
+                        buf["name"] += tc.function.name or ""
+                        buf["arguments"] += tc.function.arguments or ""
+        except Exception as e:
+            return LLMResponse(content=f"Error: {e}", finish_reason="error", error=e)
+        tool_calls = [
+            ToolCallRequest(id=b["id"], name=b["name"], arguments=json_repair.loads(b["arguments"] or "{}"))
+            for _, b in sorted(calls.items())
+        ]
+        return LLMResponse(
+            content=content or None, tool_calls=tool_calls, finish_reason=finish_reason,
+            usage=usage, reasoning_content=reasoning or None,
+        )
 
     def _parse(self, response: Any) -> LLMResponse:
         choice = response.choices[0]
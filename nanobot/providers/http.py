@@ -0,0 +1,125 @@
+"""Shared HTTP connection pool for provider calls, with per-request latency breakdown."""
+
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+import httpx
+from loguru import logger
+
+
+@dataclass
+class PoolSettings:
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    http2: bool = False
+    timeout: float = 60.0
+
+
+_settings = PoolSettings()
+# One client per (event loop, verify): connections cannot be shared across loops
+_clients: dict[tuple[int, bool], httpx.AsyncClient] = {}
+_closing: set[asyncio.Task] = set()  # Strong refs to pending closes of discarded clients
+
+
+def _discard(client: httpx.AsyncClient) -> None:
+    """Close a client that is no longer handed out, so its connection pool is released."""
+    async def _close() -> None:
+        try:
+            await client.aclose()
+        except Exception as e:
+            # Its connections may belong to an event loop that has since closed
+            logger.debug("Error closing discarded HTTP client: {}", e)
+
+    try:
+        task = asyncio.get_running_loop().create_task(_close())
+    except RuntimeError:
+        logger.debug("Discarded an HTTP client outside an event loop; its connections close with their loop")
+        return
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
+
+def configure(**settings: Any) -> None:
+    """Set pool limits (see PoolSettings); clients created afterwards use them."""
+    global _settings
+    _settings = PoolSettings(**settings)
+    for client in _clients.values():
+        _discard(client)
+    _clients.clear()
+
+
+def get_client(verify: bool = True) -> httpx.AsyncClient:
+    """The shared keep-alive client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    key = (id(loop), verify)
+    client = _clients.get(key)
+    if client is None or client.is_closed:
+        http2 = _settings.http2 and importlib.util.find_spec("h2") is not None
+        if _settings.http2 and not http2:
+            logger.warning("HTTP/2 requested but the h2 package is not installed; using HTTP/1.1")
+        # Clients of other (usually finished) event loops are not reused
+        for stale in [k for k in _clients if k[0] != id(loop)]:
+            _discard(_clients.pop(stale))
+        client = _clients[key] = httpx.AsyncClient(
+            timeout=_settings.timeout,
+            verify=verify,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=_settings.max_connections,
+                max_keepalive_connections=_settings.max_keepalive_connections,
+                keepalive_expiry=_settings.keepalive_expiry,
+            ),
+        )
+    return client
+
+
+async def aclose() -> None:
+    """Close the clients of the running event loop."""
+    loop_id = id(asyncio.get_running_loop())
+    for key in [k for k in _clients if k[0] == loop_id]:
+        await _clients.pop(key).aclose()
+
+
+class RequestTiming:
+    """
+    Collects connect, time-to-first-byte and total latency for one request.
+
+    Pass `extensions=timing.extensions` to the request; `connect_ms` stays 0
+    when a pooled connection was reused.
+    """
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.connect_ms = 0.0
+        self.ttfb_ms = 0.0
+        self.total_ms = 0.0
+        self._marks: dict[str, float] = {}
+
+    @property
+    def extensions(self) -> dict[str, Callable[[str, dict], Awaitable[None]]]:
+        return {"trace": self._trace}
+
+    async def _trace(self, event: str, info: dict) -> None:
+        now = time.perf_counter()
+        if event == "connection.connect_tcp.started":
+            self._marks["connect"] = now
+        elif event in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+            self.connect_ms = (now - self._marks.get("connect", now)) * 1000
+        elif event.endswith("send_request_headers.started"):
+            self._marks["sent"] = now
+        elif event.endswith("receive_response_headers.complete"):
+            self.ttfb_ms = (now - self._marks.get("sent", self.start)) * 1000
+
+    def finish(self, label: str) -> None:
+        """Record the total and log the breakdown at debug level."""
+        self.total_ms = (time.perf_counter() - self.start) * 1000
+        logger.debug(
+            "{} latency: connect {:.0f} ms, first byte {:.0f} ms, total {:.0f} ms",
+            label, self.connect_ms, self.ttfb_ms, self.total_ms,
+        )
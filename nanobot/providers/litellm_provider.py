@@ -3,7 +3,7 @@
 import json
 import json_repair
 import os
-from typing import Any
+from typing import Any, Awaitable, Callable
 
 import litellm
 from litellm import acompletion
@@ -33,6 +33,7 @@ class LiteLLMProvider(LLMProvider):
         default_model: str = "anthropic/claude-opus-4-5",
         extra_headers: dict[str, str] | None = None,
         provider_name: str | None = None,
+        set_global_api_base: bool = True,
     ):
         super().__init__(api_key, api_base)
         self.default_model = default_model
@@ -47,7 +48,9 @@ class LiteLLMProvider(LLMProvider):
         if api_key:
             self._setup_env(api_key, api_base, default_model)
         
-        if api_base:
+        # api_base is also passed per call; the global is only for single-provider setups,
+        # where several providers in one process would overwrite each other's
+        if api_base and set_global_api_base:
             litellm.api_base = api_base
         
         # Disable LiteLLM logging noise
@@ -116,29 +119,65 @@ class LiteLLMProvider(LLMProvider):
         spec = find_by_model(model)
         return spec is not None and spec.supports_prompt_caching
 
+    # Anthropic accepts at most four cache_control breakpoints per request
+    _MAX_CACHE_BREAKPOINTS = 4
+
+    @staticmethod
+    def _with_cache_control(msg: dict[str, Any]) -> dict[str, Any] | None:
+        """Copy of msg with cache_control on its last content block, or None if it has no content."""
+        content = msg.get("content")
+        marker = {"type": "ephemeral"}
+        if isinstance(content, str) and content:
+            return {**msg, "content": [{"type": "text", "text": content, "cache_control": marker}]}
+        if isinstance(content, list) and content and isinstance(content[-1], dict):
+            new_content = list(content)
+            new_content[-1] = {**new_content[-1], "cache_control": marker}
+            return {**msg, "content": new_content}
+        return None
+
     def _apply_cache_control(
         self,
         messages: list[dict[str, Any]],
         tools: list[dict[str, Any]] | None,
     ) -> tuple[list[dict[str, Any]], list[dict[str, Any]] | None]:
-        """Return copies of messages and tools with cache_control injected."""
-        new_messages = []
-        for msg in messages:
-            if msg.get("role") == "system":
-                content = msg["content"]
-                if isinstance(content, str):
-                    new_content = [{"type": "text", "text": content, "cache_control": {"type": "ephemeral"}}]
-                else:
-                    new_content = list(content)
-                    new_content[-1] = {**new_content[-1], "cache_control": {"type": "ephemeral"}}
-                new_messages.append({**msg, "content": new_content})
-            else:
-                new_messages.append(msg)
+        """
+        Return copies of messages and tools with cache_control injected.
+
+        Breakpoints go on the last tool definition, the system message and,
+        with the remaining budget, on the conversation itself: the last
+        message (written for the next call) and the last message before the
+        latest assistant reply (the end of the previous call's prompt, read
+        back on this call).
+        """
+        new_messages = list(messages)
+        budget = self._MAX_CACHE_BREAKPOINTS
+        for i, msg in enumerate(new_messages):
+            if msg.get("role") == "system" and (marked := self._with_cache_control(msg)):
+                new_messages[i] = marked
+                budget -= 1
 
         new_tools = tools
         if tools:
             new_tools = list(tools)
             new_tools[-1] = {**new_tools[-1], "cache_control": {"type": "ephemeral"}}
+            budget -= 1
+
+        last = len(new_messages) - 1
+        prev_assistant = next(
+            (i for i in range(last, -1, -1) if new_messages[i].get("role") == "assistant"), None,
+        )
+        targets = [last] + ([prev_assistant - 1] if prev_assistant else [])
+        marked_at: set[int] = set()
+        for target in targets:
+            # Walk back to the nearest message that has content to carry the marker
+            for i in range(target, -1, -1):
+                if budget <= 0 or i in marked_at or new_messages[i].get("role") == "system":
+                    break
+                if marked := self._with_cache_control(new_messages[i]):
+                    new_messages[i] = marked
+                    marked_at.add(i)
+                    budget -= 1
+                    break
 
         return new_messages, new_tools
 
@@ -164,27 +203,15 @@ class LiteLLMProvider(LLMProvider):
             sanitized.append(clean)
         return sanitized
 
-    async def chat(
+    def _build_kwargs(
         self,
         messages: list[dict[str, Any]],
-        tools: list[dict[str, Any]] | None = None,
-        model: str | None = None,
-        max_tokens: int = 4096,
-        temperature: float = 0.7,
-    ) -> LLMResponse:
-        """
-        Send a chat completion request via LiteLLM.
-        
-        Args:
-            messages: List of message dicts with 'role' and 'content'.
-            tools: Optional list of tool definitions in OpenAI format.
-            model: Model identifier (e.g., 'anthropic/claude-sonnet-4-5').
-            max_tokens: Maximum tokens in response.
-            temperature: Sampling temperature.
-        
-        Returns:
-            LLMResponse with content and/or tool calls.
-        """
+        tools: list[dict[str, Any]] | None,
+        model: str | None,
+        max_tokens: int,
+        temperature: float,
+    ) -> dict[str, Any]:
+        """Build acompletion() keyword arguments shared by chat() and chat_stream()."""
         original_model = model or self.default_model
         model = self._resolve_model(original_model)
 
@@ -220,7 +247,31 @@ class LiteLLMProvider(LLMProvider):
         if tools:
             kwargs["tools"] = tools
             kwargs["tool_choice"] = "auto"
+
+        return kwargs
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        """
+        Send a chat completion request via LiteLLM.
         
+        Args:
+            messages: List of message dicts with 'role' and 'content'.
+            tools: Optional list of tool definitions in OpenAI format.
+            model: Model identifier (e.g., 'anthropic/claude-sonnet-4-5').
+            max_tokens: Maximum tokens in response.
+            temperature: Sampling temperature.
+        
+        Returns:
+            LLMResponse with content and/or tool calls.
+        """
+        kwargs = self._build_kwargs(messages, tools, model, max_tokens, temperature)
         try:
             response = await acompletion(**kwargs)
             return self._parse_response(response)
@@ -229,6 +280,40 @@ class LiteLLMProvider(LLMProvider):
             return LLMResponse(
                 content=f"Error calling LLM: {str(e)}",
                 finish_reason="error",
+                error=e,
+            )
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        on_delta: Callable[[str], Awaitable[None]] | None = None,
+    ) -> LLMResponse:
+        """Stream a chat completion via LiteLLM, reporting text deltas to on_delta."""
+        kwargs = self._build_kwargs(messages, tools, model, max_tokens, temperature)
+        kwargs["stream"] = True
+        kwargs["stream_options"] = {"include_usage": True}
+        chunks: list[Any] = []
+        try:
+            stream = await acompletion(**kwargs)
+            async for chunk in stream:
+                chunks.append(chunk)
+                delta = chunk.choices[0].delta if chunk.choices else None
+                text = getattr(delta, "content", None) if delta else None
+                if text and on_delta:
+                    await on_delta(text)
+            response = litellm.stream_chunk_builder(chunks, messages=kwargs["messages"])
+            if response is None:
+                return LLMResponse(content=None)
+            return self._parse_response(response)
+        except Exception as e:
+            return LLMResponse(
+                content=f"Error calling LLM: {str(e)}",
+                finish_reason="error",
+                error=e,
             )
     
     def _parse_response(self, response: Any) -> LLMResponse:
@@ -257,6 +342,7 @@ class LiteLLMProvider(LLMProvider):
                 "completion_tokens": response.usage.completion_tokens,
                 "total_tokens": response.usage.total_tokens,
             }
+            usage.update(self._cache_usage(response.usage))
         
         reasoning_content = getattr(message, "reasoning_content", None) or None
         
@@ -268,6 +354,19 @@ class LiteLLMProvider(LLMProvider):
             reasoning_content=reasoning_content,
         )
     
+    @staticmethod
+    def _cache_usage(usage: Any) -> dict[str, int]:
+        """Prompt-cache read/write token counts, from Anthropic-style or OpenAI-style usage fields."""
+        details = getattr(usage, "prompt_tokens_details", None)
+        read = getattr(usage, "cache_read_input_tokens", None) or getattr(details, "cached_tokens", None)
+        write = getattr(usage, "cache_creation_input_tokens", None)
+        out = {}
+        if isinstance(read, int):
+            out["cache_read_tokens"] = read
+        if isinstance(write, int):
+            out["cache_write_tokens"] = write
+        return out
+
     def get_default_model(self) -> str:
         """Get the default model."""
         return self.default_model
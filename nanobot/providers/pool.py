@@ -0,0 +1,300 @@
+"""API key pools with rate limits, and ordered model fallback chains."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from loguru import logger
+
+from nanobot.providers.base import LLMProvider, LLMResponse, ProviderHTTPError
+from nanobot.providers.retry import is_retryable, retry_after
+
+# Seconds a key sits out after a 429 that did not say how long to wait
+DEFAULT_COOLDOWN_S = 30.0
+# Longest we throttle ourselves waiting for a key's RPM/TPM budget
+MAX_THROTTLE_S = 60.0
+_LEDGER_SAVE_INTERVAL_S = 5.0
+
+
+class TokenBucket:
+    """Per-minute budget refilled continuously; `per_minute <= 0` means unlimited."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be spent (requests larger than the bucket only need it full)."""
+        if self.capacity <= 0:
+            return 0.0
+        self._refill()
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing * 60 / self.capacity)
+
+    def consume(self, amount: float) -> None:
+        """Spend `amount`; may go negative, e.g. when actual usage exceeds the estimate."""
+        if self.capacity > 0:
+            self._refill()
+            self.tokens -= amount
+
+
+@dataclass
+class PooledKey:
+    """One API key (as a provider bound to it) in a pool."""
+
+    label: str
+    provider: LLMProvider
+    weight: int = 1
+    rpm: int = 0
+    tpm: int = 0
+    current: int = 0  # Smooth weighted round-robin counter
+    cooldown_until: float = 0.0
+    usage: dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        self.requests = TokenBucket(self.rpm)
+        self.tokens = TokenBucket(self.tpm)
+
+    def wait_time(self, tokens: int) -> float:
+        cooldown = max(0.0, self.cooldown_until - time.monotonic())
+        return max(cooldown, self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+
+class KeyPool:
+    """Keys of one model, picked by smooth weighted round-robin among those within their limits."""
+
+    def __init__(self, keys: list[PooledKey]):
+        self.keys = keys
+
+    def pick(self, tokens: int, exclude: set[str] = frozenset()) -> PooledKey | None:
+        ready = [k for k in self.keys if k.label not in exclude and k.wait_time(tokens) == 0]
+        if not ready:
+            return None
+        for k in ready:
+            k.current += k.weight
+        chosen = max(ready, key=lambda k: k.current)
+        chosen.current -= sum(k.weight for k in ready)
+        return chosen
+
+    def wait_time(self, tokens: int, exclude: set[str] = frozenset()) -> float | None:
+        """
+        Shortest wait until an untried key's RPM/TPM budget allows the call, or
+        None if every key was tried or is cooling down after a rate limit.
+        """
+        now = time.monotonic()
+        waits = [
+            k.wait_time(tokens) for k in self.keys
+            if k.label not in exclude and k.cooldown_until <= now
+        ]
+        return min(waits) if waits else None
+
+
+def _estimate_tokens(messages: list[dict[str, Any]]) -> int:
+    # Rough prompt size for TPM budgeting; corrected with reported usage afterwards
+    return len(json.dumps(messages, ensure_ascii=False, default=str)) // 4
+
+
+class FallbackProvider(LLMProvider):
+    """
+    Spreads calls over pooled API keys and falls back along an ordered model chain.
+
+    Within a model, a rate-limited key is cooled down and the next key is tried;
+    other transient errors (overload, outage) move on to the next model. Fatal
+    errors are returned as they are. Per-key usage is kept in `ledger()` and
+    written to `ledger_path` for `nanobot status`: at most every 5s while
+    calls come in, and by `flush_ledger()` on shutdown.
+
+    Calls for a model outside the chain (e.g. a subagent or consolidation model
+    of another provider) bypass the pool: they go to a provider built for that
+    model by `provider_for`, or to the primary model's first key without one.
+    """
+
+    def __init__(
+        self,
+        chain: list[tuple[str, KeyPool]],
+        ledger_path: Path | None = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+        provider_for: Callable[[str], LLMProvider] | None = None,
+    ):
+        first = chain[0][1].keys[0].provider
+        super().__init__(first.api_key, first.api_base)
+        self.chain = chain
+        self.ledger_path = ledger_path
+        self._sleep = sleep
+        self._saved_at = 0.0
+        self._unsaved = False
+        self._provider_for = provider_for
+        self._outside: dict[str, LLMProvider] = {}
+
+    def _chain_for(self, model: str | None) -> list[tuple[str, KeyPool]] | None:
+        """The chain from `model` onwards, or None for a model outside the chain."""
+        models = [m for m, _ in self.chain]
+        if not model or model == models[0]:
+            return self.chain
+        if model in models:
+            return self.chain[models.index(model):]
+        return None
+
+    def _provider_outside(self, model: str) -> LLMProvider:
+        if (provider := self._outside.get(model)) is None:
+            if self._provider_for is None:
+                provider = self.chain[0][1].keys[0].provider
+            else:
+                provider = self._outside[model] = self._provider_for(model)
+        return provider
+
+    def _record(self, key: PooledKey, model: str, response: LLMResponse, outcome: str) -> None:
+        u = key.usage
+        u["requests"] = u.get("requests", 0) + 1
+        if outcome != "ok":
+            u[outcome] = u.get(outcome, 0) + 1
+        for name in ("prompt_tokens", "completion_tokens"):
+            u[name] = u.get(name, 0) + int(response.usage.get(name, 0) or 0)
+        models = u.setdefault("models", {})
+        models[model] = models.get(model, 0) + 1
+        self._unsaved = True
+        if self.ledger_path and time.time() - self._saved_at >= _LEDGER_SAVE_INTERVAL_S:
+            self.save_ledger()
+
+    def ledger(self) -> dict[str, dict[str, Any]]:
+        return {k.label: dict(k.usage) for _, pool in self.chain for k in pool.keys if k.usage}
+
+    def save_ledger(self) -> None:
+        if not self.ledger_path:
+            return
+        self._saved_at = time.time()
+        self._unsaved = False
+        try:
+            self.ledger_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.ledger_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"updated_at": self._saved_at, "keys": self.ledger()}, indent=2), encoding="utf-8")
+            os.replace(tmp, self.ledger_path)
+        except OSError as e:
+            logger.warning("Failed to save key usage ledger: {}", e)
+
+    def flush_ledger(self) -> None:
+        """Save usage recorded since the last (rate-limited) save."""
+        if self._unsaved:
+            self.save_ledger()
+
+    async def _call(
+        self,
+        messages: list[dict[str, Any]],
+        model: str | None,
+        call: Callable[[LLMProvider, str], Awaitable[LLMResponse]],
+        streamed: list[bool],
+    ) -> LLMResponse:
+        chain = self._chain_for(model)
+        if chain is None:
+            try:
+                provider = self._provider_outside(model)
+            except Exception as e:
+                return LLMResponse(content=f"Error calling LLM: no provider for {model}: {e}", finish_reason="error")
+            response = await call(provider, model)
+            response.model = model
+            return response
+        estimate = _estimate_tokens(messages)
+        last: LLMResponse | None = None
+        for i, (m, pool) in enumerate(chain):
+            tried: set[str] = set()
+            while True:
+                key = pool.pick(estimate, tried)
+                if key is None:
+                    # Only the last model in the chain waits for its own budget to refill
+                    wait = pool.wait_time(estimate, tried)
+                    if i < len(chain) - 1 or wait is None or wait > MAX_THROTTLE_S:
+                        break
+                    await self._sleep(wait)
+                    continue
+                tried.add(key.label)
+                key.requests.consume(1)
+                key.tokens.consume(estimate)
+                response = await call(key.provider, m)
+                response.model = m
+                used = sum(int(response.usage.get(n, 0) or 0) for n in ("prompt_tokens", "completion_tokens"))
+                if used:
+                    key.tokens.consume(used - estimate)
+                if response.finish_reason != "error":
+                    self._record(key, m, response, "ok")
+                    return response
+                last = response
+                if not is_retryable(response.error) or streamed[0]:
+                    self._record(key, m, response, "errors")
+                    return response
+                if getattr(response.error, "status_code", None) == 429:
+                    self._record(key, m, response, "rate_limited")
+                    key.cooldown_until = time.monotonic() + (retry_after(response.error) or DEFAULT_COOLDOWN_S)
+                    continue
+                self._record(key, m, response, "errors")
+                break
+            if i < len(chain) - 1:
+                logger.warning("Falling back from {} to {}", m, chain[i + 1][0])
+        if last is not None:
+            return last
+        wait = min(k.wait_time(estimate) for _, p in chain for k in p.keys)
+        return LLMResponse(
+            content=f"Error calling LLM: all API keys for {chain[0][0]} are rate-limited",
+            finish_reason="error",
+            error=ProviderHTTPError("all API keys rate-limited", 429, {"retry-after": f"{wait:.1f}"}),
+        )
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        return await self._call(
+            messages, model,
+            lambda provider, m: provider.chat(messages=messages, tools=tools, model=m,
+                                              max_tokens=max_tokens, temperature=temperature),
+            [False],
+        )
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        on_delta: Callable[[str], Awaitable[None]] | None = None,
+    ) -> LLMResponse:
+        streamed = [False]
+
+        async def _on_delta(text: str) -> None:
+            streamed[0] = True
+            if on_delta:
+                await on_delta(text)
+
+        return await self._call(
+            messages, model,
+            lambda provider, m: provider.chat_stream(messages=messages, tools=tools, model=m, max_tokens=max_tokens,
+                                                     temperature=temperature, on_delta=_on_delta),
+            streamed,
+        )
+
+    def get_default_model(self) -> str:
+        return self.chain[0][0]
+
+
+def load_ledger(path: Path) -> dict[str, dict[str, Any]]:
+    """Per-key usage saved by a running FallbackProvider."""
+    try:
+        return json.loads(path.read_text(encoding="utf-8")).get("keys", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
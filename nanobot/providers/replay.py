@@ -0,0 +1,231 @@
+"""Record LLM exchanges to JSONL and replay them (or scripted responses) without a live API."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from nanobot.providers.cache import cache_key
+from nanobot.utils.helpers import ensure_dir
+
+
+def response_to_dict(response: LLMResponse) -> dict[str, Any]:
+    return {
+        "content": response.content,
+        "tool_calls": [{"id": tc.id, "name": tc.name, "arguments": tc.arguments} for tc in response.tool_calls],
+        "finish_reason": response.finish_reason,
+        "usage": dict(response.usage),
+        "reasoning_content": response.reasoning_content,
+    }
+
+
+def response_from_dict(d: dict[str, Any]) -> LLMResponse:
+    return LLMResponse(
+        content=d.get("content"),
+        tool_calls=[ToolCallRequest(**tc) for tc in d.get("tool_calls") or []],
+        finish_reason=d.get("finish_reason", "stop"),
+        usage=dict(d.get("usage") or {}),
+        reasoning_content=d.get("reasoning_content"),
+    )
+
+
+class Latency:
+    """
+    A latency distribution in seconds, parsed from a spec string:
+
+      "0" / "fixed:0.2"       constant
+      "uniform:0.1,0.5"       uniform between two bounds
+      "normal:0.3,0.05"       mean, stddev (clamped at 0)
+      "lognormal:-1.2,0.4"    mu, sigma of the underlying normal
+      "recorded"              the latency stored with each recorded exchange
+    """
+
+    def __init__(self, spec: str = "0", seed: int | None = None):
+        kind, _, args = spec.partition(":")
+        if not args and kind != "recorded":
+            kind, args = "fixed", spec
+        if kind not in ("fixed", "uniform", "normal", "lognormal", "recorded"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+        self.kind = kind
+        self.params = [float(a) for a in args.split(",") if a.strip()]
+        self._rng = random.Random(seed)
+
+    def sample(self, recorded: float = 0.0) -> float:
+        p = self.params
+        if self.kind == "recorded":
+            return recorded
+        if self.kind == "uniform":
+            return self._rng.uniform(p[0], p[1])
+        if self.kind == "normal":
+            return max(0.0, self._rng.gauss(p[0], p[1]))
+        if self.kind == "lognormal":
+            return self._rng.lognormvariate(p[0], p[1])
+        return p[0] if p else 0.0
+
+
+class RecordingProvider(LLMProvider):
+    """Passes calls through to a provider and appends each exchange, with its latency, to a JSONL file."""
+
+    def __init__(self, provider: LLMProvider, path: Path):
+        super().__init__(provider.api_key, provider.api_base)
+        self.provider = provider
+        self.path = path
+        ensure_dir(path.parent)
+
+    def _record(self, request: dict[str, Any], response: LLMResponse, latency: float) -> None:
+        line = {"request": request, "response": response_to_dict(response), "latency_s": round(latency, 4)}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(line, ensure_ascii=False, default=str) + "\n")
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        request = {"model": model or self.get_default_model(), "messages": messages, "tools": tools,
+                   "temperature": temperature, "max_tokens": max_tokens}
+        start = time.perf_counter()
+        response = await self.provider.chat(messages=messages, tools=tools, model=model,
+                                            max_tokens=max_tokens, temperature=temperature)
+        self._record(request, response, time.perf_counter() - start)
+        return response
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        on_delta: Callable[[str], Awaitable[None]] | None = None,
+    ) -> LLMResponse:
+        request = {"model": model or self.get_default_model(), "messages": messages, "tools": tools,
+                   "temperature": temperature, "max_tokens": max_tokens}
+        start = time.perf_counter()
+        response = await self.provider.chat_stream(messages=messages, tools=tools, model=model,
+                                                   max_tokens=max_tokens, temperature=temperature,
+                                                   on_delta=on_delta)
+        self._record(request, response, time.perf_counter() - start)
+        return response
+
+    def get_default_model(self) -> str:
+        return self.provider.get_default_model()
+
+
+class ReplayProvider(LLMProvider):
+    """
+    Answers from recorded exchanges or a script, with simulated latency.
+
+    Recorded mode (`from_jsonl`): a request identical to a recorded one gets
+    that recorded response; any other request gets the next recording in file
+    order (or an error when `strict`).
+
+    Scripted mode (`scripted`): `script` lists the responses of one turn. The
+    step is the number of tool-call rounds since the last user message, so
+    each turn replays the script from the start and concurrent sessions do
+    not disturb each other; steps past the end repeat the last entry. Tool
+    call ids are generated uniquely per conversation.
+    """
+
+    def __init__(
+        self,
+        exchanges: list[dict[str, Any]] | None = None,
+        script: list[dict[str, Any]] | None = None,
+        latency: Latency | str = "0",
+        strict: bool = False,
+        default_model: str = "replay",
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        super().__init__()
+        if not exchanges and not script:
+            raise ValueError("ReplayProvider needs recorded exchanges or a script")
+        self.exchanges = exchanges or []
+        self.script = script or []
+        self.latency = Latency(latency) if isinstance(latency, str) else latency
+        self.strict = strict
+        self.default_model = default_model
+        self._sleep = sleep
+        self._by_key = {self._key(e["request"]): e for e in self.exchanges}
+        self._cursor = 0
+        self.calls = 0
+
+    @classmethod
+    def from_jsonl(cls, path: Path, **kwargs: Any) -> ReplayProvider:
+        with open(path, encoding="utf-8") as f:
+            exchanges = [json.loads(line) for line in f if line.strip()]
+        return cls(exchanges=exchanges, **kwargs)
+
+    @classmethod
+    def scripted(
+        cls,
+        tool_calls: list[tuple[str, dict[str, Any]]] | None = None,
+        final: str = "Done.",
+        usage: dict[str, int] | None = None,
+        **kwargs: Any,
+    ) -> ReplayProvider:
+        """A script that makes each tool call in its own round, then answers `final`."""
+        usage = usage or {"prompt_tokens": 0, "completion_tokens": 0}
+        script = [
+            {"content": None, "tool_calls": [{"name": name, "arguments": args}], "usage": usage}
+            for name, args in tool_calls or []
+        ]
+        script.append({"content": final, "usage": usage})
+        return cls(script=script, **kwargs)
+
+    @staticmethod
+    def _key(request: dict[str, Any]) -> str:
+        return cache_key(request.get("model") or "", request.get("messages") or [], request.get("tools"),
+                         request.get("temperature", 0.7), request.get("max_tokens", 4096))
+
+    def _scripted(self, messages: list[dict[str, Any]]) -> dict[str, Any]:
+        last_user = max((i for i, m in enumerate(messages) if m.get("role") == "user"), default=-1)
+        step = sum(1 for m in messages[last_user + 1:] if m.get("role") == "assistant" and m.get("tool_calls"))
+        entry = dict(self.script[min(step, len(self.script) - 1)])
+        prior = sum(len(m.get("tool_calls") or []) for m in messages if m.get("role") == "assistant")
+        entry["tool_calls"] = [
+            {"id": tc.get("id") or f"call_{prior + i}", "name": tc["name"], "arguments": tc.get("arguments", {})}
+            for i, tc in enumerate(entry.get("tool_calls") or [])
+        ]
+        return {"response": entry, "latency_s": 0.0}
+
+    def _next(self, request: dict[str, Any]) -> dict[str, Any] | None:
+        if self.script:
+            return self._scripted(request["messages"])
+        if (hit := self._by_key.get(self._key(request))) is not None:
+            return hit
+        if self.strict:
+            return None
+        exchange = self.exchanges[self._cursor % len(self.exchanges)]
+        self._cursor += 1
+        return exchange
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        self.calls += 1
+        request = {"model": model or self.default_model, "messages": messages, "tools": tools,
+                   "temperature": temperature, "max_tokens": max_tokens}
+        exchange = self._next(request)
+        if exchange is None:
+            return LLMResponse(content="Error calling LLM: no recorded exchange matches the request",
+                               finish_reason="error")
+        delay = self.latency.sample(exchange.get("latency_s", 0.0))
+        if delay > 0:
+            await self._sleep(delay)
+        return response_from_dict(exchange["response"])
+
+    def get_default_model(self) -> str:
+        return self.default_model
@@ -0,0 +1,301 @@
+"""Retry with jittered backoff and per-model circuit breakers around an LLM provider."""
+
+from __future__ import annotations
+
+import asyncio
+import email.utils
+import json
+import os
+import random
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from loguru import logger
+
+from nanobot.providers.base import LLMProvider, LLMResponse
+
+# Status codes worth retrying: timeouts, conflicts, rate limits and server-side failures
+RETRYABLE_STATUS = frozenset({408, 409, 425, 429, 500, 502, 503, 504, 529})
+# Exception class-name fragments of transient failures that carry no status code
+_TRANSIENT_NAMES = ("Timeout", "Connection", "RateLimit", "ServiceUnavailable", "InternalServer", "Overloaded")
+
+
+def _status_code(exc: BaseException) -> int | None:
+    code = getattr(exc, "status_code", None)
+    if code is None:
+        code = getattr(getattr(exc, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def _headers(exc: BaseException) -> dict[str, str]:
+    for source in (exc, getattr(exc, "response", None)):
+        headers = getattr(source, "headers", None)
+        if headers:
+            try:
+                return {str(k).lower(): str(v) for k, v in dict(headers).items()}
+            except (TypeError, ValueError):
+                continue
+    return {}
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """Seconds the server asked us to wait (Retry-After / retry-after-ms), if any."""
+    headers = _headers(exc)
+    if ms := headers.get("retry-after-ms"):
+        try:
+            return max(0.0, float(ms) / 1000)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(exc: BaseException | None) -> bool:
+    """Whether an error is transient (rate limit, overload, network) rather than fatal (auth, bad request)."""
+    if exc is None:
+        return False
+    code = _status_code(exc)
+    if code is not None:
+        return code in RETRYABLE_STATUS
+    if isinstance(exc, (TimeoutError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    return any(name in cls.__name__ for cls in type(exc).__mro__ for name in _TRANSIENT_NAMES)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive transient failures and rejects
+    calls for `reset_timeout` seconds; then lets one trial call through
+    (half-open) and closes again if it succeeds. Other calls are rejected
+    until the trial call has finished.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_error = ""
+        self._state = self.CLOSED
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.time() - self.opened_at >= self.reset_timeout:
+            self._state = self.HALF_OPEN
+        return self._state
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - time.time()) if self._state == self.OPEN else 0.0
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead; in half-open state only the first caller may."""
+        state = self.state
+        if state == self.HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = True
+        return state != self.OPEN
+
+    def end_probe(self) -> None:
+        """Let another trial call through if the last one ended without a verdict (e.g. a fatal error)."""
+        self._probing = False
+
+    def record_success(self) -> bool:
+        """Returns True if the state changed."""
+        changed = self._state != self.CLOSED
+        self.failures, self._state, self._probing = 0, self.CLOSED, False
+        return changed
+
+    def record_failure(self, error: str = "") -> bool:
+        """Returns True if the breaker (re)opened."""
+        self.failures += 1
+        self.last_error = error[:200]
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self._state, self.opened_at, self._probing = self.OPEN, time.time(), False
+            return True
+        return False
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opened_at": self.opened_at,
+            "reset_timeout": self.reset_timeout,
+            "retry_in_s": round(self.retry_in(), 1),
+            "last_error": self.last_error,
+        }
+
+
+class RetryingProvider(LLMProvider):
+    """
+    Wraps a provider: transient errors are retried with full-jitter exponential
+    backoff (honouring Retry-After), fatal ones are returned at once, and a
+    per-model circuit breaker fails fast while a model keeps failing.
+
+    Breaker state is written to `state_path` on every transition so that
+    `nanobot status` can show it from another process.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        state_path: Path | None = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        super().__init__(provider.api_key, provider.api_base)
+        self.provider = provider
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state_path = state_path
+        self._sleep = sleep
+        self.breakers: dict[str, CircuitBreaker] = {}
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        if model not in self.breakers:
+            self.breakers[model] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+        return self.breakers[model]
+
+    def _save_state(self) -> None:
+        if not self.state_path:
+            return
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_path.with_suffix(f".{os.getpid()}.tmp")
+            data = {"updated_at": time.time(), "models": {m: b.snapshot() for m, b in self.breakers.items()}}
+            tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+            os.replace(tmp, self.state_path)
+        except OSError as e:
+            logger.warning("Failed to save circuit breaker state: {}", e)
+
+    def _backoff(self, attempt: int, error: BaseException | None) -> float | None:
+        """Delay before the next attempt, or None if the server asks for longer than max_delay."""
+        wait = retry_after(error) if error is not None else None
+        if wait is not None:
+            return wait if wait <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def _call(self, model: str, call: Callable[[], Awaitable[LLMResponse]], streamed: list[bool]) -> LLMResponse:
+        breaker = self.breaker(model)
+        probe = breaker.state == breaker.HALF_OPEN
+        if not breaker.allow():
+            wait = "a trial call is in progress" if probe else f"retrying in {breaker.retry_in():.0f}s"
+            return LLMResponse(
+                content=f"Error calling LLM: circuit open for {model} after repeated failures "
+                        f"({breaker.last_error}); {wait}",
+                finish_reason="error",
+            )
+        try:
+            return await self._attempt(model, breaker, call, streamed)
+        finally:
+            if probe:
+                breaker.end_probe()
+
+    async def _attempt(
+        self,
+        model: str,
+        breaker: CircuitBreaker,
+        call: Callable[[], Awaitable[LLMResponse]],
+        streamed: list[bool],
+    ) -> LLMResponse:
+        attempt = 0
+        while True:
+            response = await call()
+            if response.finish_reason != "error":
+                if breaker.record_success():
+                    logger.info("Circuit for {} closed", model)
+                    self._save_state()
+                return response
+            if not is_retryable(response.error):
+                return response
+            if breaker.record_failure(response.content or ""):
+                logger.warning("Circuit for {} opened after {} failures", model, breaker.failures)
+                self._save_state()
+                return response
+            # Deltas already shown to the user cannot be taken back
+            if streamed[0] or attempt >= self.max_retries:
+                return response
+            delay = self._backoff(attempt, response.error)
+            if delay is None:
+                return response
+            attempt += 1
+            logger.warning("LLM call to {} failed ({}); retry {}/{} in {:.1f}s",
+                           model, response.content, attempt, self.max_retries, delay)
+            await self._sleep(delay)
+
+    async def chat(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+    ) -> LLMResponse:
+        return await self._call(
+            model or self.get_default_model(),
+            lambda: self.provider.chat(messages=messages, tools=tools, model=model,
+                                       max_tokens=max_tokens, temperature=temperature),
+            [False],
+        )
+
+    async def chat_stream(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]] | None = None,
+        model: str | None = None,
+        max_tokens: int = 4096,
+        temperature: float = 0.7,
+        on_delta: Callable[[str], Awaitable[None]] | None = None,
+    ) -> LLMResponse:
+        streamed = [False]
+
+        async def _on_delta(text: str) -> None:
+            streamed[0] = True
+            if on_delta:
+                await on_delta(text)
+
+        return await self._call(
+            model or self.get_default_model(),
+            lambda: self.provider.chat_stream(messages=messages, tools=tools, model=model, max_tokens=max_tokens,
+                                              temperature=temperature, on_delta=_on_delta),
+            streamed,
+        )
+
+    def get_default_model(self) -> str:
+        return self.provider.get_default_model()
+
+
+def load_breaker_state(path: Path) -> dict[str, Any]:
+    """Breaker snapshots saved by a running RetryingProvider, keyed by model, with `state` brought up to date."""
+    try:
+        models = json.loads(path.read_text(encoding="utf-8")).get("models", {})
+    except (OSError, ValueError, AttributeError):
+        return {}
+    now = time.time()
+    for snap in models.values():
+        if snap.get("state") == CircuitBreaker.OPEN:
+            retry_in = snap.get("opened_at", 0) + snap.get("reset_timeout", 0) - now
+            snap["retry_in_s"] = round(max(0.0, retry_in), 1)
+            if retry_in <= 0:
+                snap["state"] = CircuitBreaker.HALF_OPEN
+    return models
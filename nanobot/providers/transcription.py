@@ -4,9 +4,10 @@ import os
 from pathlib import Path
 from typing import Any
 
-import httpx
 from loguru import logger
 
+from nanobot.providers import http as http_pool
+
 
 class GroqTranscriptionProvider:
     """
@@ -39,27 +40,29 @@ class GroqTranscriptionProvider:
             return ""
         
         try:
-            async with httpx.AsyncClient() as client:
-                with open(path, "rb") as f:
-                    files = {
-                        "file": (path.name, f),
-                        "model": (None, "whisper-large-v3"),
-                    }
-                    headers = {
-                        "Authorization": f"Bearer {self.api_key}",
-                    }
-                    
-                    response = await client.post(
-                        self.api_url,
-                        headers=headers,
-                        files=files,
-                        timeout=60.0
-                    )
-                    
-                    response.raise_for_status()
-                    data = response.json()
-                    return data.get("text", "")
-                    
+            client = http_pool.get_client()
+            timing = http_pool.RequestTiming()
+            with open(path, "rb") as f:
+                files = {
+                    "file": (path.name, f),
+                    "model": (None, "whisper-large-v3"),
+                }
+                headers = {
+                    "Authorization": f"Bearer {self.api_key}",
+                }
+                
+                response = await client.post(
+                    self.api_url,
+                    headers=headers,
+                    files=files,
+                    timeout=60.0,
+                    extensions=timing.extensions,
+                )
+                timing.finish("Groq transcription")
+                
+                response.raise_for_status()
+                data = response.json()
+                return data.get("text", "")
         except Exception as e:
             logger.error("Groq transcription error: {}", e)
             return ""
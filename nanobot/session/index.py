@@ -0,0 +1,84 @@
+"""SQLite index of session metadata, so listings do not open every session file."""
+
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+_COLUMNS = ("key", "file", "created_at", "updated_at", "count", "last_consolidated", "bytes")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    key TEXT PRIMARY KEY,
+    file TEXT NOT NULL,
+    created_at TEXT,
+    updated_at TEXT,
+    count INTEGER NOT NULL DEFAULT 0,
+    last_consolidated INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at);
+"""
+
+
+class SessionIndex:
+    """
+    One row per session: key, file name, timestamps, message count,
+    last_consolidated and file size.
+
+    The index is derived data. Rows are upserted when a session is saved, and
+    `rebuild` recreates them from the session files' metadata records, so
+    losing or deleting the index file loses nothing.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        fresh = not path.exists()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        # user_version marks an index that has been populated from the files at least once
+        self.built = not fresh and self._conn.execute("PRAGMA user_version").fetchone()[0] >= 1
+
+    def upsert(self, row: dict[str, Any]) -> None:
+        """Insert or replace the row for `row["key"]`."""
+        values = tuple(row.get(c) for c in _COLUMNS)
+        with self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO sessions ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                values,
+            )
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        cur = self._conn.execute(
+            f"SELECT {', '.join(_COLUMNS)} FROM sessions WHERE key = ?", (key,),
+        )
+        row = cur.fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def rows(self, updated_before: str | None = None) -> list[dict[str, Any]]:
+        """Rows sorted by updated_at, newest first; optionally only those updated before a time."""
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM sessions"
+        args: tuple[Any, ...] = ()
+        if updated_before is not None:
+            sql += " WHERE updated_at < ?"
+            args = (updated_before,)
+        sql += " ORDER BY updated_at DESC"
+        return [dict(zip(_COLUMNS, row)) for row in self._conn.execute(sql, args)]
+
+    def rebuild(self, rows: list[dict[str, Any]]) -> None:
+        """Replace every row with `rows` and mark the index as built."""
+        values = [tuple(r.get(c) for c in _COLUMNS) for r in rows]
+        with self._conn:
+            self._conn.execute("DELETE FROM sessions")
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO sessions ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                values,
+            )
+            self._conn.execute("PRAGMA user_version = 1")
+        self.built = True
+
+    def close(self) -> None:
+        self._conn.close()
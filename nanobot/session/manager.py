@@ -1,15 +1,21 @@
 """Session management for conversation history."""
 
 import json
+import os
 import shutil
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any
+from typing import Any, Iterator
 
 from loguru import logger
 
+from nanobot.session.index import SessionIndex
 from nanobot.utils.helpers import ensure_dir, safe_filename
+from nanobot.utils.tracing import tracer
 
 
 @dataclass
@@ -22,6 +28,9 @@ class Session:
     Important: Messages are append-only for LLM cache efficiency.
     The consolidation process writes summaries to MEMORY.md/HISTORY.md
     but does NOT modify the messages list or get_history() output.
+
+    Sessions loaded from disk hold only the unconsolidated tail: entries
+    before `last_consolidated` may be None until `SessionManager.page_in`.
     """
 
     key: str  # channel:chat_id
@@ -30,6 +39,13 @@ class Session:
     updated_at: datetime = field(default_factory=datetime.now)
     metadata: dict[str, Any] = field(default_factory=dict)
     last_consolidated: int = 0  # Number of messages already consolidated to files
+    # Persistence bookkeeping (owned by SessionManager)
+    _persisted: int = field(default=0, init=False, repr=False, compare=False)  # Messages on disk
+    _stale_records: int = field(default=0, init=False, repr=False, compare=False)  # Superseded metadata lines
+    _synced: bool = field(default=False, init=False, repr=False, compare=False)  # File matches _persisted prefix
+    _disk_bytes: int = field(default=0, init=False, repr=False, compare=False)  # Size estimate for cache accounting
+    _written_meta: dict[str, Any] | None = field(default=None, init=False, repr=False, compare=False)
+    _unloaded: int = field(default=0, init=False, repr=False, compare=False)  # Leading messages not paged in
     
     def add_message(self, role: str, content: str, **kwargs: Any) -> None:
         """Add a message to the session."""
@@ -67,21 +83,106 @@ class Session:
         self.messages = []
         self.last_consolidated = 0
         self.updated_at = datetime.now()
+        self._unloaded = 0
+        self._synced = False  # Next save rewrites the file
 
 
-class SessionManager:
+class SessionStore(ABC):
     """
-    Manages conversation sessions.
+    Persistence backend for SessionManager.
 
-    Sessions are stored as JSONL files in the sessions directory.
+    Stores own the bookkeeping fields on Session (`_persisted`, `_synced`,
+    `_unloaded`, ...) and must keep `load` tail-only: messages before
+    `last_consolidated` may be left as None until `page_in`.
     """
 
-    def __init__(self, workspace: Path):
-        self.workspace = workspace
-        self.sessions_dir = ensure_dir(self.workspace / "sessions")
-        self.legacy_sessions_dir = Path.home() / ".nanobot" / "sessions"
-        self._cache: dict[str, Session] = {}
-    
+    @abstractmethod
+    def load(self, key: str) -> Session | None:
+        """Load a session (unconsolidated tail only), or None if it does not exist."""
+
+    @abstractmethod
+    def save(self, session: Session) -> None:
+        """Persist a session, writing only what changed since the last save where possible."""
+
+    @abstractmethod
+    def page_in(self, session: Session) -> None:
+        """Load the consolidated messages a tail-only load skipped."""
+
+    @abstractmethod
+    def list_sessions(self, updated_before: str | None = None) -> list[dict[str, Any]]:
+        """
+        List session info dicts (key, created_at, updated_at, path, count,
+        last_consolidated, bytes), most recently updated first.
+        """
+
+    def compact(self, session: Session) -> None:
+        """Reclaim space held by superseded records (no-op by default)."""
+
+    def rebuild_index(self) -> None:
+        """Recreate any derived index from the stored sessions (no-op by default)."""
+
+    def close(self) -> None:
+        """Release resources held by the store."""
+
+    @staticmethod
+    def metadata_record(session: Session) -> dict[str, Any]:
+        return {
+            "_type": "metadata",
+            "key": session.key,
+            "created_at": session.created_at.isoformat(),
+            "updated_at": session.updated_at.isoformat(),
+            "metadata": session.metadata,
+            "last_consolidated": session.last_consolidated,
+            "count": len(session.messages),
+        }
+
+    @staticmethod
+    def session_from_record(
+        key: str, messages: list[dict[str, Any]], meta_record: dict[str, Any],
+    ) -> Session:
+        created_at = meta_record.get("created_at")
+        updated_at = meta_record.get("updated_at")
+        session = Session(
+            key=key,
+            messages=messages,
+            created_at=datetime.fromisoformat(created_at) if created_at else datetime.now(),
+            updated_at=datetime.fromisoformat(updated_at) if updated_at else datetime.now(),
+            metadata=meta_record.get("metadata", {}),
+            last_consolidated=meta_record.get("last_consolidated", 0),
+        )
+        session._written_meta = meta_record
+        return session
+
+    def is_dirty(self, session: Session) -> bool:
+        """Whether the session has changes that are not persisted yet."""
+        return (
+            not session._synced
+            or session._persisted != len(session.messages)
+            or session._written_meta != self.metadata_record(session)
+        )
+
+
+class JsonlSessionStore(SessionStore):
+    """
+    One JSONL file per session in the sessions directory.
+
+    Files are append-only: each save appends the new messages followed by a
+    metadata record, and the last metadata record in a file wins. Files are
+    rewritten (compacted) only when the message list was reset or when
+    superseded metadata records pile up.
+
+    Per-session metadata is mirrored into a SQLite index (sessions/index.sqlite)
+    on every save, so listing does not touch the session files.
+    """
+
+    # Compact once superseded metadata records outnumber both this and the messages
+    COMPACT_MIN_STALE = 64
+
+    def __init__(self, sessions_dir: Path, legacy_sessions_dir: Path | None = None):
+        self.sessions_dir = ensure_dir(sessions_dir)
+        self.legacy_sessions_dir = legacy_sessions_dir or Path.home() / ".nanobot" / "sessions"
+        self.index = SessionIndex(self.sessions_dir / "index.sqlite")
+
     def _get_session_path(self, key: str) -> Path:
         """Get the file path for a session."""
         safe_key = safe_filename(key.replace(":", "_"))
@@ -91,35 +192,17 @@ class SessionManager:
         """Legacy global session path (~/.nanobot/sessions/)."""
         safe_key = safe_filename(key.replace(":", "_"))
         return self.legacy_sessions_dir / f"{safe_key}.jsonl"
-    
-    def get_or_create(self, key: str) -> Session:
-        """
-        Get an existing session or create a new one.
-        
-        Args:
-            key: Session key (usually channel:chat_id).
-        
-        Returns:
-            The session.
-        """
-        if key in self._cache:
-            return self._cache[key]
-        
-        session = self._load(key)
-        if session is None:
-            session = Session(key=key)
-        
-        self._cache[key] = session
-        return session
-    
-    def _load(self, key: str) -> Session | None:
+
+    def load(self, key: str) -> Session | None:
         """Load a session from disk."""
         path = self._get_session_path(key)
+        migrated = False
         if not path.exists():
             legacy_path = self._get_legacy_session_path(key)
             if legacy_path.exists():
                 try:
                     shutil.move(str(legacy_path), str(path))
+                    migrated = True
                     logger.info("Migrated session {} from legacy path", key)
                 except Exception:
                     logger.exception("Failed to migrate session {}", key)
@@ -128,85 +211,458 @@ class SessionManager:
             return None
 
         try:
-            messages = []
-            metadata = {}
-            created_at = None
-            last_consolidated = 0
-
-            with open(path, encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    data = json.loads(line)
-
-                    if data.get("_type") == "metadata":
-                        metadata = data.get("metadata", {})
-                        created_at = datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None
-                        last_consolidated = data.get("last_consolidated", 0)
-                    else:
-                        messages.append(data)
-
-            return Session(
-                key=key,
-                messages=messages,
-                created_at=created_at or datetime.now(),
-                metadata=metadata,
-                last_consolidated=last_consolidated
-            )
+            session = self._load_tail(key, path)
+            if session is None:
+                messages, meta_record, meta_records, size = self._parse_file(key, path)
+                session = self.session_from_record(key, messages, meta_record)
+                session._stale_records = max(0, meta_records - 1)
+                session._disk_bytes = size
+            session._persisted = len(session.messages)
+            session._synced = True
+            if migrated:
+                self._update_index(session, path)
+            return session
         except Exception as e:
             logger.warning("Failed to load session {}: {}", key, e)
             return None
-    
+
+    @staticmethod
+    def _parse_file(key: str, path: Path) -> tuple[list[dict[str, Any]], dict[str, Any], int, int]:
+        """Parse a whole session file into (messages, latest metadata, metadata count, size)."""
+        messages = []
+        meta_record: dict[str, Any] = {}
+        meta_records = 0
+
+        with open(path, encoding="utf-8") as f:
+            text = f.read()
+        lines = text.split("\n")
+
+        for i, line in enumerate(lines):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                data = json.loads(line)
+            except json.JSONDecodeError:
+                if i == len(lines) - 1:
+                    logger.debug("Ignoring torn final line in session {}", key)
+                else:
+                    logger.warning("Skipping corrupt line {} in session {}", i + 1, key)
+                continue
+
+            if data.get("_type") == "metadata":
+                meta_record = data
+                meta_records += 1
+            else:
+                messages.append(data)
+        return messages, meta_record, meta_records, len(text)
+
+    def _load_tail(self, key: str, path: Path) -> Session | None:
+        """
+        Load only the unconsolidated tail of a session file.
+
+        Scans backwards to the latest metadata trailer, whose message count
+        tells how many message lines to keep. Consolidated messages before the
+        tail are left as None placeholders so indexes stay absolute; see
+        `page_in`. Returns None when the file needs a full parse (no counted
+        trailer, or a corrupt line inside the tail).
+        """
+        meta: dict[str, Any] | None = None
+        tail: list[dict[str, Any]] = []  # Newest first
+        need: int | None = None
+        head = 0
+        stale = 0
+        size = 0
+        first = True
+        with open(path, "rb") as f:
+            file_size = os.fstat(f.fileno()).st_size
+            for raw in _reverse_lines(f):
+                size += len(raw) + 1
+                if not raw.strip():
+                    continue
+                try:
+                    data = json.loads(raw)
+                except json.JSONDecodeError:
+                    if first:
+                        first = False
+                        continue  # Torn final line
+                    return None
+                first = False
+                if data.get("_type") == "metadata":
+                    if meta is not None:
+                        stale += 1
+                        continue
+                    if "count" not in data:
+                        return None
+                    meta = data
+                    if size >= file_size:
+                        break  # Header of a rewritten file: every message is loaded
+                    # Messages after a trailer were appended before a torn later trailer
+                    total = data["count"] + len(tail)
+                    need = total - data.get("last_consolidated", 0)
+                else:
+                    tail.append(data)
+                if need is not None and len(tail) >= need:
+                    head = max(0, total - len(tail))
+                    break
+            else:
+                # Reached the start of the file: every message is loaded
+                if meta is None:
+                    return None
+
+        tail.reverse()
+        session = self.session_from_record(key, [None] * head + tail, meta)
+        session._unloaded = head
+        session._stale_records = stale
+        session._disk_bytes = size
+        return session
+
+    def page_in(self, session: Session) -> None:
+        """Load the consolidated messages a tail-only load skipped."""
+        if not session._unloaded:
+            return
+        path = self._get_session_path(session.key)
+        messages, _, _, size = self._parse_file(session.key, path)
+        if len(messages) < session._unloaded:
+            raise ValueError(f"Session file {path} is shorter than its loaded tail")
+        session.messages[:session._unloaded] = messages[:session._unloaded]
+        session._unloaded = 0
+        session._disk_bytes = max(session._disk_bytes, size)
+
     def save(self, session: Session) -> None:
-        """Save a session to disk."""
+        """Save a session to disk, appending only messages added since the last save."""
+        path = self._get_session_path(session.key)
+        needs_rewrite = (
+            not session._synced
+            or session._persisted > len(session.messages)
+            or session._stale_records >= max(self.COMPACT_MIN_STALE, len(session.messages))
+            or not path.exists()
+        )
+        if needs_rewrite:
+            self._rewrite(path, session)
+        else:
+            record = self.metadata_record(session)
+            lines = [json.dumps(m, ensure_ascii=False) for m in session.messages[session._persisted:]]
+            lines.append(json.dumps(record, ensure_ascii=False))
+            session._disk_bytes += self._append_lines(path, lines)
+            session._stale_records += 1
+            session._written_meta = record
+        session._persisted = len(session.messages)
+        session._synced = True
+        self._update_index(session, path)
+
+    def compact(self, session: Session) -> None:
+        """Rewrite a session file without superseded metadata records."""
         path = self._get_session_path(session.key)
+        self._rewrite(path, session)
+        session._persisted = len(session.messages)
+        session._synced = True
+        self._update_index(session, path)
 
-        with open(path, "w", encoding="utf-8") as f:
-            metadata_line = {
-                "_type": "metadata",
+    def _update_index(self, session: Session, path: Path) -> None:
+        """Mirror a saved session's metadata into the index (best effort)."""
+        try:
+            self.index.upsert({
                 "key": session.key,
+                "file": path.name,
                 "created_at": session.created_at.isoformat(),
                 "updated_at": session.updated_at.isoformat(),
-                "metadata": session.metadata,
-                "last_consolidated": session.last_consolidated
-            }
-            f.write(json.dumps(metadata_line, ensure_ascii=False) + "\n")
-            for msg in session.messages:
-                f.write(json.dumps(msg, ensure_ascii=False) + "\n")
+                "count": len(session.messages),
+                "last_consolidated": session.last_consolidated,
+                "bytes": path.stat().st_size,
+            })
+        except Exception as e:
+            logger.warning("Failed to update session index for {}: {}", session.key, e)
+
+    def _rewrite(self, path: Path, session: Session) -> None:
+        """Atomically replace a session file with its full current contents."""
+        self.page_in(session)
+        tmp = path.with_suffix(".jsonl.tmp")
+        record = self.metadata_record(session)
+        size = 0
+        with open(tmp, "w", encoding="utf-8") as f:
+            for obj in (record, *session.messages):
+                size += f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+        os.replace(tmp, path)
+        session._stale_records = 0
+        session._disk_bytes = size
+        session._written_meta = record
+
+    @staticmethod
+    def _append_lines(path: Path, lines: list[str]) -> int:
+        """Append lines to a file, first dropping a torn partial line left by a crash.
 
+        Returns the number of bytes appended.
+        """
+        data = ("\n".join(lines) + "\n").encode("utf-8")
+        with open(path, "r+b") as f:
+            end = f.seek(0, os.SEEK_END)
+            if end:
+                f.seek(end - 1)
+                if f.read(1) != b"\n":
+                    end = _line_start(f, end)
+                    f.truncate(end)
+            f.seek(end)
+            f.write(data)
+        return len(data)
+
+    def list_sessions(self, updated_before: str | None = None) -> list[dict[str, Any]]:
+        """List sessions from the index, most recently updated first."""
+        if not self.index.built:
+            self.rebuild_index()
+        return [self._index_entry(row) for row in self.index.rows(updated_before=updated_before)]
+
+    def _index_entry(self, row: dict[str, Any]) -> dict[str, Any]:
+        entry = dict(row)
+        entry["path"] = str(self.sessions_dir / entry.pop("file"))
+        return entry
+
+    def rebuild_index(self) -> None:
+        """Recreate the session index from the metadata records of every session file."""
+        rows = []
+        for path in self.sessions_dir.glob("*.jsonl"):
+            try:
+                # Read just the latest metadata record (trailer, else the header line)
+                data = _read_last_metadata(path)
+                if data:
+                    rows.append({
+                        "key": data.get("key") or path.stem.replace("_", ":", 1),
+                        "file": path.name,
+                        "created_at": data.get("created_at"),
+                        "updated_at": data.get("updated_at"),
+                        "count": data.get("count", 0),
+                        "last_consolidated": data.get("last_consolidated", 0),
+                        "bytes": path.stat().st_size,
+                    })
+            except Exception:
+                continue
+        self.index.rebuild(rows)
+        logger.info("Rebuilt session index ({} sessions)", len(rows))
+
+    def close(self) -> None:
+        self.index.close()
+
+
+class SessionManager:
+    """
+    Manages conversation sessions.
+
+    Persistence is delegated to a SessionStore: one JSONL file per session
+    (the default) or a SQLite database.
+
+    Loaded sessions are kept in an LRU cache bounded by count and by estimated
+    size (the session's on-disk bytes). Evicted sessions are flushed first and
+    reload from the store on the next `get_or_create`. Pinned sessions, i.e.
+    ones with a turn or consolidation in flight, are never evicted.
+    """
+
+    def __init__(
+        self,
+        workspace: Path,
+        max_cached_sessions: int = 256,
+        max_cache_bytes: int = 64 * 1024 * 1024,
+        store: str | SessionStore = "jsonl",
+    ):
+        self.workspace = workspace
+        self.sessions_dir = ensure_dir(self.workspace / "sessions")
+        self.store = open_session_store(store, self.sessions_dir) if isinstance(store, str) else store
+        self.max_cached_sessions = max_cached_sessions
+        self.max_cache_bytes = max_cache_bytes
+        self._cache: OrderedDict[str, Session] = OrderedDict()
+        self._pins: dict[str, int] = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_evictions = 0
+
+    def get_or_create(self, key: str) -> Session:
+        """
+        Get an existing session or create a new one.
+        
+        Args:
+            key: Session key (usually channel:chat_id).
+        
+        Returns:
+            The session.
+        """
+        session = self._cache.get(key)
+        if session is not None:
+            self.cache_hits += 1
+            self._cache.move_to_end(key)
+            return session
+
+        self.cache_misses += 1
+        session = self.store.load(key)
+        if session is None:
+            session = Session(key=key)
+
+        self._cache_put(session)
+        return session
+
+    @contextmanager
+    def pinned(self, key: str) -> Iterator[None]:
+        """Keep a session in the cache while the block runs (pins nest)."""
+        self._pins[key] = self._pins.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            if self._pins[key] <= 1:
+                del self._pins[key]
+            else:
+                self._pins[key] -= 1
+
+    def cache_stats(self) -> dict[str, Any]:
+        """Return cache occupancy, hit rate and eviction counters."""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "sessions": len(self._cache),
+            "bytes": sum(s._disk_bytes for s in self._cache.values()),
+            "pinned": len(self._pins),
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": self.cache_hits / lookups if lookups else 0.0,
+            "evictions": self.cache_evictions,
+        }
+
+    def _cache_put(self, session: Session) -> None:
         self._cache[session.key] = session
-    
+        self._cache.move_to_end(session.key)
+        self._evict()
+
+    def _evict(self) -> None:
+        """Evict least recently used, unpinned sessions until within limits."""
+        total = sum(s._disk_bytes for s in self._cache.values())
+        # The most recently used entry is the caller's session; never evict it
+        candidates = [k for k in list(self._cache)[:-1] if k not in self._pins]
+        for key in candidates:
+            if len(self._cache) <= self.max_cached_sessions and total <= self.max_cache_bytes:
+                break
+            session = self._cache[key]
+            if self.store.is_dirty(session):
+                try:
+                    self.store.save(session)
+                except Exception:
+                    logger.exception("Failed to flush session {}; keeping it cached", key)
+                    continue
+            del self._cache[key]
+            total -= session._disk_bytes
+            self.cache_evictions += 1
+            logger.debug("Evicted session {} from cache", key)
+
+    def save(self, session: Session) -> None:
+        """Persist a session and mark it most recently used."""
+        with tracer.span("session.save", messages=len(session.messages)):
+            self.store.save(session)
+        self._cache_put(session)
+
+    def compact(self, session: Session) -> None:
+        """Rewrite a session's stored form without superseded records."""
+        self.store.compact(session)
+
+    def page_in(self, session: Session) -> None:
+        """Load the consolidated messages a tail-only load skipped."""
+        self.store.page_in(session)
+
     def invalidate(self, key: str) -> None:
         """Remove a session from the in-memory cache."""
         self._cache.pop(key, None)
-    
+
     def list_sessions(self) -> list[dict[str, Any]]:
         """
-        List all sessions.
+        List all sessions, most recently updated first.
         
         Returns:
-            List of session info dicts.
+            List of session info dicts (key, timestamps, path, count,
+            last_consolidated, bytes).
         """
-        sessions = []
-        
-        for path in self.sessions_dir.glob("*.jsonl"):
+        return self.store.list_sessions()
+
+    def stale_sessions(self, before: datetime) -> list[dict[str, Any]]:
+        """List sessions last updated before `before`, most recent first."""
+        return self.store.list_sessions(updated_before=before.isoformat())
+
+    def rebuild_index(self) -> None:
+        """Recreate the store's session index from the stored sessions."""
+        self.store.rebuild_index()
+
+
+def open_session_store(kind: str, sessions_dir: Path) -> SessionStore:
+    """Create a session store by name: "jsonl" or "sqlite"."""
+    if kind == "jsonl":
+        return JsonlSessionStore(sessions_dir)
+    if kind == "sqlite":
+        from nanobot.session.sqlite_store import SqliteSessionStore
+        return SqliteSessionStore(sessions_dir / "sessions.sqlite")
+    raise ValueError(f"Unknown session store '{kind}' (expected 'jsonl' or 'sqlite')")
+
+
+def migrate_sessions(source: SessionStore, target: SessionStore, overwrite: bool = False) -> int:
+    """Copy every session from one store to another; returns the number copied."""
+    existing = {row["key"] for row in target.list_sessions()}
+    copied = 0
+    for row in source.list_sessions():
+        key = row["key"]
+        if key in existing and not overwrite:
+            continue
+        session = source.load(key)
+        if session is None:
+            logger.warning("Skipping unreadable session {}", key)
+            continue
+        source.page_in(session)
+        target.save(SessionStore.session_from_record(
+            key, session.messages, source.metadata_record(session),
+        ))
+        copied += 1
+    return copied
+
+
+
+
+def _line_start(f: Any, end: int) -> int:
+    """Return the offset just after the last newline before `end` (0 if none)."""
+    pos = end
+    while pos > 0:
+        step = min(4096, pos)
+        pos -= step
+        f.seek(pos)
+        idx = f.read(step).rfind(b"\n")
+        if idx != -1:
+            return pos + idx + 1
+    return 0
+
+
+def _reverse_lines(f: Any, block: int = 65536) -> Iterator[bytes]:
+    """Yield the lines of a binary file from last to first."""
+    pos = f.seek(0, os.SEEK_END)
+    rest = b""
+    while pos > 0:
+        step = min(block, pos)
+        pos -= step
+        f.seek(pos)
+        lines = (f.read(step) + rest).split(b"\n")
+        rest = lines[0]
+        yield from reversed(lines[1:])
+    yield rest
+
+
+def _read_last_metadata(path: Path, tail_bytes: int = 65536) -> dict[str, Any] | None:
+    """Read the latest metadata record of a session file without parsing all messages."""
+    with open(path, "rb") as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(0, size - tail_bytes))
+        tail = f.read().split(b"\n")
+        if size > tail_bytes:
+            tail = tail[1:]  # First piece may be a partial line
+        for raw in reversed(tail):
+            if b'"_type": "metadata"' not in raw:
+                continue
             try:
-                # Read just the metadata line
-                with open(path, encoding="utf-8") as f:
-                    first_line = f.readline().strip()
-                    if first_line:
-                        data = json.loads(first_line)
-                        if data.get("_type") == "metadata":
-                            key = data.get("key") or path.stem.replace("_", ":", 1)
-                            sessions.append({
-                                "key": key,
-                                "created_at": data.get("created_at"),
-                                "updated_at": data.get("updated_at"),
-                                "path": str(path)
-                            })
-            except Exception:
+                return json.loads(raw)
+            except json.JSONDecodeError:
                 continue
-        
-        return sorted(sessions, key=lambda x: x.get("updated_at", ""), reverse=True)
+        f.seek(0)
+        first = f.readline().strip()
+    if first:
+        data = json.loads(first)
+        if data.get("_type") == "metadata":
+            return data
+    return None
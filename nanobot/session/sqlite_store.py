@@ -0,0 +1,143 @@
+"""SQLite session store: one row per message in a single WAL-mode database."""
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Any
+
+from nanobot.session.manager import Session, SessionStore
+from nanobot.utils.helpers import ensure_dir
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    key TEXT PRIMARY KEY,
+    created_at TEXT,
+    updated_at TEXT,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    last_consolidated INTEGER NOT NULL DEFAULT 0,
+    count INTEGER NOT NULL DEFAULT 0,
+    bytes INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at);
+CREATE TABLE IF NOT EXISTS messages (
+    session_key TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS messages_session_seq ON messages (session_key, seq);
+"""
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    Sessions in one SQLite database.
+
+    Each message is a row keyed by (session_key, seq), where seq is the
+    message's index in `Session.messages`. A save inserts only the new rows
+    and updates the session row (including last_consolidated) in the same
+    transaction. Loads read just the rows from last_consolidated onward.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        ensure_dir(path.parent)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def load(self, key: str) -> Session | None:
+        row = self._conn.execute(
+            "SELECT created_at, updated_at, metadata, last_consolidated, count, bytes "
+            "FROM sessions WHERE key = ?", (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        created_at, updated_at, metadata, last_consolidated, count, size = row
+        head = min(last_consolidated, count)
+        tail = [
+            json.loads(data) for (data,) in self._conn.execute(
+                "SELECT data FROM messages WHERE session_key = ? AND seq >= ? ORDER BY seq",
+                (key, head),
+            )
+        ]
+        session = self.session_from_record(key, [None] * head + tail, {
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "metadata": json.loads(metadata),
+            "last_consolidated": last_consolidated,
+        })
+        session._unloaded = head
+        session._persisted = len(session.messages)
+        session._synced = True
+        session._disk_bytes = size
+        session._written_meta = self.metadata_record(session)
+        return session
+
+    def save(self, session: Session) -> None:
+        rewrite = not session._synced or session._persisted > len(session.messages)
+        if rewrite:
+            self.page_in(session)
+        start = 0 if rewrite else session._persisted
+        rows = [
+            (session.key, seq, json.dumps(m, ensure_ascii=False))
+            for seq, m in enumerate(session.messages[start:], start)
+        ]
+        added = sum(len(r[2]) for r in rows)
+        with self._conn:
+            if rewrite:
+                self._conn.execute("DELETE FROM messages WHERE session_key = ?", (session.key,))
+            else:
+                row = self._conn.execute(
+                    "SELECT bytes FROM sessions WHERE key = ?", (session.key,),
+                ).fetchone()
+                added += row[0] if row else 0
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO messages (session_key, seq, data) VALUES (?, ?, ?)", rows,
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions "
+                "(key, created_at, updated_at, metadata, last_consolidated, count, bytes) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    session.key,
+                    session.created_at.isoformat(),
+                    session.updated_at.isoformat(),
+                    json.dumps(session.metadata, ensure_ascii=False),
+                    session.last_consolidated,
+                    len(session.messages),
+                    added,
+                ),
+            )
+        session._persisted = len(session.messages)
+        session._synced = True
+        session._disk_bytes = added
+        session._written_meta = self.metadata_record(session)
+
+    def page_in(self, session: Session) -> None:
+        if not session._unloaded:
+            return
+        rows = self._conn.execute(
+            "SELECT seq, data FROM messages WHERE session_key = ? AND seq < ? ORDER BY seq",
+            (session.key, session._unloaded),
+        ).fetchall()
+        if len(rows) < session._unloaded:
+            raise ValueError(f"Session {session.key} is missing messages before its loaded tail")
+        session.messages[:session._unloaded] = [json.loads(data) for _, data in rows]
+        session._unloaded = 0
+
+    def list_sessions(self, updated_before: str | None = None) -> list[dict[str, Any]]:
+        sql = "SELECT key, created_at, updated_at, count, last_consolidated, bytes FROM sessions"
+        args: tuple[Any, ...] = ()
+        if updated_before is not None:
+            sql += " WHERE updated_at < ?"
+            args = (updated_before,)
+        sql += " ORDER BY updated_at DESC"
+        columns = ("key", "created_at", "updated_at", "count", "last_consolidated", "bytes")
+        return [
+            {**dict(zip(columns, row)), "path": str(self.path)}
+            for row in self._conn.execute(sql, args)
+        ]
+
+    def close(self) -> None:
+        self._conn.close()
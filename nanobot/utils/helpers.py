@@ -54,6 +54,18 @@ def truncate_string(s: str, max_len: int = 100, suffix: str = "...") -> str:
     return s[: max_len - len(suffix)] + suffix
 
 
+def file_signature(path: Path) -> tuple[int, int] | None:
+    """Return (mtime_ns, size) for a file, or None if it does not exist.
+
+    Used to detect file changes with a single stat call.
+    """
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
 def safe_filename(name: str) -> str:
     """Convert a string to a safe filename."""
     # Replace unsafe characters
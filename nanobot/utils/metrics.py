@@ -0,0 +1,245 @@
+"""Runtime metrics in the Prometheus text exposition format, with a small scrape endpoint."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+from typing import Callable
+
+from loguru import logger
+
+LabelValues = tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v)) if not float(v).is_integer() else str(int(v))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labels)
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}", *self._samples()]
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """A monotonically increasing count per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self.values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self.values.get(self._key(labels), 0)
+
+    def _samples(self) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labels, k)} {_format_value(v)}" for k, v in self.values.items()]
+
+
+class Gauge(_Metric):
+    """
+    A value that goes up and down. Either `set` explicitly, or read at scrape
+    time from a function given to `set_function` returning {label values: value}.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self.values: dict[LabelValues, float] = {}
+        self._fn: Callable[[], dict[LabelValues, float]] | None = None
+
+    def set(self, value: float, **labels: str) -> None:
+        self.values[self._key(labels)] = value
+
+    def set_function(self, fn: Callable[[], dict[LabelValues, float]] | None) -> None:
+        self._fn = fn
+
+    def collect(self) -> dict[LabelValues, float]:
+        if self._fn is None:
+            return dict(self.values)
+        try:
+            return self._fn()
+        except Exception as e:
+            logger.warning("Failed to collect metric {}: {}", self.name, e)
+            return {}
+
+    def _samples(self) -> list[str]:
+        return [f"{self.name}{_format_labels(self.labels, k)} {_format_value(v)}" for k, v in self.collect().items()]
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum and count, per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self.series: dict[LabelValues, list[float]] = {}  # bucket counts..., +Inf count, sum
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        s = self.series.get(key)
+        if s is None:
+            s = self.series[key] = [0.0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                s[i] += 1
+                break
+        else:
+            s[len(self.buckets)] += 1
+        s[-1] += value
+
+    def count(self, **labels: str) -> int:
+        s = self.series.get(self._key(labels))
+        return int(sum(s[:-1])) if s else 0
+
+    def _samples(self) -> list[str]:
+        lines = []
+        for key, s in self.series.items():
+            cumulative = 0.0
+            for bound, n in zip((*self.buckets, math.inf), s[:-1]):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(s[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {_format_value(cumulative)}")
+        return lines
+
+
+class Registry:
+    """The metrics exposed by one process."""
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple[str, ...] = (), **kwargs) -> Histogram:
+        return self.register(Histogram(name, help, labels, **kwargs))
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self.metrics.values()) + "\n"
+
+
+registry = Registry()
+
+QUEUE_DEPTH = registry.gauge(
+    "nanobot_bus_queue_depth", "Messages waiting in the message bus.", ("queue",))
+SESSION_TASKS = registry.gauge(
+    "nanobot_session_tasks", "Queued or running messages per session.", ("session",))
+CONSOLIDATION_BACKLOG = registry.gauge(
+    "nanobot_consolidation_backlog", "Memory consolidation jobs waiting or running.", ("state",))
+CONSOLIDATION_BACKLOG_MESSAGES = registry.gauge(
+    "nanobot_consolidation_backlog_messages", "Messages in sessions waiting for consolidation.")
+LLM_LATENCY = registry.histogram(
+    "nanobot_llm_request_seconds", "LLM call latency.", ("model",))
+LLM_TOKENS = registry.counter(
+    "nanobot_llm_tokens_total", "LLM tokens used.", ("model", "type"))
+LLM_ERRORS = registry.counter(
+    "nanobot_llm_errors_total", "LLM calls that returned an error.", ("model",))
+TOOL_LATENCY = registry.histogram(
+    "nanobot_tool_seconds", "Tool execution latency.", ("tool",))
+TOOL_ERRORS = registry.counter(
+    "nanobot_tool_errors_total", "Tool executions that returned an error.", ("tool",))
+CRON_LAG = registry.histogram(
+    "nanobot_cron_lag_seconds", "Delay between a cron job's scheduled and actual start.",
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0))
+CHANNEL_SENT = registry.counter(
+    "nanobot_channel_messages_sent_total", "Outbound messages delivered per channel.", ("channel",))
+CHANNEL_SEND_FAILURES = registry.counter(
+    "nanobot_channel_send_failures_total", "Outbound messages a channel failed to send.", ("channel",))
+
+
+class MetricsServer:
+    """Serves `registry.render()` at GET /metrics over plain HTTP/1.1."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9464, registry: Registry = registry):
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Metrics endpoint on http://{}:{}/metrics", self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await asyncio.wait_for(reader.readline(), timeout=5)
+            while await asyncio.wait_for(reader.readline(), timeout=5) not in (b"\r\n", b"\n", b""):
+                pass  # Headers are not needed
+            parts = request.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, ctype, body = "200 OK", "text/plain; version=0.0.4; charset=utf-8", self.registry.render()
+            else:
+                status, ctype, body = "404 Not Found", "text/plain; charset=utf-8", "Not found\n"
+            data = body.encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {ctype}\r\n"
+                f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode("latin-1") + data
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,182 @@
+"""Lightweight per-turn tracing: spans exported to a local JSONL or OTLP/JSON file."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator
+
+from loguru import logger
+
+# Metadata keys carried on bus messages
+TRACE_ID_KEY = "_trace_id"
+SPAN_ID_KEY = "_span_id"  # The turn's span, parent of spans recorded for its replies
+RECEIVED_AT_KEY = "_received_at"
+
+_FLUSH_EVERY = 100
+_FLUSH_INTERVAL_S = 5.0
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: str | None
+    name: str
+    start: float
+    end: float = 0.0
+    attrs: dict[str, Any] = field(default_factory=dict)
+    error: str | None = None
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+_trace_id: ContextVar[str | None] = ContextVar("trace_id", default=None)
+_parent: ContextVar[Span | None] = ContextVar("trace_parent", default=None)
+
+
+def new_trace_id() -> str:
+    return os.urandom(16).hex()
+
+
+def _otlp_value(v: Any) -> dict[str, Any]:
+    if isinstance(v, bool):
+        return {"boolValue": v}
+    if isinstance(v, int):
+        return {"intValue": str(v)}
+    if isinstance(v, float):
+        return {"doubleValue": v}
+    return {"stringValue": str(v)}
+
+
+class Tracer:
+    """
+    Records spans for the trace active in the current context and exports
+    them in batches: when a root span (a whole turn) ends, when 100 spans are
+    buffered, or when a span ends 5s after the last export. Does nothing
+    until `configure` gives it a file.
+
+    Formats: "jsonl" writes one span object per line; "otlp" writes one
+    OTLP/JSON ExportTraceServiceRequest per batch (the OpenTelemetry
+    Collector file exporter format), importable by OTLP tooling.
+    """
+
+    def __init__(self) -> None:
+        self.path: Path | None = None
+        self.format = "jsonl"
+        self._buffer: list[Span] = []
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def configure(self, path: Path | None, format: str = "jsonl") -> None:
+        if format not in ("jsonl", "otlp"):
+            raise ValueError(f"Unknown trace format: {format}")
+        self.flush()
+        self.path, self.format = path, format
+        if path:
+            path.parent.mkdir(parents=True, exist_ok=True)
+
+    @contextmanager
+    def use_trace(self, trace_id: str | None, parent_id: str | None = None) -> Iterator[None]:
+        """
+        Make `trace_id` (e.g. from a message's metadata) the active trace, with
+        new spans parented to the span `parent_id` if given.
+        """
+        token = _trace_id.set(trace_id)
+        parent = _parent.set(Span(trace_id, parent_id, None, "", 0.0) if trace_id and parent_id else None)
+        try:
+            yield
+        finally:
+            _parent.reset(parent)
+            _trace_id.reset(token)
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span | None]:
+        """Time the block as a child of the current span; yields None when not tracing."""
+        trace_id = _trace_id.get()
+        if not self.enabled or not trace_id:
+            yield None
+            return
+        parent = _parent.get()
+        span = Span(trace_id, os.urandom(8).hex(), parent.span_id if parent else None, name, time.time(), attrs=attrs)
+        token = _parent.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _parent.reset(token)
+            span.end = time.time()
+            self._add(span)
+
+    def record(self, name: str, trace_id: str | None, start: float, end: float | None = None, **attrs: Any) -> None:
+        """Add a span measured elsewhere (e.g. time a message waited in a queue)."""
+        if not self.enabled or not trace_id:
+            return
+        parent = _parent.get()
+        parent_id = parent.span_id if parent and parent.trace_id == trace_id else None
+        self._add(Span(trace_id, os.urandom(8).hex(), parent_id, name, start, end or time.time(), attrs=attrs))
+
+    def _add(self, span: Span) -> None:
+        with self._lock:
+            self._buffer.append(span)
+            full = len(self._buffer) >= _FLUSH_EVERY
+        # A finished root span closes a turn: export it promptly
+        if full or span.parent_id is None or time.monotonic() - self._flushed_at >= _FLUSH_INTERVAL_S:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            spans, self._buffer = self._buffer, []
+            self._flushed_at = time.monotonic()
+        if not spans or not self.path:
+            return
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                if self.format == "otlp":
+                    f.write(json.dumps(self._otlp(spans)) + "\n")
+                else:
+                    for s in spans:
+                        f.write(json.dumps({
+                            "trace_id": s.trace_id, "span_id": s.span_id, "parent_id": s.parent_id,
+                            "name": s.name, "start": s.start, "end": s.end,
+                            "duration_ms": round((s.end - s.start) * 1000, 3),
+                            "attrs": s.attrs, "error": s.error,
+                        }, ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            logger.warning("Failed to export trace spans: {}", e)
+
+    @staticmethod
+    def _otlp(spans: list[Span]) -> dict[str, Any]:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": "nanobot"}}]},
+            "scopeSpans": [{
+                "scope": {"name": "nanobot"},
+                "spans": [{
+                    "traceId": s.trace_id,
+                    "spanId": s.span_id,
+                    **({"parentSpanId": s.parent_id} if s.parent_id else {}),
+                    "name": s.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(int(s.start * 1e9)),
+                    "endTimeUnixNano": str(int(s.end * 1e9)),
+                    "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attrs.items()],
+                    "status": {"code": 2, "message": s.error} if s.error else {},
+                } for s in spans],
+            }],
+        }]}
+
+
+tracer = Tracer()
@@ -0,0 +1,28 @@
+"""Tests for the offline agent throughput benchmark."""
+
+from __future__ import annotations
+
+import pytest
+
+from nanobot.agent.bench import _percentile, run_bench
+
+
+def test_percentile_nearest_rank() -> None:
+    values = [float(v) for v in range(1, 101)]
+    assert _percentile(values, 50) == 50
+    assert _percentile(values, 95) == 95
+    assert _percentile(values, 100) == 100
+    assert _percentile([], 50) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_run_bench_reports_throughput_and_stages() -> None:
+    result = await run_bench(sessions=3, turns=2, tool_calls=2)
+
+    assert result["messages"] == 6
+    assert result["llm_calls"] == 6 * 3  # Two tool rounds plus the final answer per turn
+    assert result["messages_per_s"] > 0
+    latency = result["turn_latency_ms"]
+    assert 0 < latency["p50"] <= latency["p95"] <= latency["p99"] <= latency["max"]
+    assert set(result["stages_ms"]) == {"context_build", "provider", "tools", "session_save"}
+    assert result["stages_ms"]["tools"]["total"] > 0
@@ -0,0 +1,91 @@
+"""Tests for the background consolidation scheduler."""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+
+from nanobot.agent.consolidation import ConsolidationScheduler
+from nanobot.agent.memory import MemoryStore
+from nanobot.providers.base import LLMResponse, ToolCallRequest
+from nanobot.session.manager import Session
+
+
+@pytest.mark.asyncio
+async def test_dedupes_and_merges_small_backlogs() -> None:
+    batches: list[list[str]] = []
+
+    async def _run(keys: list[str]) -> None:
+        batches.append(keys)
+
+    scheduler = ConsolidationScheduler(_run, batch_messages=100)
+    assert scheduler.submit("a", 40)
+    assert not scheduler.submit("a", 40)  # Already queued
+    scheduler.submit("big", 90)
+    scheduler.submit("b", 50)
+    await scheduler.drain()
+
+    assert batches == [["a", "b"], ["big"]]
+    assert not scheduler.is_scheduled("a") and not scheduler.tasks
+
+
+@pytest.mark.asyncio
+async def test_caps_in_flight_and_waits_for_idle() -> None:
+    idle = asyncio.Event()
+    active = peak = 0
+
+    async def _run(keys: list[str]) -> None:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+
+    scheduler = ConsolidationScheduler(_run, max_in_flight=2, batch_messages=0, idle=idle)
+    for key in "abcde":
+        scheduler.submit(key, 10)
+    await asyncio.sleep(0.02)
+    assert peak == 0 and scheduler.stats()["queued"] == 5  # An interactive turn is running
+
+    idle.set()
+    await scheduler.drain()
+    assert peak == 2 and scheduler.stats()["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_runs_after_max_defer_when_never_idle() -> None:
+    ran = asyncio.Event()
+
+    async def _run(keys: list[str]) -> None:
+        ran.set()
+
+    scheduler = ConsolidationScheduler(_run, idle=asyncio.Event(), max_defer_s=0.01)
+    scheduler.submit("a", 10)
+    await asyncio.wait_for(ran.wait(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_batch_consolidation_uses_one_call(tmp_path: Path) -> None:
+    sessions = []
+    for key in ("cli:a", "cli:b"):
+        s = Session(key=key)
+        for i in range(8):
+            s.add_message("user", f"{key} msg{i}")
+        sessions.append(s)
+
+    provider = AsyncMock()
+    provider.chat = AsyncMock(return_value=LLMResponse(content=None, tool_calls=[ToolCallRequest(
+        id="c", name="save_memory",
+        arguments={"history_entry": "[2026-01-01 10:00] Two chats.", "memory_patch": []},
+    )]))
+    store = MemoryStore(tmp_path)
+
+    assert await store.consolidate_batch(sessions, provider, "m", memory_window=4)
+    assert provider.chat.await_count == 1
+    prompt = provider.chat.call_args.kwargs["messages"][1]["content"]
+    assert "### cli:a" in prompt and "### cli:b" in prompt
+    assert [s.last_consolidated for s in sessions] == [6, 6]
+    assert store.history_file.read_text().count("Two chats.") == 1
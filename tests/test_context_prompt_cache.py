@@ -64,3 +64,134 @@ def test_runtime_context_is_separate_untrusted_user_message(tmp_path) -> None:
 
     assert messages[-1]["role"] == "user"
     assert messages[-1]["content"] == "Return exactly: OK"
+
+
+def test_system_prompt_is_cached_until_input_file_changes(tmp_path) -> None:
+    """Unchanged inputs hit the cache; editing a bootstrap or memory file rebuilds."""
+    workspace = _make_workspace(tmp_path)
+    (workspace / "SOUL.md").write_text("calm", encoding="utf-8")
+    builder = ContextBuilder(workspace)
+
+    first = builder.build_system_prompt()
+    assert builder.build_system_prompt() is first
+    assert (builder.prompt_cache_hits, builder.prompt_cache_misses) == (1, 1)
+
+    (workspace / "SOUL.md").write_text("cheerful and bright", encoding="utf-8")
+    assert "cheerful and bright" in builder.build_system_prompt()
+
+    builder.memory.write_long_term("User likes tea")
+    assert "User likes tea" in builder.build_system_prompt()
+    assert builder.prompt_cache_misses == 3
+
+
+def test_system_prompt_cache_picks_up_new_workspace_skill(tmp_path) -> None:
+    workspace = _make_workspace(tmp_path)
+    builder = ContextBuilder(workspace)
+    builder.build_system_prompt()
+
+    skill_dir = workspace / "skills" / "demo"
+    skill_dir.mkdir(parents=True)
+    (skill_dir / "SKILL.md").write_text(
+        "---\nname: demo\ndescription: Demo skill for tests\n---\n\nBody\n", encoding="utf-8"
+    )
+
+    assert "Demo skill for tests" in builder.build_system_prompt()
+
+
+def test_skill_files_are_parsed_once_while_unchanged(tmp_path, monkeypatch) -> None:
+    from nanobot.agent.skills import SkillsLoader
+
+    workspace = _make_workspace(tmp_path)
+    builder = ContextBuilder(workspace)
+    calls = 0
+    original = SkillsLoader._parse_frontmatter
+
+    def _counting(content):
+        nonlocal calls
+        calls += 1
+        return original(content)
+
+    monkeypatch.setattr(SkillsLoader, "_parse_frontmatter", staticmethod(_counting))
+    builder.skills._file_cache.clear()
+    builder._prompt_cache = None
+
+    builder.build_system_prompt()
+    parsed = calls
+    builder.build_system_prompt()
+    builder.skills.build_skills_summary()
+    assert calls == parsed
+
+
+def _big_memory() -> str:
+    filler = " ".join(f"word{i}" for i in range(300))
+    return (
+        "# Long-term Memory\n\nIntro line.\n\n"
+        "## Identity (pinned)\n\nUser is called Sam.\n\n"
+        f"## Garden\n\nTomatoes and basil grow on the balcony. {filler}\n\n"
+        f"## Work\n\nSam deploys the billing service on Fridays. {filler}\n"
+    )
+
+
+def test_large_memory_injects_pinned_and_relevant_sections(tmp_path) -> None:
+    workspace = _make_workspace(tmp_path)
+    (workspace / "memory").mkdir()
+    (workspace / "memory" / "MEMORY.md").write_text(_big_memory(), encoding="utf-8")
+    builder = ContextBuilder(workspace, memory_budget_tokens=800)
+
+    prompt = builder.build_system_prompt(query="when is the billing deploy?")
+    assert "Intro line." in prompt and "User is called Sam." in prompt
+    assert "billing service" in prompt
+    assert "Tomatoes" not in prompt
+    assert "1 sections unrelated" in prompt
+
+    other = builder.build_system_prompt(query="how are the tomatoes doing")
+    assert "Tomatoes" in other and "billing service" not in other
+
+
+def test_memory_within_budget_is_injected_whole(tmp_path) -> None:
+    workspace = _make_workspace(tmp_path)
+    (workspace / "memory").mkdir()
+    (workspace / "memory" / "MEMORY.md").write_text(_big_memory(), encoding="utf-8")
+    builder = ContextBuilder(workspace, memory_budget_tokens=0)
+    prompt = builder.build_system_prompt(query="billing")
+    assert "Tomatoes" in prompt and "billing service" in prompt
+
+
+def test_skill_requirements_are_checked_on_change_or_ttl(tmp_path, monkeypatch) -> None:
+    import nanobot.agent.skills as skills_module
+    from nanobot.agent.skills import SkillsLoader
+
+    workspace = _make_workspace(tmp_path)
+    skill_dir = workspace / "skills" / "needs-tool"
+    skill_dir.mkdir(parents=True)
+    skill_file = skill_dir / "SKILL.md"
+    skill_file.write_text(
+        '---\nname: needs-tool\ndescription: d\nmetadata: {"nanobot": {"requires": {"bins": ["sometool"]}}}\n---\n',
+        encoding="utf-8",
+    )
+    loader = SkillsLoader(workspace, builtin_skills_dir=tmp_path / "no-builtins")
+    which: list[str] = []
+    monkeypatch.setattr(skills_module.shutil, "which", lambda b: which.append(b))
+    clock = [1000.0]
+    monkeypatch.setattr(skills_module.time, "monotonic", lambda: clock[0])
+    listed = 0
+    original = SkillsLoader.list_skills
+
+    def _counting(self, filter_unavailable=True):
+        nonlocal listed
+        listed += 1
+        return original(self, filter_unavailable)
+
+    monkeypatch.setattr(SkillsLoader, "list_skills", _counting)
+
+    first = loader.fingerprint()
+    assert loader.fingerprint() == first
+    assert (listed, which) == (1, ["sometool"])  # Unchanged files: no re-parse, no re-check
+
+    clock[0] += skills_module.REQUIREMENTS_TTL_S
+    loader.fingerprint()
+    assert (listed, which) == (1, ["sometool", "sometool"])  # TTL elapsed: re-check only
+
+    skill_file.write_text(skill_file.read_text(encoding="utf-8").replace("sometool", "othertool"), encoding="utf-8")
+    loader.fingerprint()
+    assert listed == 2 and which[-1] == "othertool"
@@ -0,0 +1,56 @@
+"""Tests for the shared provider HTTP pool."""
+
+from __future__ import annotations
+
+import pytest
+
+from nanobot.providers import http as http_pool
+
+
+@pytest.mark.asyncio
+async def test_client_is_shared_and_configurable() -> None:
+    http_pool.configure(max_connections=5, max_keepalive_connections=2, keepalive_expiry=10.0)
+    try:
+        client = http_pool.get_client()
+        assert http_pool.get_client() is client
+        assert http_pool.get_client(verify=False) is not client
+        assert client._transport._pool._max_connections == 5
+    finally:
+        await http_pool.aclose()
+        http_pool.configure()
+    assert client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_request_timing_breakdown() -> None:
+    timing = http_pool.RequestTiming()
+    trace = timing.extensions["trace"]
+    await trace("connection.connect_tcp.started", {})
+    await trace("connection.connect_tcp.complete", {})
+    await trace("http11.send_request_headers.started", {})
+    await trace("http11.receive_response_headers.complete", {})
+    timing.finish("test")
+    assert 0 <= timing.connect_ms <= timing.total_ms
+    assert 0 <= timing.ttfb_ms <= timing.total_ms
+
+
+def test_clients_of_finished_event_loops_are_closed() -> None:
+    import asyncio
+
+    async def _get():
+        return http_pool.get_client()
+
+    async def _get_then_settle():
+        client = http_pool.get_client()
+        await asyncio.sleep(0)  # Let the discarded client's close run
+        await asyncio.sleep(0)
+        return client
+
+    first = asyncio.run(_get())
+    try:
+        second = asyncio.run(_get_then_settle())
+        assert second is not first and not second.is_closed
+        assert first.is_closed
+        assert list(http_pool._clients.values()) == [second]
+    finally:
+        http_pool._clients.clear()
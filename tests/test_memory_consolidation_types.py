@@ -145,3 +145,68 @@ class TestMemoryConsolidationTypeHandling:
 
         assert result is True
         provider.chat.assert_not_called()
+
+
+class TestMemoryPatchMode:
+    """Patch-style save_memory: section edits applied locally."""
+
+    _MEMORY = (
+        "# Long-term Memory\n\nIntro.\n\n"
+        "## Preferences\n\n- Likes tea\n\n"
+        "## Projects\n\n- Billing rewrite\n\n"
+        "---\n\n*Footer*\n"
+    )
+
+    def test_apply_patch_ops(self) -> None:
+        from nanobot.agent.memory import apply_memory_patch
+
+        out = apply_memory_patch(self._MEMORY, [
+            {"op": "add", "section": "Preferences", "content": "- Dislikes coffee"},
+            {"op": "replace", "section": "## projects", "content": "- Billing rewrite shipped"},
+            {"op": "add", "section": "People", "content": "- Alice leads billing"},
+            {"op": "delete", "section": "Missing"},
+            {"op": "bogus", "section": "Preferences"},
+            "not-an-op",
+        ])
+        assert "- Likes tea\n- Dislikes coffee" in out
+        assert "- Billing rewrite shipped" in out and "- Billing rewrite\n" not in out
+        assert out.index("## People") < out.index("---")
+        assert out.startswith("# Long-term Memory\n\nIntro.")
+        assert out.endswith("*Footer*\n")
+
+        assert "## Projects" not in apply_memory_patch(out, [{"op": "delete", "section": "Projects"}])
+
+    @pytest.mark.asyncio
+    async def test_patch_mode_applies_ops(self, tmp_path: Path) -> None:
+        store = MemoryStore(tmp_path)
+        store.write_long_term(self._MEMORY)
+        provider = AsyncMock()
+        provider.chat = AsyncMock(return_value=LLMResponse(
+            content=None,
+            tool_calls=[ToolCallRequest(id="c", name="save_memory", arguments={
+                "history_entry": "[2026-01-01 10:00] Talked about drinks.",
+                "memory_patch": json.dumps([{"op": "add", "section": "Preferences", "content": "- Green tea"}]),
+            })],
+        ))
+
+        assert await store.consolidate(_make_session(60), provider, "m", memory_window=50)
+        assert "- Likes tea\n- Green tea" in store.read_long_term()
+        tool = provider.chat.call_args.kwargs["tools"][0]["function"]["parameters"]
+        assert "memory_patch" in tool["properties"]
+
+    @pytest.mark.asyncio
+    async def test_patch_mode_falls_back_to_full_rewrite(self, tmp_path: Path) -> None:
+        store = MemoryStore(tmp_path)
+        provider = AsyncMock()
+        provider.chat = AsyncMock(side_effect=[
+            LLMResponse(content=None, tool_calls=[ToolCallRequest(
+                id="c", name="save_memory", arguments={"history_entry": "[2026-01-01] x", "memory_patch": "garbage"},
+            )]),
+            _make_tool_response("[2026-01-01] x", "# Memory\nRewritten."),
+        ])
+
+        assert await store.consolidate(_make_session(60), provider, "m", memory_window=50)
+        assert store.read_long_term() == "# Memory\nRewritten."
+        assert store.history_file.read_text().count("[2026-01-01] x") == 1
+        second = provider.chat.call_args_list[1].kwargs["tools"][0]["function"]["parameters"]
+        assert "memory_update" in second["properties"]
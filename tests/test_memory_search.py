@@ -0,0 +1,58 @@
+"""Tests for the HISTORY.md search index and memory_search tool."""
+
+from __future__ import annotations
+
+import pytest
+
+from nanobot.agent.memory import MemoryStore
+from nanobot.agent.memory_index import HistoryIndex, tokenize
+from nanobot.agent.tools.memory import MemorySearchTool
+
+
+def _store(tmp_path) -> MemoryStore:
+    store = MemoryStore(tmp_path)
+    store.append_history("[2026-01-05 09:00] Discussed the database migration plan with Alice.")
+    store.append_history("[2026-02-10 14:30] User asked about the deploy pipeline and CI cache.")
+    store.append_history("[2026-03-01 08:15] Alice confirmed the migration is finished; database is live.")
+    return store
+
+
+def test_tokenize_splits_cjk_into_bigrams() -> None:
+    assert tokenize("Deploy 数据库迁移") == ["deploy", "数据", "据库", "库迁", "迁移"]
+
+
+def test_search_ranks_and_filters_by_date(tmp_path) -> None:
+    store = _store(tmp_path)
+    results = store.search_history("database migration")
+    # Both match; the shorter entry ranks first under BM25 length normalization
+    assert [r["ts"] for r in results] == ["2026-01-05 09:00", "2026-03-01 08:15"]
+    assert results[0]["score"] > results[1]["score"]
+
+    assert [r["ts"] for r in store.search_history("migration", since="2026-02-01")] == ["2026-03-01 08:15"]
+    assert [r["ts"] for r in store.search_history("migration", until="2026-01-05")] == ["2026-01-05 09:00"]
+    assert store.search_history("kubernetes") == []
+
+
+def test_index_is_incremental_and_detects_rewrites(tmp_path) -> None:
+    store = _store(tmp_path)
+    index = HistoryIndex(store.history_file)
+    assert index.sync() == 3
+    assert index.sync() == 0
+
+    store.append_history("[2026-03-02 10:00] Planned the kubernetes rollout.")
+    with open(store.history_file, "a", encoding="utf-8") as f:
+        f.write("[2026-03-03 10:00] Half-written entry")  # No terminating blank line yet
+    assert index.sync() == 1
+    assert index.search("kubernetes")[0]["ts"] == "2026-03-02 10:00"
+
+    store.history_file.write_text("[2026-04-01 00:00] Fresh log about kubernetes.\n\n", encoding="utf-8")
+    assert [r["ts"] for r in index.search("kubernetes")] == ["2026-04-01 00:00"]
+
+
+@pytest.mark.asyncio
+async def test_memory_search_tool_formats_entries(tmp_path) -> None:
+    tool = MemorySearchTool(_store(tmp_path))
+    assert tool.read_only
+    out = await tool.execute(query="deploy pipeline", limit=1)
+    assert out.startswith("[2026-02-10 14:30]")
+    assert "No history entries" in await tool.execute(query="nothing-here")
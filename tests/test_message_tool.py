@@ -1,3 +1,5 @@
+import asyncio
+
 import pytest
 
 from nanobot.agent.tools.message import MessageTool
@@ -8,3 +10,27 @@ async def test_message_tool_returns_error_when_no_target_context() -> None:
     tool = MessageTool()
     result = await tool.execute(content="test")
     assert result == "Error: No target channel/chat specified"
+
+
+@pytest.mark.asyncio
+async def test_message_tool_context_is_isolated_per_task() -> None:
+    sent = []
+
+    async def _send(msg):
+        sent.append((msg.channel, msg.chat_id))
+
+    tool = MessageTool(send_callback=_send)
+
+    async def _turn(chat_id: str) -> bool:
+        tool.set_context("test", chat_id)
+        tool.start_turn()
+        await asyncio.sleep(0)
+        await tool.execute(content="hi")
+        return tool._sent_in_turn
+
+    results = await asyncio.gather(
+        asyncio.create_task(_turn("a")), asyncio.create_task(_turn("b")),
+    )
+    assert results == [True, True]
+    assert sorted(sent) == [("test", "a"), ("test", "b")]
+    assert tool._sent_in_turn is False
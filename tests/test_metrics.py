@@ -0,0 +1,129 @@
+"""Tests for runtime metrics and the scrape endpoint."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.utils import metrics
+from nanobot.utils.metrics import MetricsServer, Registry
+
+
+def test_counter_and_gauge_render() -> None:
+    reg = Registry()
+    sent = reg.counter("test_sent_total", "Sent.", ("channel",))
+    depth = reg.gauge("test_depth", "Depth.", ("queue",))
+    sent.inc(channel="telegram")
+    sent.inc(2, channel='we"ird')
+    depth.set_function(lambda: {("inbound",): 3})
+
+    text = reg.render()
+    assert "# TYPE test_sent_total counter" in text
+    assert 'test_sent_total{channel="telegram"} 1' in text
+    assert 'test_sent_total{channel="we\\"ird"} 2' in text
+    assert 'test_depth{queue="inbound"} 3' in text
+    with pytest.raises(ValueError):
+        sent.inc(model="x")
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    reg = Registry()
+    h = reg.histogram("test_seconds", "Latency.", ("model",), buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 0.7, 5.0):
+        h.observe(v, model="m")
+
+    text = reg.render()
+    assert 'test_seconds_bucket{model="m",le="0.1"} 1' in text
+    assert 'test_seconds_bucket{model="m",le="1"} 3' in text
+    assert 'test_seconds_bucket{model="m",le="+Inf"} 4' in text
+    assert 'test_seconds_sum{model="m"} 6.25' in text
+    assert 'test_seconds_count{model="m"} 4' in text
+    assert h.count(model="m") == 4
+
+
+class _FailingTool(Tool):
+    name = "fails"
+    description = "Always fails."
+    parameters = {"type": "object", "properties": {}}
+
+    async def execute(self, **kwargs) -> str:
+        raise RuntimeError("nope")
+
+
+@pytest.mark.asyncio
+async def test_tool_latency_and_errors_are_counted() -> None:
+    tools = ToolRegistry()
+    tools.register(_FailingTool())
+    calls = metrics.TOOL_LATENCY.count(tool="fails")
+    errors = metrics.TOOL_ERRORS.get(tool="fails")
+
+    await tools.execute("fails", {})
+
+    assert metrics.TOOL_LATENCY.count(tool="fails") == calls + 1
+    assert metrics.TOOL_ERRORS.get(tool="fails") == errors + 1
+
+
+@pytest.mark.asyncio
+async def test_server_serves_metrics() -> None:
+    reg = Registry()
+    reg.counter("test_up_total", "Up.").inc()
+    server = MetricsServer("127.0.0.1", 0, registry=reg)
+    await server.start()
+    try:
+        async def _get(path: str) -> bytes:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            await writer.drain()
+            data = await reader.read()
+            writer.close()
+            return data
+
+        ok = await _get("/metrics")
+        missing = await _get("/other")
+    finally:
+        await server.stop()
+
+    assert ok.startswith(b"HTTP/1.1 200 OK")
+    assert b"text/plain; version=0.0.4" in ok
+    assert ok.endswith(b"test_up_total 1\n")
+    assert missing.startswith(b"HTTP/1.1 404")
+
+
+@pytest.mark.asyncio
+async def test_llm_metrics_are_labelled_with_the_serving_model(tmp_path) -> None:
+    from nanobot.agent.loop import AgentLoop
+    from nanobot.bus.queue import MessageBus
+    from nanobot.providers.base import LLMProvider, LLMResponse, ProviderHTTPError
+    from nanobot.providers.pool import FallbackProvider, KeyPool, PooledKey
+
+    class _Provider(LLMProvider):
+        def __init__(self, status: int):
+            super().__init__()
+            self.status = status
+
+        async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+            if self.status != 200:
+                return LLMResponse(content="Error: overloaded", finish_reason="error",
+                                   error=ProviderHTTPError("overloaded", self.status))
+            return LLMResponse(content="ok", usage={"prompt_tokens": 7, "completion_tokens": 3})
+
+        def get_default_model(self) -> str:
+            return "primary"
+
+    provider = FallbackProvider([
+        ("primary", KeyPool([PooledKey("a", _Provider(503))])),
+        ("backup", KeyPool([PooledKey("b", _Provider(200))])),
+    ])
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path, model="primary")
+    served = metrics.LLM_LATENCY.count(model="backup")
+    tokens = metrics.LLM_TOKENS.get(model="backup", type="prompt")
+    primary = metrics.LLM_LATENCY.count(model="primary")
+
+    assert await loop.process_direct("hi", session_key="cli:m") == "ok"
+
+    assert metrics.LLM_LATENCY.count(model="backup") == served + 1
+    assert metrics.LLM_TOKENS.get(model="backup", type="prompt") == tokens + 7
+    assert metrics.LLM_LATENCY.count(model="primary") == primary
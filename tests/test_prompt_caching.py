@@ -0,0 +1,65 @@
+"""Tests for prompt-cache breakpoints and cache usage reporting in LiteLLMProvider."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from nanobot.providers.litellm_provider import LiteLLMProvider
+
+
+def _marked(messages: list[dict]) -> list[int]:
+    return [
+        i for i, m in enumerate(messages)
+        if isinstance(m.get("content"), list) and "cache_control" in m["content"][-1]
+    ]
+
+
+def _tool_loop_messages() -> list[dict]:
+    return [
+        {"role": "system", "content": "sys"},
+        {"role": "user", "content": "old question"},
+        {"role": "assistant", "content": "old answer"},
+        {"role": "user", "content": "do it"},
+        {"role": "assistant", "content": None, "tool_calls": [{"id": "c1"}]},
+        {"role": "tool", "tool_call_id": "c1", "name": "exec", "content": "out 1"},
+        {"role": "assistant", "content": None, "tool_calls": [{"id": "c2"}]},
+        {"role": "tool", "tool_call_id": "c2", "name": "exec", "content": "out 2"},
+    ]
+
+
+def test_breakpoints_roll_over_history() -> None:
+    provider = LiteLLMProvider(default_model="anthropic/claude-sonnet-4-5")
+    messages = _tool_loop_messages()
+    tools = [{"type": "function", "function": {"name": "a"}}, {"type": "function", "function": {"name": "b"}}]
+
+    new_messages, new_tools = provider._apply_cache_control(messages, tools)
+
+    # System, the previous call's last message (tool result 1) and the current last message
+    assert _marked(new_messages) == [0, 5, 7]
+    assert "cache_control" in new_tools[-1] and "cache_control" not in new_tools[0]
+    assert messages == _tool_loop_messages()  # Inputs are not mutated
+
+
+def test_breakpoints_skip_empty_messages_and_respect_limit() -> None:
+    provider = LiteLLMProvider(default_model="anthropic/claude-sonnet-4-5")
+    messages = [
+        {"role": "system", "content": "sys"},
+        {"role": "user", "content": "q"},
+        {"role": "assistant", "content": None, "tool_calls": [{"id": "c1"}]},
+        {"role": "tool", "tool_call_id": "c1", "name": "exec", "content": [{"type": "text", "text": "r"}]},
+    ]
+    new_messages, _ = provider._apply_cache_control(messages, [{"type": "function"}])
+    assert _marked(new_messages) == [0, 1, 3]
+
+    many_systems = [{"role": "system", "content": str(i)} for i in range(3)] + messages[1:]
+    new_messages, _ = provider._apply_cache_control(many_systems, [{"type": "function"}])
+    assert len(_marked(new_messages)) + 1 <= LiteLLMProvider._MAX_CACHE_BREAKPOINTS
+
+
+def test_cache_usage_is_reported() -> None:
+    anthropic = SimpleNamespace(cache_read_input_tokens=900, cache_creation_input_tokens=100)
+    assert LiteLLMProvider._cache_usage(anthropic) == {"cache_read_tokens": 900, "cache_write_tokens": 100}
+
+    openai = SimpleNamespace(prompt_tokens_details=SimpleNamespace(cached_tokens=512))
+    assert LiteLLMProvider._cache_usage(openai) == {"cache_read_tokens": 512}
+    assert LiteLLMProvider._cache_usage(SimpleNamespace()) == {}
@@ -0,0 +1,176 @@
+"""Tests for API key pools and model fallback chains."""
+
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from nanobot.providers.base import LLMProvider, LLMResponse, ProviderHTTPError
+from nanobot.providers.pool import FallbackProvider, KeyPool, PooledKey, TokenBucket, load_ledger
+
+
+class _ScriptedProvider(LLMProvider):
+    """Answers with the given status codes in turn (200 = success)."""
+
+    def __init__(self, statuses: list[int] | None = None):
+        super().__init__()
+        self.statuses = list(statuses or [])
+        self.models: list[str] = []
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+        self.models.append(model)
+        status = self.statuses.pop(0) if self.statuses else 200
+        if status == 200:
+            return LLMResponse(content="ok", usage={"prompt_tokens": 10, "completion_tokens": 5})
+        headers = {"retry-after": "5"} if status == 429 else {}
+        return LLMResponse(content=f"Error: {status}", finish_reason="error",
+                           error=ProviderHTTPError(str(status), status, headers))
+
+    def get_default_model(self) -> str:
+        return "m"
+
+
+def _msgs() -> list[dict]:
+    return [{"role": "user", "content": "hi"}]
+
+
+def test_weighted_round_robin_spreads_by_weight() -> None:
+    pool = KeyPool([PooledKey("a", _ScriptedProvider(), weight=3), PooledKey("b", _ScriptedProvider(), weight=1)])
+    picks = [pool.pick(10).label for _ in range(8)]
+    assert Counter(picks) == {"a": 6, "b": 2}
+    assert picks[:4] != ["a", "a", "a", "b"]  # Smooth: b is interleaved, not starved
+
+
+def test_token_bucket_limits_rate() -> None:
+    bucket = TokenBucket(per_minute=2)
+    assert bucket.wait_time(1) == 0
+    bucket.consume(1)
+    bucket.consume(1)
+    assert 0 < bucket.wait_time(1) <= 30
+    assert TokenBucket(0).wait_time(10**9) == 0
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_key_cools_down_and_next_key_is_used(tmp_path: Path) -> None:
+    a, b = _ScriptedProvider([429]), _ScriptedProvider()
+    pool = KeyPool([PooledKey("a", a), PooledKey("b", b)])
+    provider = FallbackProvider([("m", pool)], ledger_path=tmp_path / "ledger.json")
+
+    response = await provider.chat(_msgs())
+    assert response.content == "ok"
+    assert pool.keys[0].wait_time(0) > 0
+    # While "a" cools down, every call goes to "b"
+    await provider.chat(_msgs())
+    assert len(a.models) == 1 and len(b.models) == 2
+
+    provider.save_ledger()
+    ledger = load_ledger(tmp_path / "ledger.json")
+    assert ledger["a"]["rate_limited"] == 1
+    assert ledger["b"]["requests"] == 2 and ledger["b"]["prompt_tokens"] == 20
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_next_model_on_outage_but_not_on_fatal_error() -> None:
+    primary, backup = _ScriptedProvider([503, 400]), _ScriptedProvider()
+    provider = FallbackProvider([
+        ("big", KeyPool([PooledKey("p", primary)])),
+        ("small", KeyPool([PooledKey("s", backup)])),
+    ])
+
+    assert (await provider.chat(_msgs())).content == "ok"
+    assert primary.models == ["big"] and backup.models == ["small"]
+
+    response = await provider.chat(_msgs())
+    assert response.finish_reason == "error" and backup.models == ["small"]
+
+
+@pytest.mark.asyncio
+async def test_all_keys_rate_limited_reports_retryable_error() -> None:
+    provider = FallbackProvider([("m", KeyPool([PooledKey("a", _ScriptedProvider([429]))]))])
+    response = await provider.chat(_msgs())
+    assert response.finish_reason == "error"
+    assert response.error.status_code == 429
+
+    response = await provider.chat(_msgs())  # Key still cooling down: nothing is sent
+    assert "rate-limited" in response.content and response.error.status_code == 429
+
+
+def test_make_provider_builds_pool_from_config() -> None:
+    from nanobot.cli.commands import _make_pooled_provider
+    from nanobot.config.schema import Config
+
+    config = Config.model_validate({
+        "agents": {"defaults": {"model": "deepseek-chat", "fallbackModels": ["gpt-4o-mini"]}},
+        "providers": {
+            "deepseek": {"apiKey": "sk-aaaa1111", "rpm": 60, "keys": [{"apiKey": "sk-bbbb2222", "weight": 2}]},
+            "openai": {"apiKey": "sk-cccc3333"},
+        },
+    })
+    provider = _make_pooled_provider(config)
+    assert isinstance(provider, FallbackProvider)
+    assert [m for m, _ in provider.chain] == ["deepseek-chat", "gpt-4o-mini"]
+    keys = provider.chain[0][1].keys
+    assert [(k.label, k.weight, k.rpm) for k in keys] == [("deepseek:...1111", 1, 60), ("deepseek:...2222", 2, 0)]
+    assert keys[1].provider.api_key == "sk-bbbb2222"
+
+
+@pytest.mark.asyncio
+async def test_model_outside_chain_bypasses_pool() -> None:
+    primary, foreign = _ScriptedProvider([503]), _ScriptedProvider()
+    built: list[str] = []
+
+    def _provider_for(model: str) -> LLMProvider:
+        built.append(model)
+        return foreign
+
+    provider = FallbackProvider(
+        [("m", KeyPool([PooledKey("a", primary)])), ("fb", KeyPool([PooledKey("b", _ScriptedProvider())]))],
+        provider_for=_provider_for,
+    )
+
+    assert (await provider.chat(_msgs(), model="other")).content == "ok"
+    assert (await provider.chat(_msgs(), model="other")).content == "ok"
+    assert foreign.models == ["other", "other"] and built == ["other"]  # Built once, then reused
+    assert primary.models == [] and provider.ledger() == {}
+
+
+def test_gateway_fallback_does_not_set_global_api_base(monkeypatch: pytest.MonkeyPatch) -> None:
+    import litellm
+
+    from nanobot.cli.commands import _make_pooled_provider
+    from nanobot.config.schema import Config
+
+    monkeypatch.setattr(litellm, "api_base", None)
+    config = Config.model_validate({
+        "agents": {"defaults": {"model": "anthropic/claude-sonnet-4-5",
+                                "fallbackModels": ["openrouter/meta-llama/llama-3.1-70b-instruct"]}},
+        "providers": {"anthropic": {"apiKey": "sk-ant-1111"}, "openrouter": {"apiKey": "sk-or-2222"}},
+    })
+    provider = _make_pooled_provider(config)
+
+    (_, native), (_, gateway) = provider.chain
+    assert gateway.keys[0].provider.api_base == "https://openrouter.ai/api/v1"
+    assert litellm.api_base is None
+    kwargs = native.keys[0].provider._build_kwargs(_msgs(), None, None, 100, 0.1)
+    assert "api_base" not in kwargs  # The primary still goes straight to Anthropic
+
+
+@pytest.mark.asyncio
+async def test_unsaved_usage_is_flushed_on_shutdown(tmp_path: Path) -> None:
+    from nanobot.cli.commands import _flush_key_usage
+    from nanobot.providers.retry import RetryingProvider
+
+    path = tmp_path / "ledger.json"
+    pool = FallbackProvider([("m", KeyPool([PooledKey("a", _ScriptedProvider())]))], ledger_path=path)
+    await pool.chat(_msgs())  # First call saves at once
+    await pool.chat(_msgs())  # Within the save interval: only in memory
+    assert load_ledger(path)["a"]["requests"] == 1
+
+    _flush_key_usage(RetryingProvider(pool))
+    assert load_ledger(path)["a"]["requests"] == 2
+
+    path.unlink()
+    _flush_key_usage(RetryingProvider(pool))  # Nothing new: no write
+    assert not path.exists()
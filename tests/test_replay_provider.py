@@ -0,0 +1,67 @@
+"""Tests for recording and replaying LLM exchanges."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from nanobot.providers.base import LLMProvider, LLMResponse
+from nanobot.providers.replay import Latency, RecordingProvider, ReplayProvider
+
+
+class _EchoProvider(LLMProvider):
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+        return LLMResponse(content=f"echo: {messages[-1]['content']}", usage={"prompt_tokens": 3})
+
+    def get_default_model(self) -> str:
+        return "echo-model"
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay_round_trip(tmp_path: Path) -> None:
+    path = tmp_path / "exchanges.jsonl"
+    recorder = RecordingProvider(_EchoProvider(), path)
+    for text in ("one", "two"):
+        await recorder.chat([{"role": "user", "content": text}], temperature=0)
+
+    replay = ReplayProvider.from_jsonl(path, strict=True)
+    response = await replay.chat([{"role": "user", "content": "two"}], model="echo-model", temperature=0)
+    assert response.content == "echo: two" and response.usage == {"prompt_tokens": 3}
+
+    missing = await replay.chat([{"role": "user", "content": "three"}], model="echo-model", temperature=0)
+    assert missing.finish_reason == "error"
+
+    loose = ReplayProvider.from_jsonl(path)
+    assert (await loose.chat([{"role": "user", "content": "three"}])).content == "echo: one"
+
+
+@pytest.mark.asyncio
+async def test_scripted_tool_calls_drive_agent_loop(tmp_path: Path) -> None:
+    from nanobot.agent.loop import AgentLoop
+    from nanobot.bus.queue import MessageBus
+
+    (tmp_path / "notes.txt").write_text("hello from disk", encoding="utf-8")
+    provider = ReplayProvider.scripted(
+        tool_calls=[("read_file", {"path": str(tmp_path / "notes.txt")}), ("list_dir", {"path": str(tmp_path)})],
+        final="All done.",
+    )
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path, model="replay")
+
+    assert await loop.process_direct("first", session_key="cli:a") == "All done."
+    assert await loop.process_direct("second", session_key="cli:a") == "All done."
+    assert provider.calls == 6
+
+    tool_results = [m for m in loop.sessions.get_or_create("cli:a").messages if m["role"] == "tool"]
+    assert "hello from disk" in tool_results[0]["content"]
+    assert len({m["tool_call_id"] for m in tool_results}) == 4  # ids unique across turns
+
+
+def test_latency_distributions() -> None:
+    assert Latency("0.25").sample() == 0.25
+    assert Latency("recorded").sample(1.5) == 1.5
+    samples = [Latency("uniform:0.1,0.2", seed=1).sample() for _ in range(20)]
+    assert all(0.1 <= s <= 0.2 for s in samples)
+    assert Latency("lognormal:-2,0.5", seed=7).sample() == Latency("lognormal:-2,0.5", seed=7).sample()
+    with pytest.raises(ValueError):
+        Latency("pareto:1")
@@ -0,0 +1,87 @@
+"""Tests for the on-disk LLM response cache."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+from nanobot.providers.cache import CachingProvider, ResponseCache, cache_key, cacheable
+
+
+class _CountingProvider(LLMProvider):
+    def __init__(self, fail: bool = False):
+        super().__init__()
+        self.calls = 0
+        self.fail = fail
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+        self.calls += 1
+        if self.fail:
+            return LLMResponse(content="Error: boom", finish_reason="error")
+        return LLMResponse(
+            content=f"answer {self.calls}",
+            tool_calls=[ToolCallRequest(id="c1", name="heartbeat", arguments={"action": "skip"})],
+            usage={"prompt_tokens": 100, "completion_tokens": 10},
+        )
+
+    def get_default_model(self) -> str:
+        return "m"
+
+
+def _msgs(text: str = "hi") -> list[dict]:
+    return [{"role": "user", "content": text}]
+
+
+def test_cache_key_is_canonical() -> None:
+    a = cache_key("m", [{"role": "user", "content": "x"}], None, 0, 100)
+    b = cache_key("m", [{"content": "x", "role": "user"}], [], 0, 100)
+    assert a == b
+    assert a != cache_key("m", [{"role": "user", "content": "x"}], None, 0.5, 100)
+
+
+@pytest.mark.asyncio
+async def test_only_deterministic_or_marked_calls_are_cached(tmp_path: Path) -> None:
+    inner = _CountingProvider()
+    provider = CachingProvider(inner, ResponseCache(tmp_path / "cache.db"))
+
+    await provider.chat(_msgs(), temperature=0.7)
+    await provider.chat(_msgs(), temperature=0.7)
+    assert inner.calls == 2
+
+    first = await provider.chat(_msgs(), temperature=0)
+    second = await provider.chat(_msgs(), temperature=0)
+    assert inner.calls == 3
+    assert second.content == first.content and second.tool_calls[0].arguments == {"action": "skip"}
+    assert second.usage == {"response_cache_hits": 1}
+
+    with cacheable():
+        await provider.chat(_msgs("beat"))
+        await provider.chat(_msgs("beat"))
+    assert inner.calls == 4
+    assert provider.cache.stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_are_not_cached(tmp_path: Path) -> None:
+    inner = _CountingProvider(fail=True)
+    provider = CachingProvider(inner, ResponseCache(tmp_path / "cache.db"))
+    await provider.chat(_msgs(), temperature=0)
+    await provider.chat(_msgs(), temperature=0)
+    assert inner.calls == 2
+
+
+def test_ttl_and_lru_eviction(tmp_path: Path) -> None:
+    cache = ResponseCache(tmp_path / "cache.db", ttl_s=60, max_bytes=800)
+    response = LLMResponse(content="x" * 150)
+    for key in ("a", "b", "c"):
+        cache.put(key, response)
+    assert cache.get("a") is not None  # "a" is now the most recently used
+    cache.put("d", response)
+    assert cache.get("b") is None and cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+    cache._conn.execute("UPDATE responses SET created_at = created_at - 120 WHERE key = 'a'")
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 2
@@ -0,0 +1,92 @@
+"""Tests for the tool result store and read_result tool."""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+import pytest
+
+from nanobot.agent.results import ResultStore
+from nanobot.agent.tools.results import ReadResultTool
+
+
+def _handle(text: str) -> str:
+    return re.search(r'handle "(r-[0-9a-f]{16})"', text).group(1)
+
+
+def test_preview_spills_large_results_once(tmp_path: Path) -> None:
+    store = ResultStore(tmp_path, inline_chars=100)
+    assert store.preview("small") == "small"
+
+    big = "".join(f"line{i}\n" for i in range(200))
+    preview = store.preview(big)
+    assert preview.startswith(big[:50]) and preview.endswith(big[-25:])
+    assert len(preview) < 250
+    handle = _handle(preview)
+    assert store.put(big) == handle
+    assert len(list(store.root.rglob("*.txt"))) == 1
+    assert store.read(handle) == (big, len(big))
+    assert store.read("r-0000000000000000") is None
+    assert store.read("../../etc/passwd") is None
+
+
+def test_stub_reuses_preview_handle(tmp_path: Path) -> None:
+    store = ResultStore(tmp_path, inline_chars=100)
+    preview = store.preview("x" * 1000)
+    stub = store.stub(preview, 20)
+    assert stub.startswith("x" * 20) and _handle(stub) == _handle(preview)
+
+    stub = store.stub("y" * 30, 20)
+    assert store.read(_handle(stub))[0] == "y" * 30
+
+
+@pytest.mark.asyncio
+async def test_read_result_pages_through_stored_text(tmp_path: Path) -> None:
+    store = ResultStore(tmp_path, inline_chars=10)
+    handle = store.put("0123456789abcdefghij")
+    tool = ReadResultTool(store)
+
+    first = await tool.execute(handle=handle)
+    assert first == "[chars 0-10 of 20; continue with offset=10]\n0123456789"
+    assert (await tool.execute(handle=handle, offset=10, length=50)).endswith("\nabcdefghij")
+    assert (await tool.execute(handle="r-ffffffffffffffff")).startswith("Error")
+
+
+def test_saved_turn_keeps_handle_to_full_tool_output(tmp_path: Path) -> None:
+    from unittest.mock import MagicMock
+
+    from nanobot.agent.loop import AgentLoop
+    from nanobot.bus.queue import MessageBus
+    from nanobot.session.manager import Session
+
+    provider = MagicMock()
+    provider.get_default_model.return_value = "test-model"
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path)
+    session = Session(key="cli:t")
+    output = "z" * 3000
+    loop._save_turn(session, [{"role": "tool", "tool_call_id": "c", "name": "exec", "content": output}], 0)
+
+    saved = session.messages[0]["content"]
+    assert len(saved) < 700
+    assert loop.results.read(_handle(saved))[0] == output
+
+
+def test_store_evicts_least_recently_used_past_max_bytes(tmp_path: Path) -> None:
+    import os
+
+    store = ResultStore(tmp_path, max_bytes=2500)
+    a, b = store.put("a" * 1000), store.put("b" * 1000)
+    os.utime(store._path(a), (1, 1))
+    c = store.put("c" * 1000)  # 3000 bytes: the oldest, a, is evicted
+    assert store.read(a) is None
+    assert store.read(b) is not None and store.read(c) is not None
+
+    # Reading refreshes recency, so the older but recently read b survives
+    os.utime(store._path(b), (1, 1))
+    os.utime(store._path(c), (2, 2))
+    store.read(b)
+    d = store.put("d" * 1000)
+    assert store.read(c) is None
+    assert store.read(b) is not None and store.read(d) is not None
+    assert sum(p.stat().st_size for p in store.root.rglob("*.txt")) <= 2500
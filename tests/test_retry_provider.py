@@ -0,0 +1,210 @@
+"""Tests for retries, backoff and circuit breaking around LLM providers."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from nanobot.providers.base import LLMProvider, LLMResponse, ProviderHTTPError
+from nanobot.providers.custom_provider import CustomProvider
+from nanobot.providers.retry import RetryingProvider, is_retryable, load_breaker_state, retry_after
+
+_COMPLETION = {
+    "id": "x", "object": "chat.completion", "created": 0, "model": "m",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "ok"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+}
+
+
+class _FakeServer:
+    """Local OpenAI-compatible server that answers with a scripted list of status codes."""
+
+    def __init__(self, statuses: list[int]):
+        self.statuses = list(statuses)
+        self.requests = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                fake.requests += 1
+                status = fake.statuses.pop(0) if fake.statuses else 200
+                body = json.dumps(_COMPLETION if status == 200 else {"error": {"message": f"status {status}"}})
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                if status == 429:
+                    self.send_header("Retry-After", "0")
+                self.end_headers()
+                self.wfile.write(body.encode())
+
+            def log_message(self, *args) -> None:
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+
+    def close(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def no_sleep():
+    delays: list[float] = []
+
+    async def sleep(d: float) -> None:
+        delays.append(d)
+
+    sleep.delays = delays
+    return sleep
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_is_retried_honouring_retry_after(no_sleep) -> None:
+    server = _FakeServer([429, 503])
+    try:
+        provider = RetryingProvider(CustomProvider(api_base=server.url, default_model="m"), sleep=no_sleep)
+        response = await provider.chat([{"role": "user", "content": "hi"}])
+    finally:
+        server.close()
+    assert response.content == "ok"
+    assert server.requests == 3
+    assert no_sleep.delays[0] == 0.0  # Retry-After: 0
+    assert provider.breaker("m").state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_fatal_errors_are_not_retried(no_sleep) -> None:
+    server = _FakeServer([401])
+    try:
+        provider = RetryingProvider(CustomProvider(api_base=server.url, default_model="m"), sleep=no_sleep)
+        response = await provider.chat([{"role": "user", "content": "hi"}])
+    finally:
+        server.close()
+    assert response.finish_reason == "error"
+    assert server.requests == 1 and not no_sleep.delays
+    assert provider.breaker("m").failures == 0
+
+
+class _FailingProvider(LLMProvider):
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+        self.calls += 1
+        return LLMResponse(content="Error: overloaded", finish_reason="error",
+                           error=ProviderHTTPError("overloaded", 529))
+
+    def get_default_model(self) -> str:
+        return "m"
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_fails_fast_and_is_persisted(tmp_path: Path, no_sleep) -> None:
+    inner = _FailingProvider()
+    state = tmp_path / "circuit_breakers.json"
+    provider = RetryingProvider(inner, max_retries=10, failure_threshold=3, reset_timeout=60,
+                                state_path=state, sleep=no_sleep)
+
+    await provider.chat([{"role": "user", "content": "hi"}])
+    assert inner.calls == 3
+    assert load_breaker_state(state)["m"]["state"] == "open"
+
+    response = await provider.chat([{"role": "user", "content": "hi"}])
+    assert inner.calls == 3
+    assert "circuit open" in response.content
+
+    provider.breaker("m").opened_at -= 61
+    assert provider.breaker("m").state == "half_open"
+    await provider.chat([{"role": "user", "content": "hi"}])
+    assert inner.calls == 4  # one trial call, which reopens the circuit
+    assert provider.breaker("m").state == "open"
+
+
+@pytest.mark.asyncio
+async def test_half_open_admits_one_concurrent_trial_call(no_sleep) -> None:
+    class SlowProvider(_FailingProvider):
+        def __init__(self) -> None:
+            super().__init__()
+            self.release = asyncio.Event()
+            self.fail = True
+
+        async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+            if self.fail:
+                return await super().chat(messages)
+            self.calls += 1
+            await self.release.wait()
+            return LLMResponse(content="ok")
+
+    inner = SlowProvider()
+    provider = RetryingProvider(inner, max_retries=0, failure_threshold=1, reset_timeout=60, sleep=no_sleep)
+    await provider.chat([{"role": "user", "content": "hi"}])
+    provider.breaker("m").opened_at -= 61
+    inner.fail = False
+
+    calls = [asyncio.create_task(provider.chat([{"role": "user", "content": "hi"}])) for _ in range(5)]
+    await asyncio.sleep(0)
+    inner.release.set()
+    responses = await asyncio.gather(*calls)
+
+    assert inner.calls == 2  # The opening failure and a single trial call
+    assert [r.content for r in responses].count("ok") == 1
+    assert all("trial call is in progress" in r.content for r in responses if r.content != "ok")
+    assert provider.breaker("m").state == "closed"
+    assert (await provider.chat([{"role": "user", "content": "hi"}])).content == "ok"
+
+
+@pytest.mark.asyncio
+async def test_fatal_trial_call_lets_next_caller_probe(no_sleep) -> None:
+    class FatalProvider(_FailingProvider):
+        async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+            self.calls += 1
+            return LLMResponse(content="Error: bad request", finish_reason="error",
+                               error=ProviderHTTPError("bad request", 400))
+
+    provider = RetryingProvider(FatalProvider(), max_retries=0, failure_threshold=1, reset_timeout=60,
+                                sleep=no_sleep)
+    breaker = provider.breaker("m")
+    breaker.record_failure("overloaded")
+    breaker.opened_at -= 61
+
+    for _ in range(2):
+        response = await provider.chat([{"role": "user", "content": "hi"}])
+        assert "bad request" in response.content  # Each call got through, none was left stuck
+    assert breaker.state == "half_open"
+
+
+@pytest.mark.asyncio
+async def test_no_retry_after_deltas_were_streamed(no_sleep) -> None:
+    class HalfStream(_FailingProvider):
+        async def chat_stream(self, messages, tools=None, model=None, max_tokens=4096,
+                              temperature=0.7, on_delta=None) -> LLMResponse:
+            await on_delta("partial")
+            return await self.chat(messages)
+
+    inner = HalfStream()
+    provider = RetryingProvider(inner, sleep=no_sleep)
+    deltas: list[str] = []
+
+    async def on_delta(text: str) -> None:
+        deltas.append(text)
+
+    await provider.chat_stream([{"role": "user", "content": "hi"}], on_delta=on_delta)
+    assert inner.calls == 1 and deltas == ["partial"]
+
+
+def test_error_classification() -> None:
+    assert is_retryable(ProviderHTTPError("x", 429))
+    assert not is_retryable(ProviderHTTPError("x", 400))
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(ValueError("bad"))
+    assert retry_after(ProviderHTTPError("x", 429, {"Retry-After": "7"})) == 7.0
+    assert retry_after(ProviderHTTPError("x", 429, {"retry-after-ms": "250"})) == 0.25
+    assert retry_after(ProviderHTTPError("x", 429)) is None
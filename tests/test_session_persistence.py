@@ -0,0 +1,311 @@
+"""Tests for append-only session persistence."""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+from nanobot.session.manager import Session, SessionManager
+
+
+def _lines(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+
+def _fresh(tmp_path: Path) -> SessionManager:
+    """A manager with an empty cache, as after a process restart."""
+    return SessionManager(tmp_path)
+
+
+def test_save_appends_only_new_messages(tmp_path) -> None:
+    manager = SessionManager(tmp_path)
+    session = manager.get_or_create("test:append")
+    session.add_message("user", "one")
+    manager.save(session)
+    path = manager.store._get_session_path(session.key)
+    size_after_first = path.stat().st_size
+
+    session.add_message("assistant", "two")
+    session.last_consolidated = 1
+    manager.save(session)
+
+    records = _lines(path)
+    assert [r.get("content") for r in records if "_type" not in r] == ["one", "two"]
+    assert [r["_type"] for r in records if "_type" in r] == ["metadata", "metadata"]
+    assert path.read_bytes().startswith(path.read_bytes()[:size_after_first])
+
+    restarted = _fresh(tmp_path)
+    reloaded = restarted.get_or_create("test:append")
+    restarted.page_in(reloaded)
+    assert [m["content"] for m in reloaded.messages] == ["one", "two"]
+    assert reloaded.last_consolidated == 1
+
+
+def test_torn_final_line_is_ignored_and_repaired(tmp_path) -> None:
+    manager = SessionManager(tmp_path)
+    session = manager.get_or_create("test:torn")
+    session.add_message("user", "kept")
+    manager.save(session)
+    path = manager.store._get_session_path(session.key)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"role": "assistant", "content": "half-writ')
+
+    restarted = _fresh(tmp_path)
+    loaded = restarted.get_or_create("test:torn")
+    assert [m["content"] for m in loaded.messages] == ["kept"]
+
+    loaded.add_message("assistant", "next")
+    restarted.save(loaded)
+    again = _fresh(tmp_path).get_or_create("test:torn")
+    assert [m["content"] for m in again.messages] == ["kept", "next"]
+
+
+def test_clear_rewrites_file(tmp_path) -> None:
+    manager = SessionManager(tmp_path)
+    session = manager.get_or_create("test:clear")
+    session.add_message("user", "old")
+    manager.save(session)
+
+    session.clear()
+    session.add_message("user", "fresh")
+    manager.save(session)
+
+    loaded = _fresh(tmp_path).get_or_create("test:clear")
+    assert [m["content"] for m in loaded.messages] == ["fresh"]
+
+
+def test_unsynced_session_object_overwrites_instead_of_duplicating(tmp_path) -> None:
+    manager = SessionManager(tmp_path)
+    first = Session(key="test:dup")
+    first.add_message("user", "a")
+    manager.save(first)
+
+    second = Session(key="test:dup")
+    second.add_message("user", "a")
+    manager.save(second)
+
+    loaded = _fresh(tmp_path).get_or_create("test:dup")
+    assert len(loaded.messages) == 1
+
+
+def test_stale_metadata_records_trigger_compaction(tmp_path) -> None:
+    manager = SessionManager(tmp_path)
+    manager.store.COMPACT_MIN_STALE = 3
+    session = manager.get_or_create("test:compact")
+    session.add_message("user", "only")
+    manager.save(session)
+    path = manager.store._get_session_path(session.key)
+
+    for i in range(4):
+        session.last_consolidated = i % 2
+        manager.save(session)
+    # Saves 2-4 appended trailers; save 5 found 3 stale records and rewrote the file
+    assert [r.get("_type") for r in _lines(path)].count("metadata") == 1
+
+    manager.save(session)
+    manager.compact(session)
+    assert [r.get("_type") for r in _lines(path)].count("metadata") == 1
+    assert len(_fresh(tmp_path).get_or_create("test:compact").messages) == 1
+
+
+def test_list_sessions_uses_latest_metadata(tmp_path) -> None:
+    manager = SessionManager(tmp_path)
+    session = manager.get_or_create("test:list")
+    session.add_message("user", "hi")
+    manager.save(session)
+
+    session.add_message("assistant", "hello")
+    session.updated_at = datetime(2030, 1, 1)
+    manager.save(session)
+
+    listed = manager.list_sessions()
+    assert listed[0]["key"] == "test:list"
+    assert listed[0]["updated_at"].startswith("2030-01-01")
+
+
+def test_lru_evicts_idle_sessions_after_flushing(tmp_path) -> None:
+    manager = SessionManager(tmp_path, max_cached_sessions=2)
+    a = manager.get_or_create("test:a")
+    a.add_message("user", "unsaved")
+    manager.get_or_create("test:b")
+    manager.get_or_create("test:c")
+
+    assert list(manager._cache) == ["test:b", "test:c"]
+    assert manager.cache_stats()["evictions"] == 1
+    # The evicted session was flushed and reloads transparently
+    reloaded = manager.get_or_create("test:a")
+    assert reloaded is not a
+    assert [m["content"] for m in reloaded.messages] == ["unsaved"]
+
+    stats = manager.cache_stats()
+    assert stats["misses"] == 4 and stats["hits"] == 0
+    manager.get_or_create("test:a")
+    assert manager.cache_stats()["hits"] == 1
+
+
+def test_lru_respects_byte_budget_and_pins(tmp_path) -> None:
+    manager = SessionManager(tmp_path, max_cache_bytes=1)
+    a = manager.get_or_create("test:a")
+    a.add_message("user", "x" * 100)
+    with manager.pinned("test:a"):
+        manager.save(a)
+        manager.get_or_create("test:b")
+        assert "test:a" in manager._cache  # pinned: kept despite the budget
+    manager.get_or_create("test:c")
+    assert "test:a" not in manager._cache
+    assert manager.get_or_create("test:a").messages[0]["content"] == "x" * 100
+
+
+def test_clean_eviction_does_not_append(tmp_path) -> None:
+    manager = SessionManager(tmp_path, max_cached_sessions=1)
+    a = manager.get_or_create("test:a")
+    a.add_message("user", "hi")
+    manager.save(a)
+    path = manager.store._get_session_path("test:a")
+    size = path.stat().st_size
+    manager.get_or_create("test:b")
+    assert "test:a" not in manager._cache
+    assert path.stat().st_size == size
+
+
+def _big_session(tmp_path: Path, n: int, consolidated: int) -> SessionManager:
+    manager = SessionManager(tmp_path)
+    session = manager.get_or_create("test:big")
+    for i in range(n):
+        session.add_message("user", f"m{i}")
+    session.last_consolidated = consolidated
+    manager.save(session)
+    session.add_message("assistant", f"m{n}")
+    manager.save(session)
+    return manager
+
+
+def test_tail_load_materializes_only_unconsolidated_messages(tmp_path) -> None:
+    _big_session(tmp_path, 200, consolidated=190)
+    manager = _fresh(tmp_path)
+    session = manager.get_or_create("test:big")
+
+    assert len(session.messages) == 201
+    assert session.messages[:190] == [None] * 190
+    assert [m["content"] for m in session.get_history()] == [f"m{i}" for i in range(190, 201)]
+
+    manager.page_in(session)
+    assert [m["content"] for m in session.messages] == [f"m{i}" for i in range(201)]
+
+
+def test_tail_loaded_session_survives_rewrite(tmp_path) -> None:
+    _big_session(tmp_path, 50, consolidated=40)
+    manager = _fresh(tmp_path)
+    session = manager.get_or_create("test:big")
+    session.add_message("user", "after restart")
+    manager.compact(session)
+
+    again = _fresh(tmp_path).get_or_create("test:big")
+    again_all = _fresh(tmp_path)
+    full = again_all.get_or_create("test:big")
+    again_all.page_in(full)
+    assert len(again.messages) == 52
+    assert [m["content"] for m in full.messages][:2] == ["m0", "m1"]
+    assert full.messages[-1]["content"] == "after restart"
+
+
+def test_tail_load_counts_messages_after_torn_trailer(tmp_path) -> None:
+    manager = _big_session(tmp_path, 10, consolidated=8)
+    path = manager.store._get_session_path("test:big")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"role": "user", "content": "late"}) + "\n")
+        f.write('{"_type": "metadata", "key": "test:b')
+
+    session = _fresh(tmp_path).get_or_create("test:big")
+    assert len(session.messages) == 12
+    assert [m["content"] for m in session.messages[8:]] == ["m8", "m9", "m10", "late"]
+
+
+def test_rewritten_file_with_header_only_loads_fully(tmp_path) -> None:
+    manager = SessionManager(tmp_path)
+    session = manager.get_or_create("test:header")
+    for i in range(3):
+        session.add_message("user", f"m{i}")
+    session.last_consolidated = 3
+    manager.compact(session)
+
+    loaded = _fresh(tmp_path).get_or_create("test:header")
+    assert [m["content"] for m in loaded.messages] == ["m0", "m1", "m2"]
+
+
+def test_list_sessions_reads_index_not_files(tmp_path) -> None:
+    manager = SessionManager(tmp_path)
+    for i in range(3):
+        s = manager.get_or_create(f"test:{i}")
+        s.add_message("user", "hi")
+        s.updated_at = datetime(2030, 1, 1 + i)
+        manager.save(s)
+    manager.list_sessions()  # First listing builds the index from files
+
+    manager.store._get_session_path("test:0").write_text("garbage", encoding="utf-8")
+    listed = manager.list_sessions()
+    assert [e["key"] for e in listed] == ["test:2", "test:1", "test:0"]
+    assert listed[0]["count"] == 1 and listed[0]["bytes"] > 0
+
+    stale = manager.stale_sessions(datetime(2030, 1, 2, 12))
+    assert [e["key"] for e in stale] == ["test:1", "test:0"]
+
+
+def test_index_is_rebuilt_from_files(tmp_path) -> None:
+    manager = SessionManager(tmp_path)
+    s = manager.get_or_create("test:rebuild")
+    s.add_message("user", "hi")
+    s.last_consolidated = 1
+    manager.save(s)
+    manager.store.close()
+    for p in tmp_path.glob("sessions/index.sqlite*"):
+        p.unlink()
+
+    listed = _fresh(tmp_path).list_sessions()
+    assert len(listed) == 1
+    assert listed[0]["key"] == "test:rebuild"
+    assert listed[0]["count"] == 1 and listed[0]["last_consolidated"] == 1
+
+
+def test_sqlite_store_appends_and_loads_tail(tmp_path) -> None:
+    manager = SessionManager(tmp_path, store="sqlite")
+    session = manager.get_or_create("test:sql")
+    for i in range(5):
+        session.add_message("user", f"m{i}")
+    manager.save(session)
+    session.add_message("assistant", "m5")
+    session.last_consolidated = 4
+    manager.save(session)
+
+    store = manager.store
+    assert store._conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 6
+
+    restarted = SessionManager(tmp_path, store="sqlite")
+    loaded = restarted.get_or_create("test:sql")
+    assert loaded.messages[:4] == [None] * 4
+    assert [m["content"] for m in loaded.messages[4:]] == ["m4", "m5"]
+    restarted.page_in(loaded)
+    assert [m["content"] for m in loaded.messages] == [f"m{i}" for i in range(6)]
+
+    loaded.clear()
+    loaded.add_message("user", "fresh")
+    restarted.save(loaded)
+    again = SessionManager(tmp_path, store="sqlite").get_or_create("test:sql")
+    assert [m["content"] for m in again.messages] == ["fresh"]
+    assert restarted.list_sessions()[0]["count"] == 1
+
+
+def test_migrate_jsonl_sessions_to_sqlite(tmp_path) -> None:
+    from nanobot.session.manager import migrate_sessions, open_session_store
+
+    _big_session(tmp_path, 20, consolidated=15)
+    jsonl = open_session_store("jsonl", tmp_path / "sessions")
+    sqlite = open_session_store("sqlite", tmp_path / "sessions")
+    assert migrate_sessions(jsonl, sqlite) == 1
+    assert migrate_sessions(jsonl, sqlite) == 0  # Existing sessions are kept
+
+    loaded = sqlite.load("test:big")
+    assert loaded.last_consolidated == 15 and len(loaded.messages) == 21
+    sqlite.page_in(loaded)
+    assert loaded.messages[0]["content"] == "m0"
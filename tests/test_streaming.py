@@ -0,0 +1,161 @@
+"""Tests for streaming LLM output through the bus."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from nanobot.agent.stream import StreamRelay
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+
+class _ScriptedProvider(LLMProvider):
+    """Streams each scripted response as word deltas."""
+
+    def __init__(self, responses: list[LLMResponse]):
+        super().__init__()
+        self._responses = list(responses)
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        return self._responses.pop(0)
+
+    async def chat_stream(self, messages, tools=None, model=None, max_tokens=4096,
+                          temperature=0.7, on_delta=None):
+        response = self._responses.pop(0)
+        for word in (response.content or "").split(" "):
+            await on_delta(word + " ")
+        return response
+
+    def get_default_model(self) -> str:
+        return "test-model"
+
+
+def _drain(bus: MessageBus) -> list:
+    out = []
+    while bus.outbound_size:
+        out.append(bus.outbound.get_nowait())
+    return out
+
+
+@pytest.mark.asyncio
+async def test_default_chat_stream_falls_back_to_single_delta() -> None:
+    class _Plain(LLMProvider):
+        async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+            return LLMResponse(content="hello world")
+
+        def get_default_model(self) -> str:
+            return "m"
+
+    deltas: list[str] = []
+
+    async def _on_delta(d: str) -> None:
+        deltas.append(d)
+
+    response = await _Plain().chat_stream(messages=[], on_delta=_on_delta)
+    assert response.content == "hello world"
+    assert deltas == ["hello world"]
+
+
+@pytest.mark.asyncio
+async def test_relay_throttles_and_hides_think_blocks() -> None:
+    bus = MessageBus()
+    relay = StreamRelay(bus, "telegram", "42", interval_s=60)
+
+    await relay.on_delta("<think>plan")
+    assert bus.outbound_size == 0  # only hidden thinking so far
+
+    await relay.on_delta("</think>Hel")
+    await relay.on_delta("lo")
+    await relay.flush()
+
+    out = _drain(bus)
+    assert [m.content for m in out] == ["Hel", "Hello"]
+    assert all(m.metadata["_stream"] and m.metadata["_progress"] for m in out)
+    assert {m.metadata["_stream_id"] for m in out} == {relay.stream_id}
+
+
+@pytest.mark.asyncio
+async def test_relay_new_iteration_gets_new_stream_id() -> None:
+    bus = MessageBus()
+    relay = StreamRelay(bus, "telegram", "42", interval_s=0)
+    await relay.on_delta("a")
+    first = relay.stream_id
+    relay.next_iteration()
+    assert relay.stream_id != first
+    assert not relay.streamed
+
+
+@pytest.mark.asyncio
+async def test_agent_loop_streams_and_tags_final_reply(tmp_path) -> None:
+    from nanobot.agent.loop import AgentLoop
+    from nanobot.bus.events import InboundMessage
+    from nanobot.config.schema import ChannelsConfig
+
+    bus = MessageBus()
+    provider = _ScriptedProvider([
+        LLMResponse(content="Let me look", tool_calls=[
+            ToolCallRequest(id="c1", name="list_dir", arguments={"path": str(tmp_path)}),
+        ]),
+        LLMResponse(content="All done here"),
+    ])
+    loop = AgentLoop(
+        bus=bus, provider=provider, workspace=tmp_path,
+        channels_config=ChannelsConfig(stream_replies=True),
+    )
+    loop.tools.get_definitions = MagicMock(return_value=[])
+
+    msg = InboundMessage(channel="telegram", sender_id="u", chat_id="42", content="hi")
+    final = await loop._process_message(msg)
+
+    progress = _drain(bus)
+    streamed = [m for m in progress if m.metadata.get("_stream")]
+    assert [m.content for m in streamed][-1] == "All done here"
+    # Text of the tool-calling iteration was streamed, not repeated as plain progress
+    assert not any(m.content == "Let me look" and not m.metadata.get("_stream") for m in progress)
+    assert final is not None and final.content == "All done here"
+    assert final.metadata["_stream_id"] == streamed[-1].metadata["_stream_id"]
+    assert streamed[0].metadata["_stream_id"] != streamed[-1].metadata["_stream_id"]
+
+
+@pytest.mark.asyncio
+async def test_agent_loop_does_not_stream_by_default(tmp_path) -> None:
+    from nanobot.agent.loop import AgentLoop
+    from nanobot.bus.events import InboundMessage
+
+    bus = MessageBus()
+    provider = _ScriptedProvider([LLMResponse(content="plain")])
+    provider.chat_stream = MagicMock(side_effect=AssertionError("should not stream"))
+    loop = AgentLoop(bus=bus, provider=provider, workspace=tmp_path)
+
+    msg = InboundMessage(channel="telegram", sender_id="u", chat_id="42", content="hi")
+    final = await loop._process_message(msg)
+    assert final.content == "plain"
+    assert "_stream_id" not in final.metadata
+
+
+@pytest.mark.asyncio
+async def test_codex_sse_reports_text_deltas() -> None:
+    from nanobot.providers.openai_codex_provider import _consume_sse
+
+    events = [
+        'data: {"type": "response.output_text.delta", "delta": "Hi"}', "",
+        'data: {"type": "response.output_text.delta", "delta": " there"}', "",
+        'data: {"type": "response.completed", "response": {"status": "completed"}}', "",
+    ]
+
+    class _Resp:
+        async def aiter_lines(self):
+            for line in events:
+                yield line
+
+    deltas: list[str] = []
+
+    async def _on_delta(d: str) -> None:
+        deltas.append(d)
+
+    content, tool_calls, finish = await _consume_sse(_Resp(), _on_delta)
+    assert content == "Hi there"
+    assert deltas == ["Hi", " there"]
+    assert tool_calls == [] and finish == "stop"
@@ -125,6 +125,85 @@ class TestDispatch:
         await asyncio.gather(t1, t2)
         assert order == ["start-a", "end-a", "start-b", "end-b"]
 
+    @pytest.mark.asyncio
+    async def test_different_sessions_run_concurrently(self):
+        from nanobot.bus.events import InboundMessage, OutboundMessage
+
+        loop, bus = _make_loop()
+        order = []
+
+        async def mock_process(m, **kwargs):
+            order.append(f"start-{m.chat_id}")
+            await asyncio.sleep(0.05)
+            order.append(f"end-{m.chat_id}")
+            return OutboundMessage(channel="test", chat_id=m.chat_id, content=m.content)
+
+        loop._process_message = mock_process
+        msg1 = InboundMessage(channel="test", sender_id="u1", chat_id="c1", content="a")
+        msg2 = InboundMessage(channel="test", sender_id="u2", chat_id="c2", content="b")
+
+        await asyncio.gather(loop._dispatch(msg1), loop._dispatch(msg2))
+        assert order[:2] == ["start-c1", "start-c2"]
+
+    @pytest.mark.asyncio
+    async def test_worker_cap_limits_parallel_sessions(self):
+        from nanobot.bus.events import InboundMessage
+
+        loop, bus = _make_loop()
+        loop._worker_slots = asyncio.Semaphore(2)
+        running = 0
+        peak = 0
+
+        async def mock_process(m, **kwargs):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.02)
+            running -= 1
+            return None
+
+        loop._process_message = mock_process
+        msgs = [
+            InboundMessage(channel="test", sender_id="u", chat_id=f"c{i}", content="x")
+            for i in range(5)
+        ]
+        await asyncio.gather(*(loop._dispatch(m) for m in msgs))
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_session_queue_depth(self):
+        from nanobot.bus.events import InboundMessage
+
+        loop, bus = _make_loop()
+        release = asyncio.Event()
+
+        async def mock_process(m, **kwargs):
+            await release.wait()
+            return None
+
+        loop._process_message = mock_process
+        msgs = [
+            InboundMessage(channel="test", sender_id="u1", chat_id="c1", content=str(i))
+            for i in range(3)
+        ]
+        tasks = [asyncio.create_task(loop._dispatch(m)) for m in msgs]
+        await asyncio.sleep(0)
+        assert loop.session_queue_depth("test:c1") == 3
+        assert loop.session_queue_depths() == {"test:c1": 3}
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert loop.session_queue_depth("test:c1") == 0
+        assert loop._session_locks == {}
+
+    @pytest.mark.asyncio
+    async def test_system_message_orders_with_origin_session(self):
+        from nanobot.bus.events import InboundMessage
+
+        loop, bus = _make_loop()
+        msg = InboundMessage(channel="system", sender_id="subagent", chat_id="test:c1", content="x")
+        assert loop._dispatch_key(msg) == "test:c1"
+
 
 class TestSubagentCancellation:
     @pytest.mark.asyncio
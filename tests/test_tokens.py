@@ -0,0 +1,116 @@
+"""Tests for token estimates and token-budgeted history."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from nanobot.agent.context import ContextBuilder
+from nanobot.agent.tokens import IMAGE_TOKENS, MESSAGE_OVERHEAD, TokenCounter, estimate_tokens
+
+
+def test_estimate_counts_cjk_per_character() -> None:
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("你好世界") == 4
+    assert estimate_tokens("hi 你好") == 2 + 1
+
+
+def test_message_count_includes_parts_and_tool_calls() -> None:
+    counter = TokenCounter()
+    msg = {
+        "role": "assistant",
+        "content": [{"type": "image_url", "image_url": {"url": "data:"}}, {"type": "text", "text": "abcd"}],
+        "tool_calls": [{"function": {"name": "read", "arguments": '{"p":1}'}}],
+    }
+    assert counter.count_message(msg) == MESSAGE_OVERHEAD + IMAGE_TOKENS + 1 + 1 + 2
+
+
+def test_unknown_tokenizer_falls_back_to_estimate() -> None:
+    assert TokenCounter("no-such-encoding").count("abcdefgh") == 2
+
+
+def _turn(i: int, size: int) -> list[dict]:
+    return [
+        {"role": "user", "content": f"q{i}"},
+        {"role": "assistant", "content": None, "tool_calls": [
+            {"id": f"c{i}", "type": "function", "function": {"name": "exec", "arguments": "{}"}},
+        ]},
+        {"role": "tool", "tool_call_id": f"c{i}", "name": "exec", "content": "x" * size},
+        {"role": "assistant", "content": f"a{i}"},
+    ]
+
+
+def test_fit_history_keeps_newest_whole_turns(tmp_path: Path) -> None:
+    builder = ContextBuilder(tmp_path)
+    history = _turn(0, 40) + _turn(1, 4000) + _turn(2, 40)
+
+    fitted = builder.fit_history(history, budget=100)
+    assert [m["content"] for m in fitted if m["role"] == "user"] == ["q2"]
+
+    # The budget ends inside turn 1: its orphaned tool result is dropped, not sent
+    fitted = builder.fit_history(history, budget=1040)
+    assert fitted[0] == {"role": "user", "content": "q2"}
+    assert builder.fit_history(history, budget=10_000) == history
+
+
+def test_build_messages_fills_history_within_context_budget(tmp_path: Path) -> None:
+    history = _turn(0, 4000) + _turn(1, 40)
+    unlimited = ContextBuilder(tmp_path).build_messages(history=history, current_message="hi")
+    assert len(unlimited) == 1 + len(history) + 2
+
+    builder = ContextBuilder(tmp_path)
+    system_tokens = builder.tokens.count(builder.build_system_prompt())
+    builder.context_tokens = system_tokens + 200
+    messages = builder.build_messages(history=history, current_message="hi")
+    assert [m["content"] for m in messages[1:-2]][0] == "q1"
+    assert len(messages) == 1 + 4 + 2
+
+
+@pytest.mark.asyncio
+async def test_multi_iteration_turn_is_saved_whole(tmp_path: Path) -> None:
+    from nanobot.agent.loop import AgentLoop
+    from nanobot.bus.queue import MessageBus
+    from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+    class _Scripted(LLMProvider):
+        """Two tool-call rounds, then a final answer, per turn."""
+
+        def __init__(self, responses: list[LLMResponse]):
+            super().__init__()
+            self._responses = responses
+
+        async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+            return self._responses.pop(0)
+
+        def get_default_model(self) -> str:
+            return "scripted"
+
+    (tmp_path / "a.txt").write_text("alpha", encoding="utf-8")
+    provider = _Scripted([
+        response
+        for turn in ("1", "2")
+        for response in (
+            LLMResponse(content=None, tool_calls=[
+                ToolCallRequest(f"r{turn}", "read_file", {"path": str(tmp_path / "a.txt")})]),
+            LLMResponse(content=None, tool_calls=[ToolCallRequest(f"l{turn}", "list_dir", {"path": str(tmp_path)})]),
+            LLMResponse(content="done"),
+        )
+    ])
+    loop = AgentLoop(
+        bus=MessageBus(), provider=provider, workspace=tmp_path, model="scripted", context_window_tokens=100_000,
+    )
+
+    for text in ("first", "second"):
+        assert await loop.process_direct(text, session_key="cli:t") == "done"
+
+    messages = loop.sessions.get_or_create("cli:t").messages
+    turn = ["user", "user", "assistant", "tool", "assistant", "tool", "assistant"]  # Runtime context first
+    assert [m["role"] for m in messages] == turn * 2
+    assert messages[1]["content"] == "first" and messages[8]["content"] == "second"
+    assert [m["tool_calls"][0]["function"]["name"] for m in messages[:7] if m.get("tool_calls")] == [
+        "read_file", "list_dir",
+    ]
+    assert "alpha" in messages[3]["content"]
+    assert messages[6]["content"] == "done"
@@ -1,3 +1,4 @@
+import asyncio
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
@@ -86,3 +87,75 @@ async def test_registry_returns_validation_error() -> None:
     reg.register(SampleTool())
     result = await reg.execute("sample", {"query": "hi"})
     assert "Invalid parameters" in result
+
+
+class _SleepTool(Tool):
+    def __init__(self, name: str, read_only: bool, log: list[str]):
+        self._name = name
+        self._read_only = read_only
+        self._log = log
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def description(self) -> str:
+        return "sleep tool"
+
+    @property
+    def parameters(self) -> dict[str, Any]:
+        return {"type": "object", "properties": {"delay": {"type": "number"}}}
+
+    @property
+    def read_only(self) -> bool:
+        return self._read_only
+
+    async def execute(self, delay: float = 0, **kwargs: Any) -> str:
+        self._log.append(f"start-{self._name}-{delay}")
+        await asyncio.sleep(delay)
+        self._log.append(f"end-{self._name}-{delay}")
+        return f"{self._name}:{delay}"
+
+
+async def test_execute_many_runs_read_only_calls_concurrently_in_order() -> None:
+    log: list[str] = []
+    reg = ToolRegistry()
+    reg.register(_SleepTool("read", True, log))
+
+    results = await reg.execute_many([("read", {"delay": 0.05}), ("read", {"delay": 0.01})])
+
+    assert results == ["read:0.05", "read:0.01"]
+    assert log[:2] == ["start-read-0.05", "start-read-0.01"]
+
+
+async def test_execute_many_side_effecting_calls_are_barriers() -> None:
+    log: list[str] = []
+    reg = ToolRegistry()
+    reg.register(_SleepTool("read", True, log))
+    reg.register(_SleepTool("write", False, log))
+
+    results = await reg.execute_many([
+        ("read", {"delay": 0.02}),
+        ("write", {"delay": 0}),
+        ("read", {"delay": 0}),
+        ("missing", {}),
+    ])
+
+    assert results[:3] == ["read:0.02", "write:0", "read:0"]
+    assert "not found" in results[3]
+    assert log == [
+        "start-read-0.02", "end-read-0.02",
+        "start-write-0", "end-write-0",
+        "start-read-0", "end-read-0",
+    ]
+
+
+async def test_execute_many_respects_concurrency_cap() -> None:
+    log: list[str] = []
+    reg = ToolRegistry()
+    reg.register(_SleepTool("read", True, log))
+
+    await reg.execute_many([("read", {"delay": 0.01 * (i + 1)}) for i in range(3)], max_concurrency=2)
+
+    assert log.index("start-read-0.03") > log.index("end-read-0.01")
@@ -0,0 +1,131 @@
+"""Tests for per-turn tracing spans."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from nanobot.agent.bench import SyntheticChannel
+from nanobot.agent.loop import AgentLoop
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.manager import ChannelManager
+from nanobot.config.schema import Config
+from nanobot.providers.replay import ReplayProvider
+from nanobot.utils.tracing import new_trace_id, tracer
+
+
+@pytest.fixture
+def trace_file(tmp_path: Path):
+    path = tmp_path / "traces" / "spans.jsonl"
+    tracer.configure(path)
+    yield path
+    tracer.configure(None)
+
+
+def _spans(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_spans_nest_and_export_on_root_end(trace_file: Path) -> None:
+    with tracer.use_trace(new_trace_id()):
+        with tracer.span("root", kind="test"):
+            with tracer.span("child") as child:
+                child.set(n=3)
+            assert not trace_file.exists()  # Buffered until the root span ends
+
+    spans = {s["name"]: s for s in _spans(trace_file)}
+    assert spans["child"]["parent_id"] == spans["root"]["span_id"]
+    assert spans["child"]["trace_id"] == spans["root"]["trace_id"]
+    assert spans["root"]["parent_id"] is None
+    assert spans["child"]["attrs"] == {"n": 3}
+    assert spans["root"]["duration_ms"] >= spans["child"]["duration_ms"]
+
+
+def test_no_spans_without_trace_or_config(trace_file: Path) -> None:
+    with tracer.span("orphan") as span:
+        assert span is None
+    tracer.configure(None)
+    with tracer.use_trace(new_trace_id()), tracer.span("disabled") as span:
+        assert span is None
+    assert not trace_file.exists()
+
+
+def test_spans_under_a_remote_parent_wait_for_the_batch(trace_file: Path) -> None:
+    trace_id = new_trace_id()
+    for _ in range(3):
+        with tracer.use_trace(trace_id, "00000000000000aa"), tracer.span("channel.send"):
+            pass
+    assert not trace_file.exists()  # No file write per send
+
+    tracer.flush()
+    spans = _spans(trace_file)
+    assert [s["parent_id"] for s in spans] == ["00000000000000aa"] * 3
+    assert {s["trace_id"] for s in spans} == {trace_id}
+
+
+def test_span_records_error(trace_file: Path) -> None:
+    with pytest.raises(ValueError):
+        with tracer.use_trace(new_trace_id()), tracer.span("failing"):
+            raise ValueError("boom")
+
+    (span,) = _spans(trace_file)
+    assert span["error"] == "ValueError: boom"
+
+
+def test_otlp_format(tmp_path: Path) -> None:
+    path = tmp_path / "otlp.jsonl"
+    tracer.configure(path, "otlp")
+    try:
+        with tracer.use_trace(new_trace_id()), tracer.span("root"):
+            with tracer.span("child", tokens=12, ok=True):
+                pass
+    finally:
+        tracer.configure(None)
+
+    (request,) = [json.loads(line) for line in path.read_text().splitlines()]
+    spans = request["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    child, root = spans
+    assert child["parentSpanId"] == root["spanId"]
+    assert "parentSpanId" not in root
+    assert len(root["traceId"]) == 32 and len(root["spanId"]) == 16
+    assert int(root["endTimeUnixNano"]) >= int(root["startTimeUnixNano"])
+    assert {"key": "tokens", "value": {"intValue": "12"}} in child["attributes"]
+    assert {"key": "ok", "value": {"boolValue": True}} in child["attributes"]
+
+
+@pytest.mark.asyncio
+async def test_turn_is_traced_from_channel_to_reply(tmp_path: Path, trace_file: Path) -> None:
+    (tmp_path / "a.txt").write_text("hello", encoding="utf-8")
+    bus = MessageBus()
+    provider = ReplayProvider.scripted(tool_calls=[("read_file", {"path": str(tmp_path / "a.txt")})], final="ok")
+    loop = AgentLoop(bus=bus, provider=provider, workspace=tmp_path, model="replay")
+    channel = SyntheticChannel(bus)
+    manager = ChannelManager(Config(), bus)
+    manager.channels[channel.name] = channel
+
+    runner = asyncio.create_task(loop.run())
+    deliverer = asyncio.create_task(manager._dispatch_outbound())
+    try:
+        await asyncio.wait_for(channel.ask("c1", "read it"), timeout=10)
+    finally:
+        loop.stop()
+        deliverer.cancel()
+        await asyncio.gather(runner, deliverer, return_exceptions=True)
+
+    tracer.flush()  # The reply's send span is buffered, not a root of its own
+    spans = _spans(trace_file)
+    assert len({s["trace_id"] for s in spans}) == 1
+    (root,) = [s for s in spans if s["name"] == "agent.turn"]
+    names = [s["name"] for s in spans if s["parent_id"] == root["span_id"]]
+    assert sorted(names) == sorted([
+        "queue_wait", "context.build_messages", "llm.chat", "tool.execute", "llm.chat", "session.save",
+        "channel.send",
+    ])
+    llm = [s for s in spans if s["name"] == "llm.chat"]
+    assert [s["attrs"]["iteration"] for s in llm] == [1, 2]
+    assert llm[0]["attrs"]["tool_calls"] == 1
+    (tool,) = [s for s in spans if s["name"] == "tool.execute"]
+    assert tool["attrs"] == {"tool": "read_file"}
@@ -0,0 +1,86 @@
+"""Tests for compacting older tool results within a long turn."""
+
+from __future__ import annotations
+
+import copy
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from nanobot.agent.context import ContextBuilder
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+
+class _RecordingProvider(LLMProvider):
+    """Calls a tool `calls` times, then answers; records the messages of every request."""
+
+    def __init__(self, calls: int):
+        super().__init__()
+        self.calls = calls
+        self.requests: list[list[dict]] = []
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7):
+        self.requests.append(copy.deepcopy(messages))
+        n = len(self.requests)
+        if n <= self.calls:
+            return LLMResponse(content=None, tool_calls=[
+                ToolCallRequest(id=f"c{n}", name="exec", arguments={"command": f"step {n}"}),
+            ])
+        return LLMResponse(content="done")
+
+    def get_default_model(self) -> str:
+        return "test-model"
+
+
+def test_compact_stubs_all_but_newest_results(tmp_path: Path) -> None:
+    builder = ContextBuilder(tmp_path)
+    messages = [{"role": "user", "content": "earlier turn"}]
+    for i in range(4):
+        builder.add_tool_result(messages, f"c{i}", "exec", str(i) * 1000)
+    builder.add_tool_result(messages, "c-short", "exec", "ok")
+
+    saved = builder.compact_tool_results(messages, start=1, keep_recent=3)
+    assert saved > 0
+    contents = [m["content"] for m in messages[1:]]
+    assert contents[0].startswith(ContextBuilder.COMPACTED_TAG) and "1000 chars" in contents[0]
+    assert contents[1].startswith(ContextBuilder.COMPACTED_TAG)
+    assert contents[2:] == ["2" * 1000, "3" * 1000, "ok"]
+    assert messages[1]["tool_call_id"] == "c0"
+    assert builder.compact_tool_results(messages, start=1, keep_recent=3) == 0
+
+
+@pytest.mark.asyncio
+async def test_agent_loop_compacts_long_turns(tmp_path: Path) -> None:
+    from nanobot.agent.loop import AgentLoop
+    from nanobot.bus.queue import MessageBus
+
+    provider = _RecordingProvider(calls=8)
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path, compact_turn_tokens=3000)
+    loop.tools.get_definitions = MagicMock(return_value=[])
+    loop.tools.execute_many = AsyncMock(side_effect=lambda calls, **_: ["x" * 4000 for _ in calls])
+
+    initial = loop.context.build_messages(history=[], current_message="go")
+    content, _, _ = await loop._run_agent_loop(initial)
+    assert content == "done"
+
+    last = provider.requests[-1]
+    results = [m["content"] for m in last if m.get("role") == "tool"]
+    assert len(results) == 8
+    assert all(r.startswith(ContextBuilder.COMPACTED_TAG) for r in results[:4])
+    assert results[-AgentLoop._COMPACT_KEEP_RESULTS:] == ["x" * 4000] * AgentLoop._COMPACT_KEEP_RESULTS
+    assert loop.context.tokens.count_messages(last) < 3000 + 4 * 1100
+
+
+@pytest.mark.asyncio
+async def test_agent_loop_does_not_compact_when_disabled(tmp_path: Path) -> None:
+    from nanobot.agent.loop import AgentLoop
+    from nanobot.bus.queue import MessageBus
+
+    provider = _RecordingProvider(calls=6)
+    loop = AgentLoop(bus=MessageBus(), provider=provider, workspace=tmp_path)
+    loop.tools.get_definitions = MagicMock(return_value=[])
+    loop.tools.execute_many = AsyncMock(side_effect=lambda calls, **_: ["x" * 4000 for _ in calls])
+
+    await loop._run_agent_loop(loop.context.build_messages(history=[], current_message="go"))
+    assert all(m["content"] == "x" * 4000 for m in provider.requests[-1] if m.get("role") == "tool")